@@ -21,6 +21,24 @@ export const getConversationApi = (conversationId: number) =>
 export const getMessagesApi = (conversationId: number) =>
   AXIOS_INSTANCE.get<PaginatedResponse<Message>>(`/api/chat/conversations/${conversationId}/messages/`);
 
+// Delta response: only rows newer than the cursor the client already has (204 when none)
+interface DeltaResponse<T> {
+  results: T[];
+  has_more: boolean;
+}
+
+// Get messages newer than sinceId; with wait > 0 the server holds the request until one arrives
+export const getMessagesSinceApi = (conversationId: number, sinceId: number, wait = 0) =>
+  AXIOS_INSTANCE.get<DeltaResponse<Message> & { last_id: number }>(`/api/chat/conversations/${conversationId}/messages/`, {
+    params: { since_id: sinceId, wait }
+  });
+
+// Get conversations changed after updatedSince (the last_updated of the previous delta)
+export const getConversationsUpdatedSinceApi = (updatedSince: string, wait = 0) =>
+  AXIOS_INSTANCE.get<DeltaResponse<Conversation> & { last_updated: string }>('/api/chat/conversations/', {
+    params: { updated_since: updatedSince, wait }
+  });
+
 // Get messages by full pagination URL (for next/previous links)
 export const getMessagesByUrlApi = (url: string) =>
   AXIOS_INSTANCE.get<PaginatedResponse<Message>>(url);
@@ -38,3 +56,33 @@ export const startConversationApi = (userId: number) =>
 // Mark messages as read
 export const markMessagesReadApi = (conversationId: number) =>
   AXIOS_INSTANCE.post<{ status: string }>(`/api/chat/conversations/${conversationId}/read/`);
+
+// Typing indicator for the other participants (socket clients send it over the socket instead)
+export const sendTypingApi = (conversationId: number) =>
+  AXIOS_INSTANCE.post<{ status: string }>(`/api/chat/conversations/${conversationId}/typing/`);
+
+// Online status of a batch of users
+export const getPresenceApi = (userIds: number[]) =>
+  AXIOS_INSTANCE.get<{ online: Record<number, boolean> }>('/api/chat/presence/', {
+    params: { user_ids: userIds.join(',') }
+  });
+
+// Keep the current user online while no socket is open
+export const presenceHeartbeatApi = () =>
+  AXIOS_INSTANCE.post<{ status: string; ttl: number }>('/api/chat/presence/heartbeat/');
+
+// Full-text search over the current user's conversations (snippets highlight matches with <mark>)
+export interface MessageSearchResult {
+  id: number;
+  conversation_id: number;
+  sender: Message['sender'];
+  content: string;
+  snippet: string;
+  rank: number;
+  created_at: string;
+}
+
+export const searchMessagesApi = (query: string, cursor?: string | null) =>
+  AXIOS_INSTANCE.get<{ results: MessageSearchResult[]; next_cursor: string | null }>('/api/chat/messages/search/', {
+    params: { q: query, ...(cursor ? { cursor } : {}) }
+  });
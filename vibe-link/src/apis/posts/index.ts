@@ -9,13 +9,37 @@ interface PaginatedResponse<T> {
   results: T[];
 }
 
-// Get all posts
-export const getPostsApi = () =>
-  AXIOS_INSTANCE.get<PaginatedResponse<Post>>('/api/posts/');
+// Cursor paginated feed response type
+export interface FeedResponse<T> {
+  results: T[];
+  next_cursor: string | null;
+}
+
+// Get all posts (lean mode: cursor pages without a COUNT query)
+export const getPostsApi = (cursor?: string | null) =>
+  AXIOS_INSTANCE.get<FeedResponse<Post>>('/api/posts/', {
+    params: { lean: 1, ...(cursor ? { cursor } : {}) }
+  });
+
+// Home feed ordering: newest first, or ranked by engagement and affinity
+export type FeedMode = 'latest' | 'ranked';
 
 // Get posts from followers
-export const getFollowerPostsApi = () =>
-  AXIOS_INSTANCE.get<Post[]>('/api/posts/followers/');
+export const getFollowerPostsApi = (cursor?: string | null, mode: FeedMode = 'latest') =>
+  AXIOS_INSTANCE.get<FeedResponse<Post>>('/api/posts/followers/', {
+    params: { mode, ...(cursor ? { cursor } : {}) }
+  });
+
+// Trending posts and hashtags
+export interface TrendingResponse {
+  posts: (Post & { trending_score: number })[];
+  hashtags: { hashtag: string; score: number }[];
+}
+
+export const getTrendingApi = (limit?: number) =>
+  AXIOS_INSTANCE.get<TrendingResponse>('/api/posts/trending/', {
+    params: limit ? { limit } : undefined
+  });
 
 // Get user posts
 export const getUserPostsApi = (userId: number) =>
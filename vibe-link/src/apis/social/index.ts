@@ -22,6 +22,14 @@ export const discoverUsersApi = (params?: {
 export const toggleFollowApi = (userId: number) =>
   AXIOS_INSTANCE.post<{ is_following: boolean; followers_count: number }>(`/api/social/follow/${userId}/`);
 
+// Follow/unfollow many users at once
+export const bulkFollowApi = (userIds: number[], action: 'follow' | 'unfollow' = 'follow') =>
+  AXIOS_INSTANCE.post<{
+    results: { user_id: number; is_following: boolean; followers_count: number }[];
+    changed_count: number;
+    following_count: number;
+  }>('/api/social/follow/bulk/', { user_ids: userIds, action });
+
 // Get user followers
 export const getFollowersApi = (userId: number) =>
   AXIOS_INSTANCE.get<PaginatedResponse<DiscoverUser>>(`/api/social/followers/${userId}/`);
@@ -30,9 +38,21 @@ export const getFollowersApi = (userId: number) =>
 export const getFollowingApi = (userId: number) =>
   AXIOS_INSTANCE.get<PaginatedResponse<DiscoverUser>>(`/api/social/following/${userId}/`);
 
+// Cursor paginated notification inbox
+interface NotificationInboxResponse {
+  next: string | null;
+  previous: string | null;
+  unread_count: number;
+  results: Notification[];
+}
+
 // Get notifications
-export const getNotificationsApi = () =>
-  AXIOS_INSTANCE.get<PaginatedResponse<Notification>>('/api/social/notifications/');
+export const getNotificationsApi = (cursorUrl?: string) =>
+  AXIOS_INSTANCE.get<NotificationInboxResponse>(cursorUrl || '/api/social/notifications/');
+
+// Get unread notifications count
+export const getUnreadNotificationsCountApi = () =>
+  AXIOS_INSTANCE.get<{ unread_count: number }>('/api/social/notifications/unread-count/');
 
 // Mark notification as read
 export const markNotificationReadApi = (notificationId: number) =>
@@ -1,7 +1,7 @@
 import { useEffect, useState } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { useAppDispatch, useAppSelector } from '@/store/hooks'
-import { fetchNotifications, markNotificationAsRead } from '@/store/slices/socialSlice'
+import { fetchNotifications, fetchNotificationsUnreadCount, markNotificationAsRead } from '@/store/slices/socialSlice'
 import { Button } from '@/components/ui/button'
 import { Badge } from '@/components/ui/badge'
 import { 
@@ -41,9 +41,9 @@ export function NotificationDropdown() {
   }, [dispatch, isOpen])
 
   useEffect(() => {
-    // Set up real-time updates every 10 seconds (more frequent for better UX)
+    // Poll only the unread counter every 10 seconds; the list is fetched when the dropdown opens
     const interval = setInterval(() => {
-      dispatch(fetchNotifications())
+      dispatch(fetchNotificationsUnreadCount())
     }, 10000)
     
     return () => {
@@ -1,8 +1,12 @@
 const BASE_URL = "http://127.0.0.1:8000/api";
+const WS_BASE_URL = "ws://127.0.0.1:8000/ws";
 
 const AUTH_TOKEN_REFRESH = "/auth/token/refresh/";
+const CHAT_SOCKET_PATH = "/chat/";
 
 export {
     AUTH_TOKEN_REFRESH,
     BASE_URL,
-};
\ No newline at end of file
+    CHAT_SOCKET_PATH,
+    WS_BASE_URL,
+};
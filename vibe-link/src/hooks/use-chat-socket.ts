@@ -0,0 +1,115 @@
+import { useState, useEffect, useRef, useCallback } from 'react'
+import { useAppDispatch } from '@/store/hooks'
+import { WS_BASE_URL, CHAT_SOCKET_PATH } from '@/constants/base'
+import { receiveMessage, applyReadReceipt, conversationUpdated, fetchConversations, setTyping } from '@/store/slices/chatSlice'
+import { sendTypingApi } from '@/apis/chat'
+
+const PING_INTERVAL = 25000
+const MAX_RECONNECT_DELAY = 30000
+// A typing indicator disappears this long after the last typing event
+const TYPING_TIMEOUT = 4000
+
+// Keeps a WebSocket open to the chat push endpoint and feeds its events into the chat slice.
+// Returns whether the socket is connected so callers can fall back to polling when it isn't,
+// and sendTyping to tell a conversation's other participants that the user is typing.
+export function useChatSocket(userId?: number) {
+  const dispatch = useAppDispatch()
+  const [isConnected, setIsConnected] = useState(false)
+  const socketRef = useRef<WebSocket | null>(null)
+
+  useEffect(() => {
+    if (!userId) return
+
+    let socket: WebSocket | null = null
+    let pingTimer: ReturnType<typeof setInterval> | undefined
+    let reconnectTimer: ReturnType<typeof setTimeout> | undefined
+    let attempts = 0
+    let closed = false
+    const typingTimers: Record<number, ReturnType<typeof setTimeout>> = {}
+
+    const connect = () => {
+      const token = localStorage.getItem('accessToken')
+      if (!token) return
+      socket = new WebSocket(`${WS_BASE_URL}${CHAT_SOCKET_PATH}?token=${encodeURIComponent(token)}`)
+      socketRef.current = socket
+
+      socket.onopen = () => {
+        attempts = 0
+        setIsConnected(true)
+        // Catch up on anything missed while disconnected
+        dispatch(fetchConversations())
+        pingTimer = setInterval(() => socket?.send(JSON.stringify({ type: 'ping' })), PING_INTERVAL)
+      }
+
+      socket.onmessage = (event) => {
+        const data = JSON.parse(event.data)
+        switch (data.type) {
+          case 'message.new':
+            dispatch(receiveMessage({
+              conversationId: data.conversation_id,
+              message: data.message,
+              isOwn: data.message.sender.id === userId,
+            }))
+            break
+          case 'messages.read':
+            if (data.reader_id !== userId) {
+              dispatch(applyReadReceipt({
+                conversationId: data.conversation_id,
+                lastReadMessageId: data.last_read_message_id,
+              }))
+            }
+            break
+          case 'typing': {
+            const conversationId = data.conversation_id
+            dispatch(setTyping({ conversationId, isTyping: true }))
+            clearTimeout(typingTimers[conversationId])
+            typingTimers[conversationId] = setTimeout(
+              () => dispatch(setTyping({ conversationId, isTyping: false })),
+              TYPING_TIMEOUT
+            )
+            break
+          }
+          case 'conversation.updated':
+            dispatch(conversationUpdated({
+              conversationId: data.conversation_id,
+              updatedAt: data.updated_at,
+              lastMessage: data.last_message,
+            }))
+            break
+        }
+      }
+
+      socket.onclose = () => {
+        setIsConnected(false)
+        clearInterval(pingTimer)
+        if (closed) return
+        // Reconnect with exponential backoff (the access token may have been refreshed meanwhile)
+        const delay = Math.min(1000 * 2 ** attempts, MAX_RECONNECT_DELAY)
+        attempts += 1
+        reconnectTimer = setTimeout(connect, delay)
+      }
+    }
+
+    connect()
+
+    return () => {
+      closed = true
+      clearInterval(pingTimer)
+      clearTimeout(reconnectTimer)
+      Object.values(typingTimers).forEach(clearTimeout)
+      socket?.close()
+      socketRef.current = null
+    }
+  }, [dispatch, userId])
+
+  const sendTyping = useCallback((conversationId: number) => {
+    const socket = socketRef.current
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify({ type: 'typing', conversation_id: conversationId }))
+    } else {
+      sendTypingApi(conversationId).catch(() => {})
+    }
+  }, [])
+
+  return { isConnected, sendTyping }
+}
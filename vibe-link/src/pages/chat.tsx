@@ -1,7 +1,9 @@
 import { useState, useEffect, useRef } from 'react'
 import { useLocation, useParams, useNavigate } from 'react-router-dom'
 import { useAppDispatch, useAppSelector } from '@/store/hooks'
-import { fetchConversations, fetchMessages, fetchMoreMessages, sendMessage, startConversation, markMessagesAsRead, addOptimisticMessage } from '@/store/slices/chatSlice'
+import { fetchConversations, fetchMessages, fetchMoreMessages, fetchNewMessages, fetchPresence, sendMessage, startConversation, markMessagesAsRead, addOptimisticMessage, setActiveConversation } from '@/store/slices/chatSlice'
+import { useChatSocket } from '@/hooks/use-chat-socket'
+import { presenceHeartbeatApi } from '@/apis/chat'
 import { Button } from '@/components/ui/button'
 import { Avatar, AvatarFallback, AvatarImage } from '@/components/ui/avatar'
 import { Badge } from '@/components/ui/badge'
@@ -20,7 +22,7 @@ export function ChatPage() {
   const { recipientId } = useParams<{ recipientId?: string }>()
   const dispatch = useAppDispatch()
   const { user } = useAppSelector(state => state.auth)
-  const { conversations, messages, isLoading: conversationsLoading, messagesPagination } = useAppSelector(state => state.chat)
+  const { conversations, messages, isLoading: conversationsLoading, messagesPagination, typing, onlineUsers } = useAppSelector(state => state.chat)
   
   const [selectedChat, setSelectedChat] = useState<number | null>(null)
   const [searchTerm, setSearchTerm] = useState('')
@@ -31,6 +33,9 @@ export function ChatPage() {
   const messagesContainerRef = useRef<HTMLDivElement>(null)
   const previousScrollHeightRef = useRef<number | null>(null)
   const [isLoadingMore, setIsLoadingMore] = useState(false)
+  // New messages, read receipts and conversation updates are pushed over a WebSocket
+  const { isConnected: isSocketConnected, sendTyping } = useChatSocket(user?.id)
+  const lastTypingSentRef = useRef(0)
 
   // Check if mobile
   useEffect(() => {
@@ -80,19 +85,25 @@ export function ChatPage() {
   }
 
 
-  // Load conversations on mount and periodically
+  // Load conversations on mount
   useEffect(() => {
     if (user?.id) {
       dispatch(fetchConversations())
-      
-      // Refresh conversations every 30 seconds for real-time updates
+    }
+  }, [dispatch, user?.id])
+
+  // Fall back to refreshing conversations every 30 seconds while the socket is down
+  useEffect(() => {
+    if (user?.id && !isSocketConnected) {
       const interval = setInterval(() => {
         dispatch(fetchConversations())
+        // Socket pings keep us online; without one, send heartbeats instead
+        presenceHeartbeatApi().catch(() => {})
       }, 30000)
       
       return () => clearInterval(interval)
     }
-  }, [dispatch, user?.id])
+  }, [dispatch, user?.id, isSocketConnected])
 
   // Handle pre-filled message from navigation state
   useEffect(() => {
@@ -102,21 +113,40 @@ export function ChatPage() {
     }
   }, [location.state])
 
+  // Online status of everyone in the conversation list (answered from server memory)
+  const participantIds = conversations
+    .map(c => c.other_participant?.id)
+    .filter((id): id is number => typeof id === 'number')
+    .slice(0, 200)
+  const participantKey = participantIds.join(',')
+  useEffect(() => {
+    if (!participantKey) return
+    const ids = participantKey.split(',').map(Number)
+    dispatch(fetchPresence(ids))
+    const interval = setInterval(() => dispatch(fetchPresence(ids)), 30000)
+    return () => clearInterval(interval)
+  }, [dispatch, participantKey])
+
   // Fetch messages when chat is selected
   useEffect(() => {
+    dispatch(setActiveConversation(selectedChat))
     if (selectedChat) {
       dispatch(fetchMessages(selectedChat))
       // Mark messages as read when opening a chat
       dispatch(markMessagesAsRead(selectedChat))
-      
-      // Refresh messages every 30 seconds when in active chat (less frequent to avoid interference)
+    }
+  }, [dispatch, selectedChat])
+
+  // Fall back to refreshing the open chat every 30 seconds while the socket is down
+  useEffect(() => {
+    if (selectedChat && !isSocketConnected) {
       const interval = setInterval(() => {
-        dispatch(fetchMessages(selectedChat))
+        dispatch(fetchNewMessages(selectedChat))
       }, 30000)
       
       return () => clearInterval(interval)
     }
-  }, [dispatch, selectedChat])
+  }, [dispatch, selectedChat, isSocketConnected])
 
   // Handle recipient ID from URL
   useEffect(() => {
@@ -329,9 +359,12 @@ export function ChatPage() {
                   >
                     <h3 className="font-semibold text-foreground truncate">
                       {chat.other_participant?.full_name || chat.other_participant?.username}
+                      {chat.other_participant?.id && onlineUsers[chat.other_participant.id] && (
+                        <span className="ml-2 inline-block h-2 w-2 rounded-full bg-green-500" title="Online" />
+                      )}
                     </h3>
                     <p className="text-sm text-muted-foreground truncate">
-                      {chat.last_message?.content || 'No messages yet'}
+                      {typing[chat.id] ? 'typing…' : (chat.last_message?.content || 'No messages yet')}
                     </p>
                   </div>
                   
@@ -389,7 +422,11 @@ export function ChatPage() {
                       {selectedChatData.other_participant?.full_name || selectedChatData.other_participant?.username}
                     </h3>
                     <p className="text-sm text-muted-foreground">
-                      @{selectedChatData.other_participant?.username}
+                      {typing[selectedChatData.id]
+                        ? 'typing…'
+                        : selectedChatData.other_participant?.id && onlineUsers[selectedChatData.other_participant.id]
+                          ? 'Online'
+                          : `@${selectedChatData.other_participant?.username}`}
                     </p>
                   </div>
                 </div>
@@ -442,7 +479,14 @@ export function ChatPage() {
                   <Input
                     placeholder="Type a message..."
                     value={messageText}
-                    onChange={(e) => setMessageText(e.target.value)}
+                    onChange={(e) => {
+                      setMessageText(e.target.value)
+                      // Tell the other participant at most every 3 seconds
+                      if (selectedChat && e.target.value && Date.now() - lastTypingSentRef.current > 3000) {
+                        lastTypingSentRef.current = Date.now()
+                        sendTyping(selectedChat)
+                      }
+                    }}
                     onKeyPress={handleKeyPress}
                     className="pr-20"
                   />
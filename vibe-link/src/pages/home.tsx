@@ -1,7 +1,7 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { useNavigate, useSearchParams } from 'react-router-dom'
 import { useAppDispatch, useAppSelector } from '@/store/hooks'
-import { fetchFollowerPosts, createPost, toggleLike, toggleShare } from '@/store/slices/postsSlice'
+import { fetchFollowerPosts, fetchMoreFollowerPosts, createPost, toggleLike, toggleShare } from '@/store/slices/postsSlice'
 import { toggleFollow, fetchTopMatches } from '@/store/slices/socialSlice'
 import { startConversation } from '@/store/slices/chatSlice'
 import { formatNumber } from '@/lib/utils'
@@ -29,7 +29,7 @@ export function HomePage() {
   const navigate = useNavigate()
   const dispatch = useAppDispatch()
   const { user } = useAppSelector(state => state.auth)
-  const { followerPosts, isLoading: postsLoading } = useAppSelector(state => state.posts)
+  const { followerPosts, followerPostsNextCursor, isLoadingMoreFollowerPosts, isLoading: postsLoading } = useAppSelector(state => state.posts)
   const { topMatches: suggestedUsers, followLoadingIds } = useAppSelector(state => state.social)
   
   const [isCreatingPost, setIsCreatingPost] = useState(false)
@@ -43,6 +43,7 @@ export function HomePage() {
 
   const [shareOpen, setShareOpen] = useState(false)
   const [sharePostId, setSharePostId] = useState<number | null>(null)
+  const feedEndRef = useRef<HTMLDivElement | null>(null)
 
   // Load data on component mount
   useEffect(() => {
@@ -50,6 +51,21 @@ export function HomePage() {
     dispatch(fetchTopMatches())
   }, [dispatch])
 
+  // Infinite scroll: load the next feed page when the sentinel below the feed becomes visible
+  useEffect(() => {
+    const sentinel = feedEndRef.current
+    if (!sentinel || !followerPostsNextCursor) return
+
+    const observer = new IntersectionObserver((entries) => {
+      if (entries[0].isIntersecting && !isLoadingMoreFollowerPosts && followerPostsNextCursor) {
+        dispatch(fetchMoreFollowerPosts(followerPostsNextCursor))
+      }
+    }, { rootMargin: '400px' })
+
+    observer.observe(sentinel)
+    return () => observer.disconnect()
+  }, [dispatch, followerPostsNextCursor, isLoadingMoreFollowerPosts])
+
   const handleLike = (postId: number) => {
     dispatch(toggleLike(postId))
   }
@@ -432,6 +448,13 @@ export function HomePage() {
             </Card>
           ))
         )}
+
+        <div ref={feedEndRef} />
+        {isLoadingMoreFollowerPosts && (
+          <div className="text-center py-4">
+            <div className="text-muted-foreground">Loading more posts...</div>
+          </div>
+        )}
       </div>
     </div>
   )
@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react'
 import { useAppDispatch, useAppSelector } from '@/store/hooks'
-import { fetchNotifications, markNotificationAsRead, markAllNotificationsAsRead, deleteNotification, deleteAllNotifications } from '@/store/slices/socialSlice'
+import { fetchNotifications, fetchMoreNotifications, markNotificationAsRead, markAllNotificationsAsRead, deleteNotification, deleteAllNotifications } from '@/store/slices/socialSlice'
 import { Button } from '@/components/ui/button'
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card'
 import { Badge } from '@/components/ui/badge'
@@ -16,7 +16,7 @@ import { SwipeableNotificationCard } from '@/components/notifications/swipeable-
 
 export function NotificationsPage() {
   const dispatch = useAppDispatch()
-  const { notifications, isLoading, notificationsUnreadCount } = useAppSelector(state => state.social)
+  const { notifications, isLoading, notificationsUnreadCount, notificationsNextCursor } = useAppSelector(state => state.social)
   
   const [filter, setFilter] = useState<{ type?: string }>({})
 
@@ -47,6 +47,12 @@ export function NotificationsPage() {
     dispatch(deleteAllNotifications())
   }
 
+  const handleLoadOlder = () => {
+    if (notificationsNextCursor) {
+      dispatch(fetchMoreNotifications(notificationsNextCursor))
+    }
+  }
+
 
   const filteredNotifications = filter.type 
     ? notifications.filter(n => n.notification_type === filter.type)
@@ -158,6 +164,13 @@ export function NotificationsPage() {
               />
             ))
           )}
+          {!isLoading && notificationsNextCursor && (
+            <div className="flex justify-center pt-2">
+              <Button onClick={handleLoadOlder} variant="outline" size="sm">
+                Load older notifications
+              </Button>
+            </div>
+          )}
         </div>
       </div>
     </div>
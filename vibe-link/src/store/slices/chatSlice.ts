@@ -5,6 +5,8 @@ import {
   getConversationApi, 
   getMessagesApi, 
   getMessagesByUrlApi,
+  getMessagesSinceApi,
+  getPresenceApi,
   sendMessageApi, 
   startConversationApi, 
   markMessagesReadApi 
@@ -20,6 +22,10 @@ export interface ChatState {
     previous: string | null
     count: number
   }
+  activeConversationId: number | null
+  // Conversations where the other participant is typing right now
+  typing: Record<number, boolean>
+  onlineUsers: Record<number, boolean>
   isLoading: boolean
   error: string | null
 }
@@ -29,6 +35,9 @@ const initialState: ChatState = {
   currentConversation: null,
   messages: [],
   messagesPagination: { next: null, previous: null, count: 0 },
+  activeConversationId: null,
+  typing: {},
+  onlineUsers: {},
   isLoading: false,
   error: null,
 }
@@ -71,6 +80,33 @@ export const fetchMessages = createAsyncThunk(
 )
 
 // Load more messages from a pagination URL and prepend them (older messages)
+// Only messages newer than the latest one already loaded
+export const fetchNewMessages = createAsyncThunk(
+  'chat/fetchNewMessages',
+  async (conversationId: number, { getState, rejectWithValue }) => {
+    const state = getState() as { chat: ChatState }
+    const sinceId = Math.max(0, ...state.chat.messages.map(m => m.id))
+    try {
+      const response = await getMessagesSinceApi(conversationId, sinceId)
+      return { conversationId, messages: response.status === 204 ? [] : response.data.results }
+    } catch (error: any) {
+      return rejectWithValue(error.response?.data?.detail || 'Failed to fetch new messages')
+    }
+  }
+)
+
+export const fetchPresence = createAsyncThunk(
+  'chat/fetchPresence',
+  async (userIds: number[], { rejectWithValue }) => {
+    try {
+      const response = await getPresenceApi(userIds)
+      return response.data.online
+    } catch (error: any) {
+      return rejectWithValue(error.response?.data?.detail || 'Failed to fetch presence')
+    }
+  }
+)
+
 export const fetchMoreMessages = createAsyncThunk(
   'chat/fetchMoreMessages',
   async (url: string, { rejectWithValue }) => {
@@ -119,6 +155,22 @@ export const markMessagesAsRead = createAsyncThunk(
   }
 )
 
+// Conversation update pushed over the chat socket; unknown conversations trigger a refetch
+export const conversationUpdated = createAsyncThunk(
+  'chat/conversationUpdated',
+  async (
+    update: { conversationId: number; updatedAt: string; lastMessage?: { content: string; sender: string; timestamp: string } },
+    { dispatch, getState }
+  ) => {
+    const state = getState() as { chat: ChatState }
+    if (state.chat.conversations.some(c => c.id === update.conversationId)) {
+      dispatch(applyConversationUpdate(update))
+    } else {
+      dispatch(fetchConversations())
+    }
+  }
+)
+
 const chatSlice = createSlice({
   name: 'chat',
   initialState,
@@ -132,6 +184,59 @@ const chatSlice = createSlice({
     addMessage: (state, action: PayloadAction<Message>) => {
       state.messages.push(action.payload)
     },
+    setActiveConversation: (state, action: PayloadAction<number | null>) => {
+      state.activeConversationId = action.payload
+    },
+    // New message pushed over the chat socket
+    receiveMessage: (state, action: PayloadAction<{ conversationId: number; message: Message; isOwn: boolean }>) => {
+      const { conversationId, message, isOwn } = action.payload
+      const isActive = conversationId === state.activeConversationId
+      if (isActive && !state.messages.some(m => m.id === message.id)) {
+        if (isOwn) {
+          // Our own message from this tab replaces its optimistic copy
+          state.messages = state.messages.filter(m => !(m.id < 0 && m.sender.username === 'You'))
+        }
+        state.messages.push(message)
+      }
+      if (!isOwn) {
+        delete state.typing[conversationId]
+      }
+      const conversation = state.conversations.find(c => c.id === conversationId)
+      if (conversation && !isOwn && !isActive) {
+        conversation.unread_count = (conversation.unread_count || 0) + 1
+      }
+    },
+    setTyping: (state, action: PayloadAction<{ conversationId: number; isTyping: boolean }>) => {
+      if (action.payload.isTyping) {
+        state.typing[action.payload.conversationId] = true
+      } else {
+        delete state.typing[action.payload.conversationId]
+      }
+    },
+    // The other participant read the conversation up to lastReadMessageId
+    applyReadReceipt: (state, action: PayloadAction<{ conversationId: number; lastReadMessageId?: number | null }>) => {
+      const { conversationId, lastReadMessageId } = action.payload
+      if (conversationId === state.activeConversationId) {
+        state.messages.forEach(message => {
+          if (lastReadMessageId == null || (message.id > 0 && message.id <= lastReadMessageId)) {
+            message.is_read = true
+          }
+        })
+      }
+    },
+    applyConversationUpdate: (
+      state,
+      action: PayloadAction<{ conversationId: number; updatedAt: string; lastMessage?: { content: string; sender: string; timestamp: string } }>
+    ) => {
+      const conversation = state.conversations.find(c => c.id === action.payload.conversationId)
+      if (!conversation) return
+      conversation.updated_at = action.payload.updatedAt
+      if (action.payload.lastMessage) {
+        conversation.last_message = action.payload.lastMessage
+      }
+      // Move conversation to top
+      state.conversations = [conversation, ...state.conversations.filter(c => c.id !== conversation.id)]
+    },
     addOptimisticMessage: (state, action: PayloadAction<{ content: string; conversationId: number }>) => {
       const now = new Date()
       const tempMessage = {
@@ -217,6 +322,15 @@ const chatSlice = createSlice({
         state.messagesPagination.previous = action.payload.previous ?? null
         state.messagesPagination.count = action.payload.count ?? state.messagesPagination.count
       })
+      .addCase(fetchNewMessages.fulfilled, (state, action) => {
+        // Ignore answers for a chat the user has since left
+        if (action.payload.conversationId !== state.activeConversationId) return
+        const known = new Set(state.messages.map(m => m.id))
+        state.messages.push(...action.payload.messages.filter(m => !known.has(m.id)))
+      })
+      .addCase(fetchPresence.fulfilled, (state, action) => {
+        Object.assign(state.onlineUsers, action.payload)
+      })
       .addCase(fetchMoreMessages.rejected, (state, action) => {
         state.isLoading = false
         state.error = action.payload as string
@@ -224,9 +338,11 @@ const chatSlice = createSlice({
       
       // Send message
       .addCase(sendMessage.fulfilled, (state, action) => {
-        // Remove optimistic message and add real one
+        // Remove optimistic message and add real one (unless the socket delivered it first)
         state.messages = state.messages.filter(m => !(m.id < 0 && m.sender.username === 'You'))
-        state.messages.push(action.payload)
+        if (!state.messages.some(m => m.id === action.payload.id)) {
+          state.messages.push(action.payload)
+        }
         
         // Update the conversation's last message
         const conversation = state.conversations.find(c => c.id === state.currentConversation?.id)
@@ -277,5 +393,16 @@ const chatSlice = createSlice({
   },
 })
 
-export const { clearError, setCurrentConversation, addMessage, addOptimisticMessage, updateConversation } = chatSlice.actions
+export const {
+  clearError,
+  setCurrentConversation,
+  addMessage,
+  addOptimisticMessage,
+  updateConversation,
+  setActiveConversation,
+  receiveMessage,
+  applyReadReceipt,
+  applyConversationUpdate,
+  setTyping,
+} = chatSlice.actions
 export default chatSlice.reducer
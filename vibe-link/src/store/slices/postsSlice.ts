@@ -14,6 +14,8 @@ import { toggleFollow } from './socialSlice'
 export interface PostsState {
   posts: Post[]
   followerPosts: Post[]
+  followerPostsNextCursor: string | null
+  isLoadingMoreFollowerPosts: boolean
   userPosts: Post[]
   isLoading: boolean
   error: string | null
@@ -22,6 +24,8 @@ export interface PostsState {
 const initialState: PostsState = {
   posts: [],
   followerPosts: [],
+  followerPostsNextCursor: null,
+  isLoadingMoreFollowerPosts: false,
   userPosts: [],
   isLoading: false,
   error: null,
@@ -52,6 +56,18 @@ export const fetchFollowerPosts = createAsyncThunk(
   }
 )
 
+export const fetchMoreFollowerPosts = createAsyncThunk(
+  'posts/fetchMoreFollowerPosts',
+  async (cursor: string, { rejectWithValue }) => {
+    try {
+      const response = await getFollowerPostsApi(cursor)
+      return response.data
+    } catch (error: any) {
+      return rejectWithValue(error.response?.data?.detail || 'Failed to fetch more follower posts')
+    }
+  }
+)
+
 export const fetchUserPosts = createAsyncThunk(
   'posts/fetchUserPosts',
   async (userId: number, { rejectWithValue }) => {
@@ -143,12 +159,29 @@ const postsSlice = createSlice({
       })
       .addCase(fetchFollowerPosts.fulfilled, (state, action) => {
         state.isLoading = false
-        state.followerPosts = Array.isArray(action.payload) ? action.payload : []
+        state.followerPosts = Array.isArray(action.payload.results) ? action.payload.results : []
+        state.followerPostsNextCursor = action.payload.next_cursor
       })
       .addCase(fetchFollowerPosts.rejected, (state, action) => {
         state.isLoading = false
         state.error = action.payload as string
       })
+
+      // Fetch next page of follower posts
+      .addCase(fetchMoreFollowerPosts.pending, (state) => {
+        state.isLoadingMoreFollowerPosts = true
+      })
+      .addCase(fetchMoreFollowerPosts.fulfilled, (state, action) => {
+        state.isLoadingMoreFollowerPosts = false
+        const existingIds = new Set(state.followerPosts.map(p => p.id))
+        const older = (action.payload.results || []).filter(p => !existingIds.has(p.id))
+        state.followerPosts = [...state.followerPosts, ...older]
+        state.followerPostsNextCursor = action.payload.next_cursor
+      })
+      .addCase(fetchMoreFollowerPosts.rejected, (state, action) => {
+        state.isLoadingMoreFollowerPosts = false
+        state.error = action.payload as string
+      })
       
       // Fetch user posts
       .addCase(fetchUserPosts.pending, (state) => {
@@ -6,6 +6,7 @@ import {
   getFollowersApi, 
   getFollowingApi, 
   getNotificationsApi, 
+  getUnreadNotificationsCountApi,
   markNotificationReadApi, 
   markAllNotificationsReadApi,
   deleteNotificationApi,
@@ -24,6 +25,7 @@ export interface SocialState {
   following: DiscoverUser[]
   notifications: Notification[]
   notificationsUnreadCount?: number
+  notificationsNextCursor: string | null
   followLoadingIds: number[]
   currentUserProfile: DiscoverUser | null
   aiPagination: {
@@ -45,6 +47,7 @@ const initialState: SocialState = {
   following: [],
   notifications: [],
   notificationsUnreadCount: 0,
+  notificationsNextCursor: null,
   followLoadingIds: [],
   currentUserProfile: null,
   aiPagination: null,
@@ -137,6 +140,30 @@ export const fetchNotifications = createAsyncThunk(
   }
 )
 
+export const fetchMoreNotifications = createAsyncThunk(
+  'social/fetchMoreNotifications',
+  async (cursorUrl: string, { rejectWithValue }) => {
+    try {
+      const response = await getNotificationsApi(cursorUrl)
+      return response.data
+    } catch (error: any) {
+      return rejectWithValue(error.response?.data?.detail || 'Failed to fetch notifications')
+    }
+  }
+)
+
+export const fetchNotificationsUnreadCount = createAsyncThunk(
+  'social/fetchNotificationsUnreadCount',
+  async (_, { rejectWithValue }) => {
+    try {
+      const response = await getUnreadNotificationsCountApi()
+      return response.data.unread_count
+    } catch (error: any) {
+      return rejectWithValue(error.response?.data?.detail || 'Failed to fetch unread count')
+    }
+  }
+)
+
 export const markNotificationAsRead = createAsyncThunk(
   'social/markNotificationAsRead',
   async (notificationId: number, { rejectWithValue }) => {
@@ -342,21 +369,36 @@ const socialSlice = createSlice({
       .addCase(fetchNotifications.fulfilled, (state, action) => {
         state.isLoading = false
         state.notifications = Array.isArray(action.payload.results) ? action.payload.results : []
-        state.notificationsUnreadCount = state.notifications.filter(n => !n.is_read).length
+        state.notificationsNextCursor = action.payload.next
+        state.notificationsUnreadCount = action.payload.unread_count
       })
       .addCase(fetchNotifications.rejected, (state, action) => {
         state.isLoading = false
         state.error = action.payload as string
       })
+
+      // Fetch older notifications
+      .addCase(fetchMoreNotifications.fulfilled, (state, action) => {
+        const existingIds = new Set(state.notifications.map(n => n.id))
+        const older = (action.payload.results || []).filter(n => !existingIds.has(n.id))
+        state.notifications = [...state.notifications, ...older]
+        state.notificationsNextCursor = action.payload.next
+        state.notificationsUnreadCount = action.payload.unread_count
+      })
+
+      // Fetch unread count
+      .addCase(fetchNotificationsUnreadCount.fulfilled, (state, action) => {
+        state.notificationsUnreadCount = action.payload
+      })
       
       // Mark notification as read
       .addCase(markNotificationAsRead.fulfilled, (state, action) => {
         const notificationId = action.payload
         const notification = state.notifications.find(n => n.id === notificationId)
-        if (notification) {
+        if (notification && !notification.is_read) {
           notification.is_read = true
+          state.notificationsUnreadCount = Math.max(0, (state.notificationsUnreadCount || 0) - 1)
         }
-        state.notificationsUnreadCount = state.notifications.filter(n => !n.is_read).length
       })
       
       // Mark all notifications as read
@@ -370,13 +412,17 @@ const socialSlice = createSlice({
       // Delete notification
       .addCase(deleteNotification.fulfilled, (state, action) => {
         const notificationId = action.payload
+        const notification = state.notifications.find(n => n.id === notificationId)
+        if (notification && !notification.is_read) {
+          state.notificationsUnreadCount = Math.max(0, (state.notificationsUnreadCount || 0) - 1)
+        }
         state.notifications = state.notifications.filter(n => n.id !== notificationId)
-        state.notificationsUnreadCount = state.notifications.filter(n => !n.is_read).length
       })
 
       // Delete all notifications
       .addCase(deleteAllNotifications.fulfilled, (state) => {
         state.notifications = []
+        state.notificationsNextCursor = null
         state.notificationsUnreadCount = 0
       })
       
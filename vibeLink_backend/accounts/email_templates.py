@@ -1,24 +0,0 @@
-otp_email_template = """
-Hello {full_name},
-
-Your OTP code is: {otp}
-Use this code to verify your account.
-This code will expire in 10 minutes.
-
-Regards,
-{site_name}
-"""
-
-reset_password_template = """
-Hello {full_name},
-
-We received a request to reset your password. If you did not make this request, please ignore this email.
-
-To reset your password, click the link below:
-{reset_password_url}
-
-This link will expire in 10 minutes.
-
-Regards,
-{site_name}
-"""
\ No newline at end of file
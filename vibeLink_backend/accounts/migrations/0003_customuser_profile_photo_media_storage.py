@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:11
+
+import utils.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_customuser_profile_photo_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='profile_photo',
+            field=models.ImageField(blank=True, help_text='Profile photo', null=True, storage=utils.storage.ContentAddressedStorage(), upload_to='profile_photos/'),
+        ),
+    ]
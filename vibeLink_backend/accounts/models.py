@@ -4,6 +4,7 @@ import random
 from django.utils import timezone
 from django.contrib.auth.hashers import make_password, check_password
 from django.core.validators import RegexValidator
+from utils.storage import media_storage
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -28,7 +29,8 @@ class CustomUser(AbstractUser):
     
     # Profile fields
     age = models.PositiveIntegerField(null=True, blank=True, help_text='User age')
-    profile_photo = models.ImageField(upload_to='profile_photos/', null=True, blank=True, help_text='Profile photo')
+    profile_photo = models.ImageField(upload_to='profile_photos/', storage=media_storage, null=True, blank=True, help_text='Profile photo')
+    profile_photo_variants = models.JSONField(default=dict, blank=True, help_text='Resized WebP/JPEG copies of profile photo')
     bio = models.TextField(max_length=500, blank=True, help_text='User bio')
     
     # Location fields
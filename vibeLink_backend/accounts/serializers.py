@@ -6,12 +6,14 @@ from django.contrib.auth import authenticate
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.validators import validate_email
 from django.utils import timezone
+from utils.images import variant_urls
 
 User = get_user_model()
 
 class UserSerializer(serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
     profile_photo = serializers.SerializerMethodField()
+    profile_photo_variants = serializers.SerializerMethodField()
     followers_count = serializers.SerializerMethodField()
     following_count = serializers.SerializerMethodField()
     
@@ -19,7 +21,7 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = (
             'id', 'email', 'username', 'full_name', 'first_name', 'last_name', 
-            'age', 'profile_photo', 'bio', 'city', 'state', 'latitude', 'longitude',
+            'age', 'profile_photo', 'profile_photo_variants', 'bio', 'city', 'state', 'latitude', 'longitude',
             'hashtags', 'is_active', 'is_staff', 'is_superuser', 'is_otp_verified', 
             'is_completed', 'date_joined', 'last_login', 'followers_count', 'following_count'
         )
@@ -35,6 +37,9 @@ class UserSerializer(serializers.ModelSerializer):
             return obj.profile_photo.url
         return None
     
+    def get_profile_photo_variants(self, obj):
+        return variant_urls(obj.profile_photo_variants, obj.profile_photo.storage, self.context.get('request'))
+    
     def get_followers_count(self, obj):
         return obj.followers.count()
     
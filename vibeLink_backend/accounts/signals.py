@@ -0,0 +1,36 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.contrib.auth import get_user_model
+from utils.images import (
+    delete_variants, needs_processing, release_replaced_file, remember_replaced_file, schedule_image_processing,
+    strip_upload_metadata
+)
+
+User = get_user_model()
+
+@receiver(pre_save, sender=User)
+def prepare_profile_photo_upload(sender, instance, update_fields=None, **kwargs):
+    """
+    Strip metadata from a new upload and note which stored profile photo it replaces, so that
+    reference is released after the save
+    """
+    strip_upload_metadata(instance, 'profile_photo')
+    remember_replaced_file(instance, 'profile_photo', update_fields)
+
+@receiver(post_save, sender=User)
+def process_profile_photo(sender, instance, **kwargs):
+    """
+    Generate resized variants in the background whenever the profile photo changes
+    """
+    release_replaced_file(instance, 'profile_photo')
+    if needs_processing(instance, 'profile_photo', 'profile_photo_variants'):
+        schedule_image_processing(instance, 'profile_photo', 'profile_photo_variants')
+
+@receiver(post_delete, sender=User)
+def release_profile_photo(sender, instance, **kwargs):
+    """
+    Release the profile photo and its variants so unreferenced blobs can be collected
+    """
+    if instance.profile_photo:
+        instance.profile_photo.storage.delete(instance.profile_photo.name)
+    delete_variants(instance.profile_photo.storage, instance.profile_photo_variants)
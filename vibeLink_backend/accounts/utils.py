@@ -1,10 +1,9 @@
-from django.core.mail import EmailMessage
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from .email_templates import reset_password_template, otp_email_template
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils import timezone
-from utils.email import EmailThread
+from utils.email import PRIORITY_ACCOUNT, queue_email
+from utils.email_rendering import render_email
 
 User = get_user_model()
 
@@ -31,34 +30,21 @@ class CustomPasswordResetTokenGenerator(PasswordResetTokenGenerator):
         return super().check_token(user, token)
 
 def send_email(subject, message, recipient_list, content_subtype =None):
-    from_email = settings.DEFAULT_FROM_EMAIL
-    email = EmailMessage(
-        subject, 
-        message, 
-        from_email, 
-        recipient_list
-    )
-    if content_subtype in ['html', 'plain']:
-        email.content_subtype = content_subtype
-    EmailThread(email).start()
+    # Goes through the outbox ahead of notification emails; the request doesn't wait for SMTP
+    queue_email(subject, message, recipient_list, content_subtype or 'plain', priority=PRIORITY_ACCOUNT)
 
 def send_otp_email(user, otp):
     subject = 'Your OTP Code'
-    message = otp_email_template.format(
-        full_name=user.full_name,
-        otp=otp,
-        site_name=settings.SITE_NAME
-    )
+    message = render_email('otp', {'full_name': user.full_name, 'otp': otp})
     from_email = settings.DEFAULT_FROM_EMAIL
     recipient_list = [user.email]
     send_email(subject, message, recipient_list, content_subtype='plain')
 
 def send_reset_password_email(user, uidb64, token):
     subject = 'Reset Password'
-    message = reset_password_template.format(
-        full_name=user.full_name,
-        reset_password_url=f'{settings.FRONTEND_URL}/reset-password/{uidb64}/{token}',
-        site_name=settings.SITE_NAME
-    )
+    message = render_email('reset_password', {
+        'full_name': user.full_name,
+        'reset_password_url': f'{settings.FRONTEND_URL}/reset-password/{uidb64}/{token}'
+    })
     recipient_list = [user.email]
     send_email(subject, message, recipient_list, content_subtype='plain')
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Conversation, Message
+from .models import Conversation, ConversationMember, Message, MessageArchiveSegment
 
 @admin.register(Conversation)
 class ConversationAdmin(admin.ModelAdmin):
@@ -13,10 +13,22 @@ class ConversationAdmin(admin.ModelAdmin):
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
-    list_display = ['id', 'conversation', 'sender', 'content_preview', 'is_read', 'created_at']
-    list_filter = ['is_read', 'created_at']
+    list_display = ['id', 'conversation', 'sender', 'content_preview', 'created_at']
+    list_filter = ['created_at']
     search_fields = ['sender__username', 'content']
     
     def content_preview(self, obj):
         return obj.content[:50] + "..." if len(obj.content) > 50 else obj.content
     content_preview.short_description = "Content Preview"
+
+@admin.register(ConversationMember)
+class ConversationMemberAdmin(admin.ModelAdmin):
+    list_display = ['id', 'conversation', 'user', 'unread_count', 'last_read_message_id', 'updated_at']
+    search_fields = ['user__username']
+    raw_id_fields = ['conversation', 'user']
+
+@admin.register(MessageArchiveSegment)
+class MessageArchiveSegmentAdmin(admin.ModelAdmin):
+    list_display = ['id', 'conversation', 'message_count', 'first_created_at', 'last_created_at', 'created_at']
+    raw_id_fields = ['conversation']
+    exclude = ['data']
@@ -0,0 +1,147 @@
+import json
+import zlib
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from .models import Conversation, Message, MessageArchiveSegment
+from .search import matches_terms
+
+User = get_user_model()
+
+# Messages older than this many days are moved out of the message table by archive_messages
+ARCHIVE_AFTER_DAYS = getattr(settings, 'CHAT_ARCHIVE_AFTER_DAYS', 180)
+# Messages per segment; one segment is decompressed per ~page of archived history
+SEGMENT_SIZE = 500
+COMPRESSION_LEVEL = 6
+
+
+def encode_segment(messages):
+    """Compress messages (oldest first) into segment data: zlib over a JSON list of rows"""
+    rows = [[message.id, message.sender_id, message.content, message.created_at.isoformat()] for message in messages]
+    return zlib.compress(json.dumps(rows, separators=(',', ':')).encode(), COMPRESSION_LEVEL)
+
+
+def decode_segment(segment):
+    """(id, sender_id, content, created_at) rows of a segment, oldest first"""
+    rows = json.loads(zlib.decompress(bytes(segment.data)))
+    return [(message_id, sender_id, content, parse_datetime(created_at)) for message_id, sender_id, content, created_at in rows]
+
+
+def archive_conversation(conversation_id, cutoff, segment_size=SEGMENT_SIZE):
+    """
+    Move the conversation's messages created before cutoff into segments, one segment per
+    transaction. The latest message always stays, since the inbox preview points at it.
+    Returns the number of messages archived.
+    """
+    keep_id = Conversation.objects.filter(id=conversation_id).values_list('last_message_id', flat=True).first()
+    old = (
+        Message.objects.filter(conversation_id=conversation_id, created_at__lt=cutoff)
+        .exclude(id=keep_id)
+        .order_by('created_at', 'id')
+        .only('id', 'sender_id', 'content', 'created_at')
+    )
+    archived = 0
+    while True:
+        with transaction.atomic():
+            batch = list(old[:segment_size])
+            if not batch:
+                return archived
+            MessageArchiveSegment.objects.create(
+                conversation_id=conversation_id,
+                first_message_id=batch[0].id,
+                last_message_id=batch[-1].id,
+                first_created_at=batch[0].created_at,
+                last_created_at=batch[-1].created_at,
+                message_count=len(batch),
+                data=encode_segment(batch),
+            )
+            Message.objects.filter(id__in=[message.id for message in batch]).delete()
+        archived += len(batch)
+
+
+def _to_messages(conversation_id, rows):
+    """Unsaved Message instances for archived rows, so they serialize like live ones"""
+    senders = User.objects.in_bulk({row[1] for row in rows})
+    return [
+        Message(id=message_id, conversation_id=conversation_id, sender=senders[sender_id], content=content, created_at=created_at)
+        for message_id, sender_id, content, created_at in rows
+        # Messages of deleted users are removed with them; archived copies are skipped the same way
+        if sender_id in senders
+    ]
+
+
+def archived_before(conversation_id, position=None, limit=SEGMENT_SIZE):
+    """
+    Up to limit archived messages older than position, a (created_at, id) pair, newest first.
+    Without a position the newest archived messages are returned.
+    """
+    segments = MessageArchiveSegment.objects.filter(conversation_id=conversation_id)
+    if position is not None:
+        created_at, message_id = position
+        segments = segments.filter(
+            Q(first_created_at__lt=created_at) | Q(first_created_at=created_at, first_message_id__lt=message_id)
+        )
+    rows = []
+    for segment in segments.order_by('-last_created_at', '-last_message_id').iterator(chunk_size=2):
+        for row in reversed(decode_segment(segment)):
+            if position is None or (row[3], row[0]) < position:
+                rows.append(row)
+        if len(rows) >= limit:
+            break
+    return _to_messages(conversation_id, rows[:limit])
+
+
+def archived_after(conversation_id, position, limit=SEGMENT_SIZE):
+    """Up to limit archived messages newer than position, a (created_at, id) pair, oldest first"""
+    created_at, message_id = position
+    segments = MessageArchiveSegment.objects.filter(conversation_id=conversation_id).filter(
+        Q(last_created_at__gt=created_at) | Q(last_created_at=created_at, last_message_id__gt=message_id)
+    )
+    rows = []
+    for segment in segments.order_by('last_created_at', 'last_message_id').iterator(chunk_size=2):
+        rows.extend(row for row in decode_segment(segment) if (row[3], row[0]) > position)
+        if len(rows) >= limit:
+            break
+    return _to_messages(conversation_id, rows[:limit])
+
+
+def find_archived_created_at(conversation_id, message_id):
+    """created_at of an archived message, or None if the conversation has no such message"""
+    segments = MessageArchiveSegment.objects.filter(
+        conversation_id=conversation_id, first_message_id__lte=message_id, last_message_id__gte=message_id
+    )
+    for segment in segments:
+        for row in decode_segment(segment):
+            if row[0] == message_id:
+                return row[3]
+    return None
+
+
+def search_archived(conversation_ids, terms, before_id=None, limit=SEGMENT_SIZE):
+    """
+    Up to limit archived messages of the conversations that match the search terms, highest id
+    first, optionally only ids below before_id. Archived history has no index, so
+    segments are decompressed newest first until the page is certain.
+    """
+    segments = MessageArchiveSegment.objects.filter(conversation_id__in=conversation_ids)
+    if before_id is not None:
+        segments = segments.filter(first_message_id__lt=before_id)
+    hits = []
+    for segment in segments.order_by('-last_message_id').iterator(chunk_size=2):
+        # Segments of different conversations overlap in ids; one ending below the current
+        # page's lowest hit can't change the page
+        if len(hits) >= limit and segment.last_message_id < hits[limit - 1][1][0]:
+            break
+        for row in decode_segment(segment):
+            if (before_id is None or row[0] < before_id) and matches_terms(row[2], terms):
+                hits.append((segment.conversation_id, row))
+        hits.sort(key=lambda hit: hit[1][0], reverse=True)
+    hits = hits[:limit]
+    senders = User.objects.in_bulk({row[1] for _, row in hits})
+    return [
+        Message(id=message_id, conversation_id=conversation_id, sender=senders[sender_id], content=content, created_at=created_at)
+        for conversation_id, (message_id, sender_id, content, created_at) in hits
+        if sender_id in senders
+    ]
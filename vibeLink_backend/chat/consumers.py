@@ -0,0 +1,61 @@
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from .events import typing_payload, user_group
+from .models import ConversationMember
+from .presence import heartbeat
+
+
+class ChatConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Push channel for one signed-in user. Every socket joins the user's group and receives
+    new messages, read receipts, conversation updates and typing indicators for all of their
+    conversations. Its keep-alive pings double as presence heartbeats.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if not user or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.user_id = user.id
+        # conversation id -> other participants, filled as the user starts typing in a conversation
+        self.typing_recipients = {}
+        self.group_name = user_group(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await sync_to_async(heartbeat, thread_sensitive=False)(self.user_id)
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # Clients only send keep-alives and typing indicators; everything else goes through the REST API
+        if content.get('type') == 'ping':
+            await sync_to_async(heartbeat, thread_sensitive=False)(self.user_id)
+            await self.send_json({'type': 'pong'})
+        elif content.get('type') == 'typing':
+            await self.send_typing(content.get('conversation_id'))
+
+    async def send_typing(self, conversation_id):
+        if not isinstance(conversation_id, int):
+            return
+        if conversation_id not in self.typing_recipients:
+            self.typing_recipients[conversation_id] = await self.load_recipients(conversation_id)
+        payload = typing_payload(conversation_id, self.user_id)
+        for user_id in self.typing_recipients[conversation_id]:
+            await self.channel_layer.group_send(user_group(user_id), {'type': 'chat.event', 'payload': payload})
+
+    @database_sync_to_async
+    def load_recipients(self, conversation_id):
+        """Other members of the conversation, or nobody if the user isn't a member"""
+        member_ids = set(
+            ConversationMember.objects.filter(conversation_id=conversation_id).values_list('user_id', flat=True)
+        )
+        if self.user_id not in member_ids:
+            return []
+        return list(member_ids - {self.user_id})
+
+    async def chat_event(self, event):
+        await self.send_json(event['payload'])
@@ -0,0 +1,87 @@
+import logging
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.utils import timezone
+from .longpoll import signal_change
+
+logger = logging.getLogger(__name__)
+
+
+def user_group(user_id):
+    return f'chat_user_{user_id}'
+
+
+def push_to_users(user_ids, payload):
+    """
+    Send a chat event to every open socket of the given users once the current
+    transaction commits. Delivery is best effort; clients resync over REST on reconnect.
+    """
+    user_ids = list(user_ids)
+
+    def send():
+        # Answer long-poll requests waiting in this process
+        signal_change()
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        for user_id in user_ids:
+            try:
+                async_to_sync(channel_layer.group_send)(user_group(user_id), {'type': 'chat.event', 'payload': payload})
+            except Exception:
+                logger.exception('Could not push %s to user %s', payload.get('type'), user_id)
+
+    transaction.on_commit(send)
+
+
+def participant_ids(conversation):
+    return list(conversation.participants.values_list('id', flat=True))
+
+
+def notify_new_message(message, context):
+    """Push a new message and the resulting conversation update to all participants"""
+    from .serializers import MessageSerializer
+
+    user_ids = participant_ids(message.conversation)
+    push_to_users(user_ids, {
+        'type': 'message.new',
+        'conversation_id': message.conversation_id,
+        'message': MessageSerializer(message, context=context).data,
+    })
+    notify_conversation_updated(message.conversation, user_ids, last_message=message)
+
+
+def notify_messages_read(conversation, reader):
+    """Read receipt: reader has read everything in the conversation up to now"""
+    push_to_users(participant_ids(conversation), {
+        'type': 'messages.read',
+        'conversation_id': conversation.id,
+        'reader_id': reader.id,
+        'last_read_message_id': conversation.last_message_id,
+        'read_at': timezone.now().isoformat(),
+    })
+
+
+def notify_conversation_updated(conversation, user_ids=None, last_message=None):
+    payload = {
+        'type': 'conversation.updated',
+        'conversation_id': conversation.id,
+        'updated_at': conversation.updated_at.isoformat(),
+    }
+    if last_message is not None:
+        payload['last_message'] = {
+            'content': last_message.content,
+            'sender': last_message.sender.username,
+            'timestamp': last_message.created_at.isoformat(),
+        }
+        payload['updated_at'] = last_message.created_at.isoformat()
+    push_to_users(user_ids if user_ids is not None else participant_ids(conversation), payload)
+
+
+def typing_payload(conversation_id, user_id):
+    return {'type': 'typing', 'conversation_id': conversation_id, 'user_id': user_id}
+
+
+def notify_typing(conversation_id, user_id, recipient_ids):
+    """Typing indicator for the other participants; never stored, clients let it fade after a few seconds"""
+    push_to_users([recipient for recipient in recipient_ids if recipient != user_id], typing_payload(conversation_id, user_id))
@@ -0,0 +1,40 @@
+import threading
+import time
+from django.conf import settings
+
+# Upper bound for ?wait=; keep it below the proxy/client read timeout
+LONG_POLL_MAX_SECONDS = getattr(settings, 'CHAT_LONG_POLL_MAX_SECONDS', 25)
+# How often a waiting request re-checks the database for changes made by other processes
+LONG_POLL_INTERVAL = 1.0
+
+# Woken whenever a chat event is pushed from this process, so local waiters answer at once
+_changed = threading.Condition()
+
+
+def signal_change():
+    with _changed:
+        _changed.notify_all()
+
+
+def parse_wait(value):
+    """Seconds to hold a long-poll request from the ?wait= parameter (0 = answer immediately)"""
+    try:
+        wait = float(value or 0)
+    except (TypeError, ValueError):
+        return 0
+    return min(max(wait, 0), LONG_POLL_MAX_SECONDS)
+
+
+def wait_for(check, timeout):
+    """
+    Call check() until it returns something truthy or timeout seconds pass, sleeping between
+    attempts until a local change is signalled or LONG_POLL_INTERVAL elapses. Returns the last result.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        result = check()
+        remaining = deadline - time.monotonic()
+        if result or remaining <= 0:
+            return result
+        with _changed:
+            _changed.wait(min(LONG_POLL_INTERVAL, remaining))
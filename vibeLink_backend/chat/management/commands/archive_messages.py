@@ -0,0 +1,50 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from chat.archive import ARCHIVE_AFTER_DAYS, SEGMENT_SIZE, archive_conversation
+from chat.models import Message
+
+
+class Command(BaseCommand):
+    help = 'Move old chat messages into compressed per-conversation archive segments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=ARCHIVE_AFTER_DAYS,
+            help=f'Archive messages older than this many days (default: {ARCHIVE_AFTER_DAYS})',
+        )
+        parser.add_argument(
+            '--segment-size',
+            type=int,
+            default=SEGMENT_SIZE,
+            help=f'Messages per archive segment (default: {SEGMENT_SIZE})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be archived without changing anything',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        old = Message.objects.filter(created_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'DRY RUN: Would archive up to {old.count()} messages '
+                    f'from {old.order_by().values("conversation_id").distinct().count()} conversations'
+                )
+            )
+            return
+
+        conversation_ids = list(old.order_by().values_list('conversation_id', flat=True).distinct())
+        archived = 0
+        for conversation_id in conversation_ids:
+            archived += archive_conversation(conversation_id, cutoff, options['segment_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully archived {archived} messages from {len(conversation_ids)} conversations')
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from chat.search import create_search_index
+
+
+class Command(BaseCommand):
+    help = 'Recreate the chat message full-text index and reindex every message'
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.stdout.write(
+                self.style.WARNING(f'No full-text index for {connection.vendor}; search falls back to LIKE')
+            )
+            return
+
+        with connection.schema_editor() as schema_editor:
+            create_search_index(schema_editor)
+
+        self.stdout.write(self.style.SUCCESS('Successfully rebuilt the message search index'))
@@ -0,0 +1,58 @@
+from collections import Counter
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def backfill(apps, schema_editor):
+    Conversation = apps.get_model('chat', 'Conversation')
+    ConversationMember = apps.get_model('chat', 'ConversationMember')
+    Message = apps.get_model('chat', 'Message')
+    Participant = Conversation.participants.through
+
+    last_ids = dict(Message.objects.values_list('conversation_id').annotate(last_id=Max('id')))
+    last_messages = Message.objects.in_bulk(list(last_ids.values()))
+    conversations = []
+    for conversation in Conversation.objects.filter(id__in=last_ids).only('id'):
+        message = last_messages[last_ids[conversation.id]]
+        conversation.last_message_id = message.id
+        conversation.last_message_preview = message.content[:120]
+        conversation.last_message_sender_id = message.sender_id
+        conversation.last_message_at = message.created_at
+        conversations.append(conversation)
+    Conversation.objects.bulk_update(
+        conversations,
+        ['last_message', 'last_message_preview', 'last_message_sender', 'last_message_at'],
+        batch_size=500
+    )
+
+    # Unread messages per (conversation, sender); a member's unread count is the ones others sent
+    unread = Counter()
+    for conversation_id, sender_id, total in (
+        Message.objects.filter(is_read=False).values_list('conversation_id', 'sender_id').annotate(total=Count('id'))
+    ):
+        unread[conversation_id, sender_id] = total
+    unread_by_conversation = Counter()
+    for (conversation_id, _), total in unread.items():
+        unread_by_conversation[conversation_id] += total
+
+    members = []
+    for conversation_id, user_id in Participant.objects.values_list('conversation_id', 'customuser_id').iterator():
+        count = unread_by_conversation[conversation_id] - unread[conversation_id, user_id]
+        members.append(ConversationMember(
+            conversation_id=conversation_id,
+            user_id=user_id,
+            unread_count=count,
+            last_read_message_id=last_ids.get(conversation_id) if count == 0 else None,
+        ))
+    ConversationMember.objects.bulk_create(members, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_conversation_members'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
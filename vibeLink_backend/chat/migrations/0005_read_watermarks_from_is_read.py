@@ -0,0 +1,49 @@
+from django.db import migrations
+from django.db.models import Count, Max, Min
+
+
+def forwards(apps, schema_editor):
+    """
+    Turn per-message is_read flags into member watermarks: a member has read everything
+    before the oldest unread message someone else sent them, and everything if there is none.
+    """
+    Conversation = apps.get_model('chat', 'Conversation')
+    ConversationMember = apps.get_model('chat', 'ConversationMember')
+    Message = apps.get_model('chat', 'Message')
+
+    last_ids = dict(Conversation.objects.filter(last_message__isnull=False).values_list('id', 'last_message_id'))
+    members = []
+    for member in ConversationMember.objects.only('id', 'conversation_id', 'user_id').iterator(chunk_size=500):
+        others = Message.objects.filter(conversation_id=member.conversation_id).exclude(sender_id=member.user_id)
+        first_unread = others.filter(is_read=False).aggregate(first=Min('id'))['first']
+        if first_unread is None:
+            member.last_read_message_id = last_ids.get(member.conversation_id)
+        else:
+            member.last_read_message_id = Message.objects.filter(
+                conversation_id=member.conversation_id, id__lt=first_unread
+            ).aggregate(last=Max('id'))['last']
+        member.unread_count = others.filter(
+            id__gt=member.last_read_message_id or 0
+        ).aggregate(total=Count('id'))['total']
+        members.append(member)
+    ConversationMember.objects.bulk_update(members, ['last_read_message_id', 'unread_count'], batch_size=500)
+
+
+def backwards(apps, schema_editor):
+    ConversationMember = apps.get_model('chat', 'ConversationMember')
+    Message = apps.get_model('chat', 'Message')
+    for member in ConversationMember.objects.filter(last_read_message_id__isnull=False).iterator(chunk_size=500):
+        Message.objects.filter(
+            conversation_id=member.conversation_id, id__lte=member.last_read_message_id
+        ).exclude(sender_id=member.user_id).update(is_read=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_backfill_conversation_members'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
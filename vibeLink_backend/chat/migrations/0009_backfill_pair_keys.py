@@ -0,0 +1,40 @@
+from collections import defaultdict
+from django.db import migrations
+
+
+def backfill(apps, schema_editor):
+    """
+    Key existing two-person conversations. Where earlier races left duplicates for a pair,
+    the most recently active one gets the key and the others stay unkeyed.
+    """
+    Conversation = apps.get_model('chat', 'Conversation')
+    Participant = Conversation.participants.through
+
+    participants = defaultdict(list)
+    for conversation_id, user_id in Participant.objects.values_list('conversation_id', 'customuser_id').iterator():
+        participants[conversation_id].append(user_id)
+
+    by_key = {}
+    activity = dict(Conversation.objects.values_list('id', 'updated_at'))
+    for conversation_id, user_ids in participants.items():
+        if len(user_ids) != 2:
+            continue
+        low, high = sorted(user_ids)
+        key = f"{low}:{high}"
+        current = by_key.get(key)
+        if current is None or (activity[conversation_id], conversation_id) > (activity[current], current):
+            by_key[key] = conversation_id
+
+    conversations = [Conversation(id=conversation_id, pair_key=key) for key, conversation_id in by_key.items()]
+    Conversation.objects.bulk_update(conversations, ['pair_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0008_conversation_pair_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
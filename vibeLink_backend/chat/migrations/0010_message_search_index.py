@@ -0,0 +1,21 @@
+from django.db import migrations
+from chat.search import create_search_index, drop_search_index
+
+
+def forwards(apps, schema_editor):
+    create_search_index(schema_editor)
+
+
+def backwards(apps, schema_editor):
+    drop_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0009_backfill_pair_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
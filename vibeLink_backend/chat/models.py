@@ -1,33 +1,165 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
 User = get_user_model()
 
+# Characters of the latest message kept on the conversation for the inbox
+PREVIEW_LENGTH = 120
+
 class Conversation(models.Model):
     participants = models.ManyToManyField(User, related_name='conversations')
+    # Denormalized latest message so the inbox never touches the message table
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True)
+    last_message_sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    # "<lower user id>:<higher user id>" for one-to-one conversations, so each pair has at most one
+    pair_key = models.CharField(max_length=41, unique=True, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # Delta sync: conversations changed since a client's last fetch
+            models.Index(fields=['updated_at']),
+        ]
 
     def __str__(self):
         return f"Conversation {self.id}"
 
+    @staticmethod
+    def make_pair_key(user_id, other_user_id):
+        low, high = sorted((user_id, other_user_id))
+        return f"{low}:{high}"
+
+    @classmethod
+    def get_or_create_direct(cls, user, other_user):
+        """
+        Return (conversation, created) for the one-to-one conversation between two users. The
+        unique pair_key makes concurrent calls converge on one row: the losing insert fails on
+        the index and get_or_create returns the winner's conversation.
+        """
+        with transaction.atomic():
+            conversation, created = cls.objects.get_or_create(pair_key=cls.make_pair_key(user.id, other_user.id))
+            if created:
+                # Committed together with the row, so no caller ever sees it without participants
+                conversation.participants.add(user, other_user)
+        return conversation, created
+
 class Message(models.Model):
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     content = models.TextField()
-    is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Delta sync: messages of a conversation after a given id
+            models.Index(fields=['conversation', 'id']),
+            # History pages: keyset scans on (created_at, id) within a conversation
+            models.Index(fields=['conversation', 'created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.sender.username}: {self.content[:50]}..."
 
-    def mark_as_read(self):
-        self.is_read = True
-        self.save()
+class MessageArchiveSegment(models.Model):
+    """
+    A run of old messages of one conversation, moved out of the message table by
+    archive_messages and stored as zlib-compressed JSON (see chat.archive)
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='archive_segments')
+    first_message_id = models.BigIntegerField()
+    last_message_id = models.BigIntegerField()
+    first_created_at = models.DateTimeField()
+    last_created_at = models.DateTimeField()
+    message_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['conversation', 'last_created_at', 'last_message_id']),
+            models.Index(fields=['conversation', 'first_message_id', 'last_message_id']),
+        ]
+
+    def __str__(self):
+        return f"Conversation {self.conversation_id}: {self.message_count} archived messages"
+
+class ConversationMember(models.Model):
+    """
+    Per-participant conversation state, kept in step with Conversation.participants, so the
+    inbox reads the caller's unread count from one row instead of counting messages
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='members')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_memberships')
+    last_read_message_id = models.BigIntegerField(null=True, blank=True)
+    unread_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['conversation', 'user']
+
+    def __str__(self):
+        return f"{self.user.username} in conversation {self.conversation_id}: {self.unread_count} unread"
+
+    @classmethod
+    def record_message(cls, message):
+        """Update the conversation's latest message and its members' unread counts for a new message"""
+        Conversation.objects.filter(id=message.conversation_id).update(
+            last_message=message,
+            last_message_preview=message.content[:PREVIEW_LENGTH],
+            last_message_sender=message.sender_id,
+            last_message_at=message.created_at,
+            # Bump the conversation so it sorts first and shows up in updated_since deltas
+            updated_at=message.created_at,
+        )
+        members = cls.objects.filter(conversation_id=message.conversation_id)
+        members.exclude(user_id=message.sender_id).update(unread_count=F('unread_count') + 1)
+        # Sending a message means having read everything before it
+        members.filter(user_id=message.sender_id).update(last_read_message_id=message.id, unread_count=0)
+
+    @classmethod
+    def mark_read(cls, conversation, user):
+        """
+        Move the user's read watermark to the conversation's latest message. A single-row
+        update that is skipped when nothing is unread; returns whether anything changed.
+        """
+        if conversation.last_message_id is None:
+            return False
+        behind = Q(last_read_message_id__isnull=True) | Q(last_read_message_id__lt=conversation.last_message_id)
+        return cls.objects.filter(behind | Q(unread_count__gt=0), conversation=conversation, user=user).update(
+            last_read_message_id=conversation.last_message_id, unread_count=0
+        ) > 0
+
+    @classmethod
+    def read_watermarks(cls, conversation_id):
+        """{user_id: last_read_message_id} for every member of a conversation"""
+        return dict(cls.objects.filter(conversation_id=conversation_id).values_list('user_id', 'last_read_message_id'))
+
+    @staticmethod
+    def is_read(message, watermarks):
+        """A message is read once any member other than its sender has read past it"""
+        return any(
+            user_id != message.sender_id and last_read is not None and last_read >= message.id
+            for user_id, last_read in watermarks.items()
+        )
+
+    @classmethod
+    def sync_members(cls, conversation_id):
+        """Create missing member rows and drop the ones of users no longer participating"""
+        participant_ids = set(
+            Conversation.participants.through.objects
+            .filter(conversation_id=conversation_id)
+            .values_list('customuser_id', flat=True)
+        )
+        cls.objects.filter(conversation_id=conversation_id).exclude(user_id__in=participant_ids).delete()
+        existing = set(cls.objects.filter(conversation_id=conversation_id).values_list('user_id', flat=True))
+        cls.objects.bulk_create(
+            [cls(conversation_id=conversation_id, user_id=user_id) for user_id in participant_ids - existing],
+            ignore_conflicts=True
+        )
@@ -0,0 +1,84 @@
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+# A user counts as online for this long after their last heartbeat (sockets ping every 25s)
+PRESENCE_TTL_SECONDS = getattr(settings, 'PRESENCE_TTL_SECONDS', 60)
+# Most users one presence lookup may ask about
+MAX_PRESENCE_BATCH = 200
+
+
+class MemoryPresenceBackend:
+    """
+    Last-seen map in this process's memory. Only sees heartbeats received by this process,
+    so it suits a single server; use CachePresenceBackend with a shared cache for more.
+    """
+
+    def __init__(self, ttl=PRESENCE_TTL_SECONDS):
+        self.ttl = ttl
+        self._expires = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0
+
+    def touch(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            self._expires[user_id] = now + self.ttl
+            if now >= self._next_sweep:
+                # Drop expired entries at most once per TTL so the map stays bounded
+                self._expires = {key: expires for key, expires in self._expires.items() if expires > now}
+                self._next_sweep = now + self.ttl
+
+    def online(self, user_ids):
+        now = time.monotonic()
+        expires = self._expires
+        return {user_id for user_id in user_ids if expires.get(user_id, 0) > now}
+
+
+class CachePresenceBackend:
+    """
+    Presence stored as expiring cache keys, shared by every process that uses the same cache
+    (PRESENCE_CACHE, e.g. a Redis or Memcached alias). Batch lookups are one get_many.
+    """
+
+    def __init__(self, ttl=PRESENCE_TTL_SECONDS):
+        self.ttl = ttl
+        self.cache = caches[getattr(settings, 'PRESENCE_CACHE', 'default')]
+
+    def key(self, user_id):
+        return f'presence:{user_id}'
+
+    def touch(self, user_id):
+        self.cache.set(self.key(user_id), 1, self.ttl)
+
+    def online(self, user_ids):
+        keys = {self.key(user_id): user_id for user_id in user_ids}
+        return {keys[key] for key in self.cache.get_many(list(keys))}
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_presence_backend():
+    """The PRESENCE_BACKEND instance (in-memory by default), created on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(
+                    getattr(settings, 'PRESENCE_BACKEND', 'chat.presence.MemoryPresenceBackend')
+                )()
+    return _backend
+
+
+def heartbeat(user_id):
+    get_presence_backend().touch(user_id)
+
+
+def online_status(user_ids):
+    """{user_id: is_online} for a batch of users, answered from memory without touching the database"""
+    online = get_presence_backend().online(user_ids)
+    return {user_id: user_id in online for user_id in user_ids}
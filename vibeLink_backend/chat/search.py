@@ -0,0 +1,210 @@
+import base64
+import re
+from django.db import connection
+
+# Full-text index over Message.content: an FTS5 table on SQLite, a GIN expression index on Postgres
+FTS_TABLE = 'chat_message_fts'
+GIN_INDEX = 'chat_message_content_search'
+TS_CONFIG = 'simple'
+
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 50
+# FTS5 queries name the caller's conversations inside the index lookup up to this many
+MAX_INDEXED_CONVERSATIONS = 500
+SNIPPET_TOKENS = 12
+# Rank given to archived hits: below every indexed hit, so search pages into the archive once
+# the index has no more matches
+ARCHIVE_RANK = -1.0
+HIGHLIGHT_START, HIGHLIGHT_END = '<mark>', '</mark>'
+
+SQLITE_SCHEMA = [
+    # External-content table: the text lives in chat_message, the index only holds tokens.
+    # conversation_id is indexed as a token so a query can be limited to some conversations.
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+        USING fts5(content, conversation_id, content='chat_message', content_rowid='id')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON chat_message BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, content, conversation_id) VALUES (new.id, new.content, new.conversation_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON chat_message BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content, conversation_id)
+        VALUES ('delete', old.id, old.content, old.conversation_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON chat_message BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content, conversation_id)
+        VALUES ('delete', old.id, old.content, old.conversation_id);
+        INSERT INTO {FTS_TABLE}(rowid, content, conversation_id) VALUES (new.id, new.content, new.conversation_id);
+    END""",
+]
+
+
+def create_search_index(schema_editor):
+    """
+    Create (idempotently) and fill the message search index for the current database.
+    SQLite drops the triggers whenever a migration rebuilds chat_message, so migrations
+    that alter Message must call this again.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for statement in SQLITE_SCHEMA:
+            schema_editor.execute(statement)
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {GIN_INDEX} ON chat_message "
+            f"USING GIN (to_tsvector('{TS_CONFIG}', content))"
+        )
+
+
+def drop_search_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {GIN_INDEX}')
+
+
+def encode_search_cursor(rank, message_id):
+    """Position after a hit in (rank desc, id desc) order"""
+    return base64.urlsafe_b64encode(f'{rank!r}|{message_id}'.encode()).decode()
+
+
+def decode_search_cursor(cursor):
+    try:
+        rank, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        return float(rank), int(message_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def search_terms(query):
+    """Words of a free-text query; punctuation and operators are dropped"""
+    return re.findall(r'\w+', query.lower())[:20]
+
+
+def matches_terms(content, terms):
+    """Whether text matches like an indexed search: every term as a word, the last also as a prefix"""
+    words = set(re.findall(r'\w+', content.lower()))
+    return all(term in words for term in terms[:-1]) and any(word.startswith(terms[-1]) for word in words)
+
+
+def _fts5_query(terms, conversation_ids):
+    # Every term must match; the last one also matches as a prefix while the user is typing
+    match = ' AND '.join(f'"{term}"' for term in terms[:-1])
+    match = f'{match} AND "{terms[-1]}"*' if match else f'"{terms[-1]}"*'
+    if len(conversation_ids) <= MAX_INDEXED_CONVERSATIONS:
+        ids = ' OR '.join(f'"{conversation_id}"' for conversation_id in conversation_ids)
+        match = f'conversation_id : ({ids}) AND content : ({match})'
+    return match
+
+
+def _paged(inner_sql, params, after, limit):
+    """Wrap a (id, rank, ...) hit query in keyset paging on (rank desc, id desc)"""
+    sql = f'SELECT * FROM ({inner_sql}) hits'
+    if after:
+        sql += ' WHERE hits.rank < %s OR (hits.rank = %s AND hits.id < %s)'
+        params = [*params, after[0], after[0], after[1]]
+    sql += ' ORDER BY hits.rank DESC, hits.id DESC LIMIT %s'
+    return sql, [*params, limit]
+
+
+def _search_sqlite(terms, user_id, conversation_ids, after, limit):
+    inner = (
+        # The conversation_id column only filters, so it carries no weight in the ranking
+        f'SELECT m.id AS id, -bm25({FTS_TABLE}, 1.0, 0.0) AS rank, '
+        f"snippet({FTS_TABLE}, 0, %s, %s, '…', %s) AS snippet "
+        f'FROM {FTS_TABLE} JOIN chat_message m ON m.id = {FTS_TABLE}.rowid '
+        f'WHERE {FTS_TABLE} MATCH %s '
+        'AND m.conversation_id IN (SELECT conversation_id FROM chat_conversationmember WHERE user_id = %s)'
+    )
+    params = [HIGHLIGHT_START, HIGHLIGHT_END, SNIPPET_TOKENS, _fts5_query(terms, conversation_ids), user_id]
+    sql, params = _paged(inner, params, after, limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _search_postgres(terms, user_id, after, limit):
+    tsquery = ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+    inner = (
+        f"SELECT m.id AS id, ts_rank(to_tsvector('{TS_CONFIG}', m.content), q)::float8 AS rank, m.content, q "
+        f"FROM chat_message m, to_tsquery('{TS_CONFIG}', %s) q "
+        f"WHERE to_tsvector('{TS_CONFIG}', m.content) @@ q "
+        'AND m.conversation_id IN (SELECT conversation_id FROM chat_conversationmember WHERE user_id = %s)'
+    )
+    paged, params = _paged(inner, [tsquery, user_id], after, limit)
+    # Headlines are costly, so only the rows of the page get one
+    sql = (
+        f"SELECT page.id, page.rank, ts_headline('{TS_CONFIG}', page.content, page.q, %s) "
+        f'FROM ({paged}) page ORDER BY page.rank DESC, page.id DESC'
+    )
+    options = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords={SNIPPET_TOKENS * 2}, MinWords={SNIPPET_TOKENS // 2}'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [options, *params])
+        return cursor.fetchall()
+
+
+def _plain_snippet(content, terms):
+    start = max(content.lower().find(terms[0]) - 40, 0)
+    return ('…' if start else '') + content[start:start + 160]
+
+
+def _search_fallback(terms, conversation_ids, after, limit):
+    """Unindexed LIKE search for other databases: newest matches first, rank 0"""
+    from .models import Message
+
+    messages = Message.objects.filter(conversation_id__in=conversation_ids)
+    for term in terms:
+        messages = messages.filter(content__icontains=term)
+    if after:
+        messages = messages.filter(id__lt=after[1])
+    return [
+        (message_id, 0.0, _plain_snippet(content, terms))
+        for message_id, content in messages.order_by('-id').values_list('id', 'content')[:limit]
+    ]
+
+
+def search_messages(user, query, cursor=None, limit=SEARCH_PAGE_SIZE):
+    """
+    Search the messages of the user's conversations. Returns ([(message, rank, snippet)],
+    next_cursor), best match first; snippets of indexed messages mark matches with
+    <mark></mark>. Archived messages are not indexed: once the indexed matches run out the
+    search continues through the archive segments, newest first, with rank ARCHIVE_RANK.
+    Raises ValueError for a malformed cursor.
+    """
+    from .archive import search_archived
+    from .models import ConversationMember, Message
+
+    terms = search_terms(query)
+    after = decode_search_cursor(cursor) if cursor else None
+    if not terms:
+        return [], None
+
+    conversation_ids = list(ConversationMember.objects.filter(user=user).values_list('conversation_id', flat=True))
+    if not conversation_ids:
+        return [], None
+
+    rows = []
+    if after is None or after[0] > ARCHIVE_RANK:
+        if connection.vendor == 'sqlite':
+            rows = _search_sqlite(terms, user.id, conversation_ids, after, limit + 1)
+        elif connection.vendor == 'postgresql':
+            rows = _search_postgres(terms, user.id, after, limit + 1)
+        else:
+            rows = _search_fallback(terms, conversation_ids, after, limit + 1)
+    messages = Message.objects.select_related('sender').in_bulk([message_id for message_id, _, _ in rows])
+    hits = [(messages[message_id], rank, snippet) for message_id, rank, snippet in rows if message_id in messages]
+
+    if len(rows) <= limit:
+        before_id = after[1] if after and after[0] == ARCHIVE_RANK else None
+        hits += [
+            (message, ARCHIVE_RANK, _plain_snippet(message.content, terms))
+            for message in search_archived(conversation_ids, terms, before_id, limit + 1 - len(rows))
+        ]
+
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_search_cursor(hits[-1][1], hits[-1][0].id)
+    return hits, next_cursor
@@ -1,17 +1,19 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from .models import Conversation, Message
+from .models import Conversation, ConversationMember, Message
+from utils.images import variant_urls
 
 User = get_user_model()
 
 class MessageUserSerializer(serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
     profile_photo = serializers.SerializerMethodField()
+    profile_photo_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = User
-        fields = ['id', 'username', 'full_name', 'profile_photo']
+        fields = ['id', 'username', 'full_name', 'profile_photo', 'profile_photo_variants']
 
     def get_full_name(self, obj):
         return obj.get_full_name()
@@ -37,14 +39,25 @@ class MessageUserSerializer(serializers.ModelSerializer):
             return obj.profile_photo
         return None
 
+    def get_profile_photo_variants(self, obj):
+        return variant_urls(obj.profile_photo_variants, obj.profile_photo.storage, self.context.get('request'))
+
 class MessageSerializer(serializers.ModelSerializer):
     sender = MessageUserSerializer(read_only=True)
+    is_read = serializers.SerializerMethodField()
     timestamp = serializers.SerializerMethodField()
 
     class Meta:
         model = Message
         fields = ['id', 'sender', 'content', 'is_read', 'created_at', 'timestamp']
 
+    def get_is_read(self, obj):
+        # Derived from member read watermarks, loaded once per conversation per response
+        watermarks = self.context.setdefault('read_watermarks', {})
+        if obj.conversation_id not in watermarks:
+            watermarks[obj.conversation_id] = ConversationMember.read_watermarks(obj.conversation_id)
+        return ConversationMember.is_read(obj, watermarks[obj.conversation_id])
+
     def get_timestamp(self, obj):
         now = timezone.now()
         diff = now - obj.created_at
@@ -71,25 +84,31 @@ class ConversationSerializer(serializers.ModelSerializer):
         fields = ['id', 'participants', 'last_message', 'unread_count', 'other_participant', 'created_at', 'updated_at']
 
     def get_last_message(self, obj):
-        last_msg = obj.messages.last()
-        if last_msg:
+        # Denormalized preview maintained by ConversationMember.record_message
+        if obj.last_message_id:
             return {
-                'content': last_msg.content,
-                'sender': last_msg.sender.username,
-                'timestamp': last_msg.created_at
+                'content': obj.last_message_preview,
+                'sender': obj.last_message_sender.username if obj.last_message_sender else None,
+                'timestamp': obj.last_message_at
             }
         return None
 
     def get_unread_count(self, obj):
+        # The inbox annotates the caller's member row; single conversations read it directly
+        if hasattr(obj, 'member_unread_count'):
+            return obj.member_unread_count or 0
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.messages.filter(is_read=False).exclude(sender=request.user).count()
+            return ConversationMember.objects.filter(
+                conversation=obj, user=request.user
+            ).values_list('unread_count', flat=True).first() or 0
         return 0
 
     def get_other_participant(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            other = obj.participants.exclude(id=request.user.id).first()
+            # Filter in Python so prefetched participants are reused
+            other = next((user for user in obj.participants.all() if user.id != request.user.id), None)
             if other:
                 return MessageUserSerializer(other, context=self.context).data
         return None
@@ -0,0 +1,30 @@
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+from notifications.digest import record_events
+from .models import Conversation, ConversationMember, Message
+
+@receiver(post_save, sender=Message)
+def record_message_on_create(sender, instance, created, **kwargs):
+    """
+    Keep the conversation preview and member unread counts in sync when a message is created
+    """
+    if created:
+        ConversationMember.record_message(instance)
+        recipient_ids = ConversationMember.objects.filter(conversation_id=instance.conversation_id).values_list('user_id', flat=True)
+        record_events(recipient_ids, 'message', instance.sender_id, 'message', instance.id)
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def sync_members_on_participants_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep ConversationMember rows matching Conversation.participants
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        ConversationMember.sync_members(instance.pk)
+    elif action == 'post_clear':
+        # user.conversations.clear(): pk_set is not provided
+        ConversationMember.objects.filter(user=instance).delete()
+    else:
+        for conversation_id in pk_set:
+            ConversationMember.sync_members(conversation_id)
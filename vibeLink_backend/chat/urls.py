@@ -4,7 +4,11 @@ from .views import (
     ConversationDetailView,
     MessageListView,
     start_conversation,
-    mark_messages_read
+    mark_messages_read,
+    search_messages,
+    send_typing,
+    presence_heartbeat,
+    presence_status
 )
 
 urlpatterns = [
@@ -13,4 +17,8 @@ urlpatterns = [
     path('conversations/<int:conversation_id>/messages/', MessageListView.as_view(), name='message-list'),
     path('conversations/start/<int:user_id>/', start_conversation, name='start-conversation'),
     path('conversations/<int:conversation_id>/read/', mark_messages_read, name='mark-messages-read'),
+    path('messages/search/', search_messages, name='message-search'),
+    path('conversations/<int:conversation_id>/typing/', send_typing, name='send-typing'),
+    path('presence/', presence_status, name='presence-status'),
+    path('presence/heartbeat/', presence_heartbeat, name='presence-heartbeat'),
 ]
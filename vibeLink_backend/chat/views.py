@@ -3,27 +3,93 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
-from django.db.models import Q
-from rest_framework.pagination import PageNumberPagination
-from .models import Conversation, Message
-from .serializers import ConversationSerializer, MessageSerializer, CreateMessageSerializer
+from django.db.models import F, FilteredRelation, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .models import Conversation, ConversationMember, Message
+from .serializers import ConversationSerializer, MessageSerializer, CreateMessageSerializer, MessageUserSerializer
+from .events import notify_conversation_updated, notify_messages_read, notify_new_message, notify_typing
+from .archive import archived_after, archived_before, find_archived_created_at
+from .longpoll import parse_wait, wait_for
+from .presence import MAX_PRESENCE_BATCH, PRESENCE_TTL_SECONDS, heartbeat, online_status
+from .search import search_messages as run_message_search, MAX_SEARCH_PAGE_SIZE, SEARCH_PAGE_SIZE
+from posts.pagination import get_page_size
 
 User = get_user_model()
 
+# Most rows returned by one delta request; clients keep asking while has_more is true
+DELTA_LIMIT = 100
+# Messages per history page (?limit= can ask for up to the maximum)
+MESSAGE_PAGE_SIZE = 20
+MAX_MESSAGE_PAGE_SIZE = 100
+
+
+def _id_param(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+
+
+def _page_link(request, name, message_id):
+    """The current URL pointed at another page: name=message_id replaces any previous cursor"""
+    url = remove_query_param(request.build_absolute_uri(), 'before_id' if name == 'after_id' else 'after_id')
+    return replace_query_param(url, name, message_id)
+
 class ConversationListView(generics.ListAPIView):
     serializer_class = ConversationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Conversation.objects.filter(
-            participants=self.request.user
-        ).prefetch_related('participants', 'messages').distinct()
+        # One join against the caller's member row; nothing here reads the message table
+        return (
+            Conversation.objects
+            .annotate(membership=FilteredRelation('members', condition=Q(members__user=self.request.user)))
+            .filter(membership__isnull=False)
+            .annotate(member_unread_count=F('membership__unread_count'))
+            .select_related('last_message_sender')
+            .prefetch_related('participants')
+        )
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
 
+    def list(self, request, *args, **kwargs):
+        if 'updated_since' in request.query_params:
+            return self.delta_list(request)
+        return super().list(request, *args, **kwargs)
+
+    def delta_list(self, request):
+        """
+        Conversations changed after ?updated_since=<last_updated of the previous response>,
+        oldest change first. With ?wait=<seconds> the request is held until something changes
+        and answers 204 if nothing did.
+        """
+        since = parse_datetime(request.query_params['updated_since'])
+        if since is None:
+            return Response({'error': 'updated_since must be an ISO 8601 datetime'}, status=status.HTTP_400_BAD_REQUEST)
+        if since.tzinfo is None:
+            since = timezone.make_aware(since)
+
+        changed = self.get_queryset().filter(updated_at__gt=since).order_by('updated_at', 'id')
+        page = wait_for(lambda: list(changed[:DELTA_LIMIT + 1]), parse_wait(request.query_params.get('wait')))
+        if not page:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        has_more = len(page) > DELTA_LIMIT
+        page = page[:DELTA_LIMIT]
+        return Response({
+            'results': self.get_serializer(page, many=True).data,
+            'last_updated': page[-1].updated_at,
+            'has_more': has_more,
+        })
+
 class ConversationDetailView(generics.RetrieveAPIView):
     serializer_class = ConversationSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -38,23 +104,6 @@ class ConversationDetailView(generics.RetrieveAPIView):
 
 class MessageListView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
-    
-    class LatestFirstPagination(PageNumberPagination):
-        page_size = 20
-        page_query_param = 'page'
-
-        def get_paginated_response(self, data):
-            # With newest-first ordering, DRF's "next" is actually the older page.
-            # Expose that URL as "previous" to match UI expectation (load older on scroll up).
-            older_url = self.get_next_link()
-            return Response({
-                'count': self.page.paginator.count,
-                'next': None,               # No forward pagination for newer-than-first-page
-                'previous': older_url,      # Use previous to indicate older messages
-                'results': data,
-            })
-
-    pagination_class = LatestFirstPagination
 
     def get_queryset(self):
         conversation_id = self.kwargs['conversation_id']
@@ -67,6 +116,88 @@ class MessageListView(generics.ListCreateAPIView):
             .order_by('-created_at', '-id')
         )
 
+    def list(self, request, *args, **kwargs):
+        since_id = request.query_params.get('since_id', request.query_params.get('after'))
+        if since_id is not None:
+            return self.delta_list(request, since_id)
+        return self.cursor_list(request)
+
+    def cursor_list(self, request):
+        """
+        A page of messages, newest first, positioned by ?before_id= (older than that message) or
+        ?after_id= (newer than it); the latest page without either. Each page is one range scan
+        on (conversation, created_at, id), so deep history costs the same as the first page and
+        messages arriving mid-scroll don't shift it. "previous" links the older page, "next" the newer one.
+        Once the hot rows run out, pages continue from the conversation's archived segments.
+        """
+        try:
+            before_id = _id_param(request, 'before_id')
+            after_id = _id_param(request, 'after_id')
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        limit = get_page_size(request, default=MESSAGE_PAGE_SIZE, maximum=MAX_MESSAGE_PAGE_SIZE)
+        conversation_id = self.kwargs['conversation_id']
+        messages = self.get_queryset()
+
+        anchor_id = after_id if after_id is not None else before_id
+        if anchor_id is not None:
+            anchor = messages.filter(id=anchor_id).values_list('created_at', flat=True).first()
+            if anchor is None:
+                anchor = find_archived_created_at(conversation_id, anchor_id)
+            if anchor is None:
+                return Response({'error': 'Message not found in this conversation'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if after_id is not None:
+            # Archived messages are all older than the hot ones, so they come first
+            page = archived_after(conversation_id, (anchor, after_id), limit + 1)
+            if len(page) <= limit:
+                newer = messages.filter(Q(created_at__gt=anchor) | Q(created_at=anchor, id__gt=after_id))
+                page += list(newer.order_by('created_at', 'id')[:limit + 1 - len(page)])
+            has_newer, has_older = len(page) > limit, True
+            page = page[:limit][::-1]
+        else:
+            if before_id is not None:
+                messages = messages.filter(Q(created_at__lt=anchor) | Q(created_at=anchor, id__lt=before_id))
+            page = list(messages[:limit + 1])
+            if len(page) <= limit:
+                # Scrolled past the hot window: continue into archived history
+                if page:
+                    position = (page[-1].created_at, page[-1].id)
+                else:
+                    position = (anchor, before_id) if before_id is not None else None
+                page += archived_before(conversation_id, position, limit + 1 - len(page))
+            has_older, has_newer = len(page) > limit, before_id is not None
+            page = page[:limit]
+
+        return Response({
+            'next': _page_link(request, 'after_id', page[0].id) if page and has_newer else None,
+            'previous': _page_link(request, 'before_id', page[-1].id) if page and has_older else None,
+            'results': self.get_serializer(page, many=True).data,
+        })
+
+    def delta_list(self, request, since_id):
+        """
+        Messages newer than ?since_id= (or ?after=), oldest first. With ?wait=<seconds> the
+        request is held until a message arrives and answers 204 if none did.
+        """
+        try:
+            since_id = int(since_id)
+        except ValueError:
+            return Response({'error': 'since_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        newer = self.get_queryset().filter(id__gt=since_id).order_by('id')
+        page = wait_for(lambda: list(newer[:DELTA_LIMIT + 1]), parse_wait(request.query_params.get('wait')))
+        if not page:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        has_more = len(page) > DELTA_LIMIT
+        page = page[:DELTA_LIMIT]
+        return Response({
+            'results': self.get_serializer(page, many=True).data,
+            'last_id': page[-1].id,
+            'has_more': has_more,
+        })
+
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return CreateMessageSerializer
@@ -83,7 +214,8 @@ class MessageListView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         conversation_id = self.kwargs['conversation_id']
         conversation = get_object_or_404(Conversation, id=conversation_id, participants=self.request.user)
-        serializer.save(sender=self.request.user, conversation=conversation)
+        message = serializer.save(sender=self.request.user, conversation=conversation)
+        notify_new_message(message, {'request': self.request})
 
     def create(self, request, *args, **kwargs):
         # Use CreateMessageSerializer for validation
@@ -101,16 +233,10 @@ class MessageListView(generics.ListCreateAPIView):
 def start_conversation(request, user_id):
     other_user = get_object_or_404(User, id=user_id)
     
-    # Check if conversation already exists
-    conversation = Conversation.objects.filter(
-        participants=request.user
-    ).filter(
-        participants=other_user
-    ).distinct().first()
-    
-    if not conversation:
-        conversation = Conversation.objects.create()
-        conversation.participants.add(request.user, other_user)
+    # One indexed lookup on the pair's canonical key; creates it if missing
+    conversation, created = Conversation.get_or_create_direct(request.user, other_user)
+    if created:
+        notify_conversation_updated(conversation)
     
     serializer = ConversationSerializer(conversation, context={'request': request})
     return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -119,8 +245,67 @@ def start_conversation(request, user_id):
 @permission_classes([permissions.IsAuthenticated])
 def mark_messages_read(request, conversation_id):
     conversation = get_object_or_404(Conversation, id=conversation_id, participants=request.user)
-    Message.objects.filter(
-        conversation=conversation
-    ).exclude(sender=request.user).update(is_read=True)
+    # Only the caller's watermark moves; reopening an already-read chat writes nothing
+    if ConversationMember.mark_read(conversation, request.user):
+        notify_messages_read(conversation, request.user)
     
     return Response({'status': 'messages marked as read'})
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def search_messages(request):
+    """
+    Full-text search over the caller's conversations: ?q=<words>, best match first,
+    with <mark>-highlighted snippets; archived history follows the indexed matches.
+    Page with ?cursor=<next_cursor>.
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = get_page_size(request, default=SEARCH_PAGE_SIZE, maximum=MAX_SEARCH_PAGE_SIZE)
+    try:
+        hits, next_cursor = run_message_search(request.user, query, request.query_params.get('cursor'), limit)
+    except ValueError:
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = []
+    for message, rank, snippet in hits:
+        results.append({
+            'id': message.id,
+            'conversation_id': message.conversation_id,
+            'sender': MessageUserSerializer(message.sender, context={'request': request}).data,
+            'content': message.content,
+            'snippet': snippet,
+            'rank': rank,
+            'created_at': message.created_at,
+        })
+    return Response({'results': results, 'next_cursor': next_cursor})
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def send_typing(request, conversation_id):
+    """Typing indicator for clients without a socket; sockets send {"type": "typing"} instead"""
+    member_ids = list(ConversationMember.objects.filter(conversation_id=conversation_id).values_list('user_id', flat=True))
+    if request.user.id not in member_ids:
+        return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
+    notify_typing(conversation_id, request.user.id, member_ids)
+    return Response({'status': 'ok'})
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def presence_heartbeat(request):
+    """Keep the caller online for clients without a socket; call at least once per ttl seconds"""
+    heartbeat(request.user.id)
+    return Response({'status': 'ok', 'ttl': PRESENCE_TTL_SECONDS})
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def presence_status(request):
+    """Online status of up to MAX_PRESENCE_BATCH users: ?user_ids=1,2,3. Served from memory."""
+    try:
+        user_ids = [int(user_id) for user_id in request.query_params.get('user_ids', '').split(',') if user_id.strip()]
+    except ValueError:
+        return Response({'error': 'user_ids must be a comma-separated list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(user_ids) > MAX_PRESENCE_BATCH:
+        return Response({'error': f'At most {MAX_PRESENCE_BATCH} user_ids per request'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'online': online_status(user_ids)})
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import EmailNotification
+from .models import DigestEvent, EmailNotification
 
 @admin.register(EmailNotification)
 class EmailNotificationAdmin(admin.ModelAdmin):
@@ -29,3 +29,15 @@ class EmailNotificationAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('user', 'from_user')
+
+
+@admin.register(DigestEvent)
+class DigestEventAdmin(admin.ModelAdmin):
+    list_display = ['user', 'event_type', 'actor', 'related_object_type', 'related_object_id', 'created_at']
+    list_filter = ['event_type', 'created_at']
+    search_fields = ['user__username', 'user__email']
+    readonly_fields = ['created_at']
+    ordering = ['-created_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'actor')
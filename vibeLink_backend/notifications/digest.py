@@ -0,0 +1,233 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from settings.models import UserSettings
+from utils.email import queue_emails
+from utils.email_rendering import render_batch
+from .models import DigestEvent, EmailNotification
+
+User = get_user_model()
+
+# A user's events are held this long after the first one, then go out together in one email
+DIGEST_WINDOW = timedelta(minutes=getattr(settings, 'EMAIL_DIGEST_WINDOW_MINUTES', 60))
+# Users handled per transaction by send_digests
+DIGEST_CHUNK_SIZE = 200
+# Actors named on each line of a digest; the rest are counted
+MAX_NAMED_ACTORS = 3
+
+DIGEST_EVENT_TYPES = {event_type for event_type, _ in DigestEvent.EVENT_TYPES}
+
+# UserSettings toggle for each event type; types without one are always emailed
+EVENT_SETTINGS = {
+    'like': 'likes_notifications',
+    'share': 'shares_notifications',
+    'message': 'messages_notifications',
+}
+
+# (singular, plural) wording per event type, in the order the lines appear in a digest
+DIGEST_LINES = {
+    'follow': ('new follower', 'new followers'),
+    'message': ('new message', 'new messages'),
+    'like': ('like on your posts', 'likes on your posts'),
+    'share': ('share of your posts', 'shares of your posts'),
+}
+
+
+def record_events(user_ids, event_type, actor_id=None, related_object_type=None, related_object_id=None):
+    """Buffer the same event for several users' next digests"""
+    record_event_rows(
+        (user_id, event_type, actor_id, related_object_type, related_object_id) for user_id in set(user_ids)
+    )
+
+
+def _event_key(event):
+    return event.user_id, event.event_type, event.actor_id, event.related_object_type, event.related_object_id
+
+
+def record_event_rows(rows):
+    """
+    Buffer (user_id, event_type, actor_id, related_object_type, related_object_id) events with
+    one insert. Types that are not emailed are ignored and users are never emailed about their
+    own actions. An event that is already buffered (a like undone and made again) is not
+    added twice.
+    """
+    events = [
+        DigestEvent(
+            user_id=user_id,
+            event_type=event_type,
+            actor_id=actor_id,
+            related_object_type=related_object_type,
+            related_object_id=related_object_id,
+        )
+        for user_id, event_type, actor_id, related_object_type, related_object_id in rows
+        if event_type in DIGEST_EVENT_TYPES and user_id != actor_id
+    ]
+    if not events:
+        return
+    buffered = set(
+        DigestEvent.objects.filter(
+            user_id__in={event.user_id for event in events},
+            event_type__in={event.event_type for event in events},
+            actor_id__in={event.actor_id for event in events},
+        ).values_list('user_id', 'event_type', 'actor_id', 'related_object_type', 'related_object_id')
+    )
+    new_events = []
+    for event in events:
+        if _event_key(event) not in buffered:
+            buffered.add(_event_key(event))
+            new_events.append(event)
+    DigestEvent.objects.bulk_create(new_events, batch_size=500)
+
+
+def due_user_ids(now=None):
+    """Users whose oldest buffered event has waited a full window"""
+    now = now or timezone.now()
+    return list(
+        DigestEvent.objects.order_by('user_id').values('user_id')
+        .annotate(first_event_at=Min('created_at'))
+        .filter(first_event_at__lte=now - DIGEST_WINDOW)
+        .values_list('user_id', flat=True)
+    )
+
+
+def _join_actors(usernames):
+    named = ', '.join(usernames[:MAX_NAMED_ACTORS])
+    others = len(usernames) - MAX_NAMED_ACTORS
+    if others > 0:
+        named += f" and {others} other{'s' if others > 1 else ''}"
+    return named
+
+
+def summarize(events, usernames):
+    """
+    Digest lines such as "- 4 new messages from alice and bob", one per event type. Events
+    that repeat an earlier one (same actor and object) are counted once.
+    """
+    unique = {}
+    for event in events:
+        unique.setdefault(_event_key(event), event)
+    by_type = defaultdict(list)
+    for event in unique.values():
+        by_type[event.event_type].append(event)
+    lines = []
+    for event_type, (singular, plural) in DIGEST_LINES.items():
+        typed = by_type.get(event_type)
+        if not typed:
+            continue
+        line = f'- {len(typed)} {singular if len(typed) == 1 else plural}'
+        # Newest actors first, each named once
+        actors = list(dict.fromkeys(
+            usernames[event.actor_id] for event in reversed(typed) if event.actor_id in usernames
+        ))
+        if actors:
+            line += f' from {_join_actors(actors)}'
+        lines.append(line)
+    return lines
+
+
+def _unread_message_events(events):
+    """
+    Ids of the message events whose message the user still hasn't read, judged by their
+    read watermark in the conversation. Two queries for the whole chunk.
+    """
+    from chat.models import ConversationMember, Message
+
+    message_events = [event for event in events if event.event_type == 'message' and event.related_object_id]
+    if not message_events:
+        return set()
+    conversations = dict(
+        Message.objects.filter(id__in={event.related_object_id for event in message_events})
+        .values_list('id', 'conversation_id')
+    )
+    watermarks = {
+        (user_id, conversation_id): last_read_message_id
+        for user_id, conversation_id, last_read_message_id in ConversationMember.objects.filter(
+            user_id__in={event.user_id for event in message_events},
+            conversation_id__in=set(conversations.values()),
+        ).values_list('user_id', 'conversation_id', 'last_read_message_id')
+    }
+    unread = set()
+    for event in message_events:
+        key = (event.user_id, conversations.get(event.related_object_id))
+        # Deleted messages and conversations the user has left are dropped too
+        if key not in watermarks:
+            continue
+        last_read = watermarks[key]
+        if last_read is None or event.related_object_id > last_read:
+            unread.add(event.id)
+    return unread
+
+
+def _send_chunk(user_ids):
+    """
+    Fold the buffered events of a chunk of users into one digest each. Users, their settings
+    and the actors are loaded with one query apiece. Messages the user has already read are
+    left out. Returns (digests, events).
+    """
+    with transaction.atomic():
+        events = list(DigestEvent.objects.select_for_update().filter(user_id__in=user_ids))
+        if not events:
+            return 0, 0
+        last_event_id = max(event.id for event in events)
+
+        users = User.objects.only('id', 'email', 'first_name', 'last_name').in_bulk(user_ids)
+        toggles = {
+            row.user_id: row
+            for row in UserSettings.objects.filter(user_id__in=user_ids).only('user_id', *EVENT_SETTINGS.values())
+        }
+        usernames = dict(
+            User.objects.filter(id__in={event.actor_id for event in events if event.actor_id})
+            .values_list('id', 'username')
+        )
+
+        unread = _unread_message_events(events)
+
+        by_user = defaultdict(list)
+        for event in events:
+            toggle = EVENT_SETTINGS.get(event.event_type)
+            user_settings = toggles.get(event.user_id)
+            # Users without a settings row get the defaults, which are all on
+            if toggle and user_settings and not getattr(user_settings, toggle):
+                continue
+            if event.event_type == 'message' and event.id not in unread:
+                continue
+            by_user[event.user_id].append(event)
+
+        recipients = [
+            (users[user_id], user_events) for user_id, user_events in by_user.items()
+            if user_id in users and users[user_id].email
+        ]
+        bodies = render_batch('digest', [
+            {'full_name': user.full_name.strip() or user.email, 'summary': '\n'.join(summarize(user_events, usernames))}
+            for user, user_events in recipients
+        ])
+        subject = f'Your {settings.SITE_NAME} activity'
+        digests = [
+            EmailNotification(user=user, notification_type='digest', subject=subject, message=body)
+            for (user, _), body in zip(recipients, bodies)
+        ]
+
+        # bulk_create skips the post_save signal, so the outbox rows are added here in one insert too
+        EmailNotification.objects.bulk_create(digests, batch_size=500)
+        queue_emails([
+            {'subject': digest.subject, 'body': digest.message, 'recipients': [digest.user.email], 'notification': digest}
+            for digest in digests
+        ])
+        # Events of turned-off types and read messages are dropped along with the ones that were sent
+        DigestEvent.objects.filter(user_id__in=user_ids, id__lte=last_event_id).delete()
+    return len(digests), len(events)
+
+
+def send_digests(chunk_size=DIGEST_CHUNK_SIZE):
+    """Send a digest to every user whose window has closed, chunk_size users at a time. Returns (digests, events)."""
+    user_ids = due_user_ids()
+    digests = processed = 0
+    for start in range(0, len(user_ids), chunk_size):
+        chunk_digests, chunk_events = _send_chunk(user_ids[start:start + chunk_size])
+        digests += chunk_digests
+        processed += chunk_events
+    return digests, processed
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from notifications.digest import DIGEST_CHUNK_SIZE, due_user_ids, send_digests
+from notifications.models import DigestEvent
+
+
+class Command(BaseCommand):
+    help = 'Send one digest email per user for the notification events buffered during their window'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DIGEST_CHUNK_SIZE,
+            help=f'Users handled per transaction (default: {DIGEST_CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show how many users are due a digest without sending anything',
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            user_ids = due_user_ids()
+            events = DigestEvent.objects.filter(user_id__in=user_ids).count() if user_ids else 0
+            self.stdout.write(
+                self.style.WARNING(f'DRY RUN: {len(user_ids)} users are due a digest of {events} events')
+            )
+            return
+
+        digests, events = send_digests(options['chunk_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully queued {digests} digest emails covering {events} events')
+        )
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emailnotification',
+            name='notification_type',
+            field=models.CharField(choices=[('like', 'Post Liked'), ('share', 'Post Shared'), ('follow', 'User Followed'), ('message', 'New Message'), ('comment', 'Post Commented'), ('match', 'New Match'), ('welcome', 'Welcome'), ('system', 'System'), ('digest', 'Activity Digest')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='DigestEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('like', 'Post Liked'), ('share', 'Post Shared'), ('follow', 'User Followed'), ('message', 'New Message')], max_length=20)),
+                ('related_object_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('related_object_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='digest_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['user', 'created_at'], name='notificatio_user_id_47e671_idx')],
+            },
+        ),
+    ]
@@ -14,6 +14,7 @@ class EmailNotification(models.Model):
         ('match', 'New Match'),
         ('welcome', 'Welcome'),
         ('system', 'System'),
+        ('digest', 'Activity Digest'),
     ]
     
     STATUS_CHOICES = [
@@ -63,3 +64,32 @@ class EmailNotification(models.Model):
         if error_message:
             self.error_message = error_message
         self.save()
+
+
+class DigestEvent(models.Model):
+    """
+    An email-worthy event waiting for the user's next digest email. Rows are deleted once
+    they are folded into a digest (or dropped because the user turned that email off).
+    """
+    EVENT_TYPES = [
+        ('like', 'Post Liked'),
+        ('share', 'Post Shared'),
+        ('follow', 'User Followed'),
+        ('message', 'New Message'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='digest_events')
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
+    actor = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    related_object_id = models.PositiveIntegerField(null=True, blank=True)
+    related_object_type = models.CharField(max_length=50, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.event_type} - {self.created_at}"
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from utils.email import queue_email
+from .models import EmailNotification
+
+@receiver(post_save, sender=EmailNotification)
+def queue_email_on_notification_create(sender, instance, created, **kwargs):
+    """
+    Every new pending email notification is sent through the outbox, which marks it sent or failed
+    """
+    if created and instance.status == 'pending' and instance.user.email:
+        queue_email(instance.subject, instance.message, [instance.user.email], notification=instance)
@@ -3,8 +3,6 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
-from django.conf import settings
 from django.utils import timezone
 from .models import EmailNotification
 from .serializers import EmailNotificationSerializer, CreateEmailNotificationSerializer
@@ -91,41 +89,21 @@ def mark_all_notifications_read(request):
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def send_test_notification(request):
-    """Send a test email notification"""
-    try:
-        # Create notification record
-        notification = EmailNotification.objects.create(
-            user=request.user,
-            notification_type='system',
-            subject='Test Notification',
-            message='This is a test notification from VibeLink.',
-            status='pending'
-        )
-        
-        # Send email
-        send_mail(
-            subject=notification.subject,
-            message=notification.message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[request.user.email],
-            fail_silently=False,
-        )
-        
-        # Mark as sent
-        notification.mark_as_sent()
-        
-        return Response({
-            'status': 'success',
-            'message': 'Test notification sent successfully',
-            'notification_id': notification.id
-        })
-        
-    except Exception as e:
-        notification.mark_as_failed(str(e))
-        return Response({
-            'status': 'error',
-            'message': f'Failed to send notification: {str(e)}'
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    """Queue a test email notification"""
+    # Creating the record queues the email; the outbox marks it sent or failed
+    notification = EmailNotification.objects.create(
+        user=request.user,
+        notification_type='system',
+        subject='Test Notification',
+        message='This is a test notification from VibeLink.',
+        status='pending'
+    )
+    
+    return Response({
+        'status': 'success',
+        'message': 'Test notification queued',
+        'notification_id': notification.id
+    })
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -133,21 +111,8 @@ def create_notification(request):
     """Create a new email notification"""
     serializer = CreateEmailNotificationSerializer(data=request.data)
     if serializer.is_valid():
+        # Saving queues the email in the outbox; the response doesn't wait for SMTP
         notification = serializer.save(user=request.user)
-        
-        # Try to send email immediately
-        try:
-            send_mail(
-                subject=notification.subject,
-                message=notification.message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[notification.user.email],
-                fail_silently=False,
-            )
-            notification.mark_as_sent()
-        except Exception as e:
-            notification.mark_as_failed(str(e))
-        
         return Response(EmailNotificationSerializer(notification).data, status=status.HTTP_201_CREATED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Post, PostLike, PostShare
+from .models import Post, PostLike, PostShare, TimelineEntry, MaterializedTimeline, TrendingScore, AuthorAffinity
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
@@ -23,3 +23,29 @@ class PostShareAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'post', 'created_at']
     list_filter = ['created_at']
     search_fields = ['user__username', 'post__content']
+
+
+@admin.register(TimelineEntry)
+class TimelineEntryAdmin(admin.ModelAdmin):
+    list_display = ['id', 'owner', 'post', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['owner__username']
+    raw_id_fields = ['owner', 'post']
+
+@admin.register(MaterializedTimeline)
+class MaterializedTimelineAdmin(admin.ModelAdmin):
+    list_display = ['owner', 'materialized_at']
+    search_fields = ['owner__username']
+    raw_id_fields = ['owner']
+
+@admin.register(TrendingScore)
+class TrendingScoreAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'key', 'score', 'epoch', 'updated_at']
+    list_filter = ['kind']
+    search_fields = ['key']
+
+@admin.register(AuthorAffinity)
+class AuthorAffinityAdmin(admin.ModelAdmin):
+    list_display = ['id', 'viewer', 'author', 'score', 'updated_at']
+    search_fields = ['viewer__username', 'author__username']
+    raw_id_fields = ['viewer', 'author']
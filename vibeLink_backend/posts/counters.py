@@ -0,0 +1,123 @@
+import logging
+import random
+import threading
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
+from .models import Post, PostCounterShard
+
+logger = logging.getLogger(__name__)
+
+# Posts at or above this many likes route counter updates to shards (0 disables sharding)
+HOT_POST_THRESHOLD = getattr(settings, 'POST_COUNTER_HOT_THRESHOLD', 1000)
+# Number of shard rows per hot post
+SHARD_COUNT = getattr(settings, 'POST_COUNTER_SHARDS', 8)
+
+# Seconds after a shard write before that post's shards are folded back into the post row,
+# so readers that only see Post columns (ranking, trending, search) catch up on their own
+FOLD_DELAY_SECONDS = getattr(settings, 'POST_COUNTER_FOLD_DELAY', 10)
+
+# Shard column for each Post counter field
+SHARD_FIELDS = {'likes_count': 'likes', 'shares_count': 'shares'}
+
+# Posts with a fold timer pending in this process
+_scheduled_folds = set()
+_scheduled_lock = threading.Lock()
+
+
+def is_hot(post):
+    return bool(HOT_POST_THRESHOLD) and post.likes_count >= HOT_POST_THRESHOLD
+
+
+def _increment_shard(post_id, shard_field, delta):
+    slot = random.randrange(SHARD_COUNT)
+    shards = PostCounterShard.objects.filter(post_id=post_id, slot=slot)
+    if not shards.update(**{shard_field: F(shard_field) + delta}):
+        try:
+            with transaction.atomic():
+                PostCounterShard.objects.create(post_id=post_id, slot=slot, **{shard_field: delta})
+        except IntegrityError:
+            # Another request created the slot first
+            shards.update(**{shard_field: F(shard_field) + delta})
+    schedule_fold(post_id)
+
+
+def adjust_counter(post, field, delta):
+    """
+    Atomically add delta to post.<field> ('likes_count' or 'shares_count') without
+    rewriting the row. Hot posts write to a random shard instead of the post row.
+    """
+    if is_hot(post):
+        _increment_shard(post.id, SHARD_FIELDS[field], delta)
+        return
+    if delta >= 0:
+        Post.objects.filter(id=post.id).update(**{field: F(field) + delta})
+    else:
+        Post.objects.filter(id=post.id).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def get_counter(post, field):
+    """Current value of post.<field> including deltas still sitting in shards"""
+    value = Post.objects.filter(id=post.id).values_list(field, flat=True).first() or 0
+    if is_hot(post):
+        shard_field = SHARD_FIELDS[field]
+        pending = PostCounterShard.objects.filter(post_id=post.id).aggregate(total=Sum(shard_field))['total']
+        value += pending or 0
+    return max(0, value)
+
+
+def pending_deltas(posts):
+    """
+    Shard deltas not folded yet, {post_id: {'likes_count': n, 'shares_count': n}}, for the hot
+    posts among posts. One query for the whole page, none when no post is hot.
+    """
+    hot_ids = [post.id for post in posts if is_hot(post)]
+    if not hot_ids:
+        return {}
+    rows = (
+        PostCounterShard.objects.filter(post_id__in=hot_ids).order_by().values('post_id')
+        .annotate(likes=Sum('likes'), shares=Sum('shares'))
+    )
+    return {row['post_id']: {'likes_count': row['likes'] or 0, 'shares_count': row['shares'] or 0} for row in rows}
+
+
+def fold_shards(post_id):
+    """Move all shard deltas of a post into its counter columns"""
+    with transaction.atomic():
+        shards = list(
+            PostCounterShard.objects.select_for_update().filter(post_id=post_id).values_list('id', 'likes', 'shares')
+        )
+        likes = sum(row[1] for row in shards)
+        shares = sum(row[2] for row in shards)
+        if likes or shares:
+            Post.objects.filter(id=post_id).update(
+                likes_count=Greatest(F('likes_count') + likes, 0),
+                shares_count=Greatest(F('shares_count') + shares, 0),
+            )
+        # Only the rows summed above: a slot created meanwhile keeps its delta for the next fold
+        PostCounterShard.objects.filter(id__in=[row[0] for row in shards]).delete()
+    return likes, shares
+
+
+def schedule_fold(post_id):
+    """Fold the post's shards FOLD_DELAY_SECONDS from now, once per post however many writes arrive"""
+    with _scheduled_lock:
+        if post_id in _scheduled_folds:
+            return
+        _scheduled_folds.add(post_id)
+    timer = threading.Timer(FOLD_DELAY_SECONDS, _fold_in_background, args=(post_id,))
+    timer.daemon = True
+    timer.start()
+
+
+def _fold_in_background(post_id):
+    # Writes from here on schedule the next fold
+    with _scheduled_lock:
+        _scheduled_folds.discard(post_id)
+    try:
+        fold_shards(post_id)
+    except Exception:
+        logger.exception('Folding counter shards of post %s failed', post_id)
+    finally:
+        connection.close()
@@ -0,0 +1,318 @@
+import atexit
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from .models import Post, PostLike, PostShare
+from .counters import adjust_counter, get_counter
+from .trending import record_engagement
+from notifications.digest import record_event_rows
+
+logger = logging.getLogger(__name__)
+
+# Engagement kinds handled by the buffer: model and Post counter field for each
+KINDS = {
+    'like': (PostLike, 'likes_count'),
+    'share': (PostShare, 'shares_count'),
+}
+
+# Max (user, post) pairs OR-ed into a single delete
+DELETE_BATCH_SIZE = 200
+
+
+class EngagementBuffer:
+    """
+    Write-behind buffer for like/share toggles.
+
+    A toggle records the desired final state of (kind, user, post) in memory and in an
+    append-only journal, then returns an optimistic count. A background thread flushes the
+    buffer every ENGAGEMENT_FLUSH_INTERVAL_MS with one bulk_create and batched deletes per
+    kind, and adjusts post counters by the rows that actually changed. Each process keeps
+    its own journal and holds a lock file next to it while it runs; on start-up a process
+    adopts the journals whose lock is free, so toggles acknowledged before a crash are not lost.
+    """
+
+    def __init__(self, journal_path, interval_ms, fsync=False):
+        self.journal_base, _ = os.path.splitext(journal_path)
+        self.journal_path = None
+        self.flushing_path = None
+        self.interval = interval_ms / 1000
+        # fsync every journal write (survives power loss, not just process crashes)
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._states = {}
+        self._inflight = {}
+        self._deltas = Counter()
+        self._journal = None
+        self._owner_lock = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    # Recording
+
+    def toggle(self, kind, user_id, post):
+        """Flip the viewer's like/share state; returns (new_state, optimistic_count)"""
+        model, field = KINDS[kind]
+        self._ensure_started()
+        key = (kind, user_id, post.id)
+        with self._lock:
+            current = self._states.get(key, self._inflight.get(key))
+        if current is None:
+            current = model.objects.filter(user_id=user_id, post_id=post.id).exists()
+
+        with self._lock:
+            # Another request may have toggled the same pair while we were reading the database
+            current = self._states.get(key, self._inflight.get(key, current))
+            new_state = not current
+            self._states[key] = new_state
+            self._deltas[(kind, post.id)] += 1 if new_state else -1
+            self._write_journal(key, new_state)
+            pending = self._deltas[(kind, post.id)]
+
+        return new_state, max(0, get_counter(post, field) + pending)
+
+    def pending_states(self, kind, user_id, post_ids):
+        """Buffered states of (kind, user, post) for the given posts, not yet flushed"""
+        with self._lock:
+            pending = {**self._inflight, **self._states}
+        return {
+            post_id: pending[(kind, user_id, post_id)]
+            for post_id in post_ids
+            if (kind, user_id, post_id) in pending
+        }
+
+    def _write_journal(self, key, state):
+        kind, user_id, post_id = key
+        self._journal.write(json.dumps({'kind': kind, 'user': user_id, 'post': post_id, 'state': state}) + '\n')
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    # Flushing
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            os.makedirs(os.path.dirname(self.journal_base), exist_ok=True)
+            pid = os.getpid()
+            # Held for the life of the process: a journal whose lock can be taken has no live owner,
+            # which, unlike a PID check, stays true when a dead process's PID is reused
+            self._owner_lock = self._lock_owner(pid, blocking=True)
+            self.journal_path = f'{self.journal_base}.{pid}.log'
+            self.flushing_path = f'{self.journal_base}.{pid}.flushing.log'
+            orphans = self._replay()
+            # Re-journal adopted toggles under this process before dropping the orphaned files
+            adopted_path = f'{self.journal_base}.{pid}.adopting'
+            with open(adopted_path, 'w') as adopted:
+                for (kind, user_id, post_id), state in self._states.items():
+                    adopted.write(json.dumps({'kind': kind, 'user': user_id, 'post': post_id, 'state': state}) + '\n')
+                adopted.flush()
+                os.fsync(adopted.fileno())
+            for path in orphans:
+                if path != self.journal_path:
+                    os.remove(path)
+            os.replace(adopted_path, self.journal_path)
+            self._journal = open(self.journal_path, 'a')
+            self._thread = threading.Thread(target=self._run, name='engagement-flush', daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def _lock_owner(self, pid, blocking=False):
+        """
+        Take the exclusive lock on a process's journals. Returns the open lock file, or None
+        when another process holds it (the owner is alive, or someone else is adopting).
+        """
+        path = f'{self.journal_base}.{pid}.lock'
+        while True:
+            lock_file = open(path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                return None
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                current = None
+            # An adopter removes the lock file when it is done; a lock on the removed file proves nothing
+            if current is not None and current.st_ino == os.fstat(lock_file.fileno()).st_ino:
+                return lock_file
+            lock_file.close()
+
+    def _journal_files(self):
+        """Journal files on disk grouped by the PID that owns them"""
+        prefix = os.path.basename(self.journal_base) + '.'
+        by_pid = defaultdict(list)
+        for path in sorted(glob.glob(f'{self.journal_base}.*.log')):
+            try:
+                pid = int(os.path.basename(path)[len(prefix):].split('.')[0])
+            except ValueError:
+                continue
+            by_pid[pid].append(path)
+        return by_pid
+
+    def _claim(self, paths):
+        """
+        Move a dead process's journals under this process's name, so they stay covered by a
+        held lock until they are re-journaled. A file that is already gone was adopted by
+        another process.
+        """
+        pid = os.getpid()
+        claimed = []
+        for path in paths:
+            suffix = os.path.basename(path)[len(os.path.basename(self.journal_base)) + 1:]
+            claim_path = f'{self.journal_base}.{pid}.adopted-{suffix}'
+            try:
+                os.replace(path, claim_path)
+            except FileNotFoundError:
+                continue
+            claimed.append(claim_path)
+        return claimed
+
+    def _replay(self):
+        """
+        Load toggles that dead processes acknowledged but never flushed; returns their journal
+        files. Journals under this process's own PID are left from an earlier process that had
+        the same PID.
+        """
+        pid = os.getpid()
+        orphans = []
+        for owner_pid, paths in self._journal_files().items():
+            if owner_pid == pid:
+                orphans.extend(paths)
+                continue
+            owner_lock = self._lock_owner(owner_pid)
+            if owner_lock is None:
+                continue
+            try:
+                orphans.extend(self._claim(paths))
+                os.remove(owner_lock.name)
+            finally:
+                owner_lock.close()
+        for path in orphans:
+            try:
+                journal = open(path)
+            except FileNotFoundError:
+                continue
+            with journal:
+                for line in journal:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash mid-write
+                        continue
+                    self._states[(entry['kind'], entry['user'], entry['post'])] = entry['state']
+        if self._states:
+            logger.info('Replayed %s buffered engagement toggles from journal', len(self._states))
+        return orphans
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Engagement buffer flush failed')
+            finally:
+                connection.close()
+
+    def flush(self):
+        """Write everything buffered so far to the database"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._states:
+                    return 0
+                states, self._states = self._states, {}
+                deltas, self._deltas = self._deltas, Counter()
+                self._inflight = states
+                # Rotate the journal so new toggles land in a fresh file while this batch is written
+                self._journal.close()
+                os.replace(self.journal_path, self.flushing_path)
+                self._journal = open(self.journal_path, 'a')
+
+            try:
+                self._apply(states)
+            except Exception:
+                # Put the batch back (newer toggles win) and keep it journaled
+                with self._lock:
+                    for key, state in states.items():
+                        if key not in self._states:
+                            self._states[key] = state
+                            self._write_journal(key, state)
+                    self._deltas.update(deltas)
+                    self._inflight = {}
+                os.remove(self.flushing_path)
+                raise
+
+            with self._lock:
+                self._inflight = {}
+            os.remove(self.flushing_path)
+            return len(states)
+
+    def _apply(self, states):
+        for kind, (model, field) in KINDS.items():
+            wanted = {(user_id, post_id): state for (k, user_id, post_id), state in states.items() if k == kind}
+            if not wanted:
+                continue
+            post_ids = {post_id for _, post_id in wanted}
+            owners = dict(Post.objects.filter(id__in=post_ids).values_list('id', 'user_id'))
+            live_post_ids = set(owners)
+            wanted = {key: state for key, state in wanted.items() if key[1] in live_post_ids}
+
+            existing = set(
+                model.objects.filter(
+                    user_id__in={user_id for user_id, _ in wanted},
+                    post_id__in=live_post_ids
+                ).values_list('user_id', 'post_id')
+            )
+            to_create = [key for key, state in wanted.items() if state and key not in existing]
+            to_delete = [key for key, state in wanted.items() if not state and key in existing]
+
+            deltas = Counter()
+            for _, post_id in to_create:
+                deltas[post_id] += 1
+            for _, post_id in to_delete:
+                deltas[post_id] -= 1
+
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    [model(user_id=user_id, post_id=post_id) for user_id, post_id in to_create],
+                    ignore_conflicts=True,
+                    batch_size=500
+                )
+                for start in range(0, len(to_delete), DELETE_BATCH_SIZE):
+                    condition = Q()
+                    for user_id, post_id in to_delete[start:start + DELETE_BATCH_SIZE]:
+                        condition |= Q(user_id=user_id, post_id=post_id)
+                    model.objects.filter(condition).delete()
+                for post in Post.objects.filter(id__in=[post_id for post_id, delta in deltas.items() if delta]).only('id', 'likes_count', 'hashtags'):
+                    adjust_counter(post, field, deltas[post.id])
+                    record_engagement(post, kind, deltas[post.id])
+                record_event_rows((owners[post_id], kind, user_id, 'post', post_id) for user_id, post_id in to_create)
+
+    def shutdown(self):
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Engagement buffer flush on shutdown failed')
+
+
+engagement_buffer = EngagementBuffer(
+    journal_path=getattr(settings, 'ENGAGEMENT_JOURNAL_PATH', os.path.join(settings.BASE_DIR, 'logs', 'engagement-journal.log')),
+    interval_ms=getattr(settings, 'ENGAGEMENT_FLUSH_INTERVAL_MS', 500),
+    fsync=getattr(settings, 'ENGAGEMENT_JOURNAL_FSYNC', False),
+)
+
+
+def write_behind_enabled():
+    return getattr(settings, 'ENGAGEMENT_WRITE_BEHIND', False)
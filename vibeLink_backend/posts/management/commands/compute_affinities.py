@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from social.models import Follow
+from posts.ranking import compute_affinities
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Precompute viewer-author affinity scores used by the ranked home feed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='Only recompute the affinities of this viewer',
+        )
+
+    def handle(self, *args, **options):
+        viewer_ids = Follow.objects.values_list('follower_id', flat=True).distinct()
+        if options['user_id']:
+            viewer_ids = viewer_ids.filter(follower_id=options['user_id'])
+
+        viewers = User.objects.filter(is_active=True, id__in=viewer_ids).select_related('settings')
+        pairs = 0
+        computed = 0
+        for viewer in viewers.iterator(chunk_size=500):
+            pairs += compute_affinities(viewer)
+            computed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully computed {pairs} affinities for {computed} users')
+        )
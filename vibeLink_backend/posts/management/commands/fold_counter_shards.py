@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from posts.models import PostCounterShard
+from posts.counters import fold_shards
+
+
+class Command(BaseCommand):
+    help = 'Fold sharded like/share counter deltas back into their posts'
+
+    def handle(self, *args, **options):
+        post_ids = list(PostCounterShard.objects.values_list('post_id', flat=True).distinct())
+
+        for post_id in post_ids:
+            fold_shards(post_id)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully folded counter shards for {len(post_ids)} posts')
+        )
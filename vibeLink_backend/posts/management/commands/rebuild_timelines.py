@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from social.models import Follow
+from posts.models import MaterializedTimeline, TimelineEntry
+from posts.timeline import backfill_timeline, mark_timeline_materialized
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild materialized home timelines from follows and recent posts; feeds read them once rebuilt'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='Only rebuild the timeline of this user',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete existing timeline entries before rebuilding',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True)
+        if options['user_id']:
+            users = users.filter(id=options['user_id'])
+
+        rebuilt = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            if options['clear']:
+                # The feed reads through the pull query again until the rebuild is done
+                MaterializedTimeline.objects.filter(owner_id=user_id).delete()
+                TimelineEntry.objects.filter(owner_id=user_id).delete()
+            author_ids = list(Follow.objects.filter(follower_id=user_id).values_list('following_id', flat=True))
+            backfill_timeline(user_id, author_ids + [user_id])
+            mark_timeline_materialized(user_id)
+            rebuilt += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {rebuilt} timelines')
+        )
@@ -0,0 +1,71 @@
+from collections import Counter
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from posts.models import Post, PostLike, PostShare, TrendingScore
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Rescale trending scores to the current epoch and refresh the cached top posts and hashtags'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recompute all scores from recent likes, shares and posts instead of keeping the live ones',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=3,
+            help='How far back --rebuild looks (default: 3)',
+        )
+
+    def rebuild(self, days):
+        now = timezone.now()
+        epoch = trending.current_epoch(now.timestamp())
+        since = now - timedelta(days=days)
+        scores = {'post': Counter(), 'hashtag': Counter()}
+
+        def add(post_id, hashtags, event, created_at):
+            amount = trending.EVENT_WEIGHTS[event] * trending._growth(created_at.timestamp(), epoch)
+            if post_id is not None:
+                scores['post'][str(post_id)] += amount
+            for tag in trending.normalize_hashtags(hashtags):
+                scores['hashtag'][tag] += amount
+
+        for model, event in ((PostLike, 'like'), (PostShare, 'share')):
+            rows = model.objects.filter(created_at__gte=since).values_list('post_id', 'post__hashtags', 'created_at')
+            for post_id, hashtags, created_at in rows.iterator(chunk_size=2000):
+                add(post_id, hashtags, event, created_at)
+        for hashtags, created_at in Post.objects.filter(created_at__gte=since).values_list('hashtags', 'created_at').iterator(chunk_size=2000):
+            add(None, hashtags, 'post', created_at)
+
+        with transaction.atomic():
+            TrendingScore.objects.all().delete()
+            TrendingScore.objects.bulk_create(
+                [
+                    TrendingScore(kind=kind, key=key, score=score, epoch=epoch)
+                    for kind, counter in scores.items()
+                    for key, score in counter.items()
+                ],
+                batch_size=1000
+            )
+        return sum(len(counter) for counter in scores.values())
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rebuilt = self.rebuild(options['days'])
+            self.stdout.write(f'Rebuilt {rebuilt} trending scores')
+        else:
+            rescaled = trending.renormalize()
+            self.stdout.write(f'Rescaled {rescaled} trending scores')
+
+        top = trending.refresh_trending()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully refreshed trending: {len(top['posts'])} posts, {len(top['hashtags'])} hashtags"
+            )
+        )
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:11
+
+import utils.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=utils.storage.ContentAddressedStorage(), upload_to='posts/'),
+        ),
+    ]
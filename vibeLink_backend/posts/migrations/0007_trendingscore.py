@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_image_media_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('hashtag', 'Hashtag')], max_length=10)),
+                ('key', models.CharField(help_text='Post id or normalized hashtag', max_length=100)),
+                ('score', models.FloatField(default=0)),
+                ('epoch', models.IntegerField(help_text='Decay epoch the score is expressed in')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', '-score'], name='posts_trend_kind_831cee_idx'), models.Index(fields=['epoch'], name='posts_trend_epoch_e8979c_idx')],
+                'unique_together': {('kind', 'key')},
+            },
+        ),
+    ]
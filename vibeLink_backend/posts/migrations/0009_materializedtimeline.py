@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_customuser_profile_photo_media_storage'),
+        ('posts', '0008_authoraffinity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterializedTimeline',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='materialized_timeline', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('materialized_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
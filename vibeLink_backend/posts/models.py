@@ -1,13 +1,15 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from utils.storage import media_storage
 
 User = get_user_model()
 
 class Post(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     content = models.TextField()
-    image = models.ImageField(upload_to='posts/', null=True, blank=True)
+    image = models.ImageField(upload_to='posts/', storage=media_storage, null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True, help_text='Resized WebP/JPEG copies of image')
     hashtags = models.JSONField(default=list, blank=True)
     likes_count = models.PositiveIntegerField(default=0)
     shares_count = models.PositiveIntegerField(default=0)
@@ -16,6 +18,9 @@ class Post(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.user.username}: {self.content[:50]}..."
@@ -41,3 +46,94 @@ class PostShare(models.Model):
 
     def __str__(self):
         return f"{self.user.username} shared {self.post.id}"
+
+
+class PostCounterShard(models.Model):
+    """
+    Pending like/share deltas for hot posts, spread over a few slots so concurrent
+    toggles don't all queue on the post row. Summed on read and folded back into
+    Post.likes_count/shares_count shortly after each write (see posts.counters) or by
+    the fold_counter_shards command.
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='counter_shards')
+    slot = models.PositiveSmallIntegerField()
+    likes = models.IntegerField(default=0)
+    shares = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['post', 'slot']
+
+    def __str__(self):
+        return f"Post {self.post_id} shard {self.slot}: {self.likes} likes, {self.shares} shares"
+
+class TimelineEntry(models.Model):
+    """
+    Materialized home timeline row: one per (owner, post) for every post the owner should
+    see in their feed. Written by fan-out when a post is created or a follow changes.
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    created_at = models.DateTimeField(help_text='Copy of post.created_at used for feed ordering')
+
+    class Meta:
+        unique_together = ['owner', 'post']
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-post']),
+        ]
+
+    def __str__(self):
+        return f"{self.owner.username} <- post {self.post_id}"
+
+class MaterializedTimeline(models.Model):
+    """
+    Marks a user's TimelineEntry rows as complete. Set for new users on sign-up and by
+    rebuild_timelines for everyone else; until then the feed uses the pull query.
+    """
+    owner = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='materialized_timeline')
+    materialized_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.owner.username}'s timeline, materialized {self.materialized_at}"
+
+class TrendingScore(models.Model):
+    """
+    Time-decayed engagement score of a post or hashtag. Scores are stored relative to the
+    start of their epoch, so an event only adds to one row and never decays the others;
+    rows are rescaled to the current epoch lazily (see posts.trending).
+    """
+    KIND_CHOICES = [
+        ('post', 'Post'),
+        ('hashtag', 'Hashtag'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    key = models.CharField(max_length=100, help_text='Post id or normalized hashtag')
+    score = models.FloatField(default=0)
+    epoch = models.IntegerField(help_text='Decay epoch the score is expressed in')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['kind', 'key']
+        indexes = [
+            models.Index(fields=['kind', '-score']),
+            models.Index(fields=['epoch']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.key}: {self.score:.2f}"
+
+class AuthorAffinity(models.Model):
+    """
+    How much a viewer cares about an author, precomputed from likes, shares, messages and
+    match score by the compute_affinities command. Read in bulk by the ranked home feed.
+    """
+    viewer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='author_affinities')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='viewer_affinities')
+    score = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['viewer', 'author']
+
+    def __str__(self):
+        return f"{self.viewer.username} -> {self.author.username}: {self.score:.2f}"
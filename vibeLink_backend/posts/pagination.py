@@ -0,0 +1,108 @@
+import base64
+from django.core.cache import cache
+from django.db import connection, DatabaseError
+from django.db.models import Max, Q
+from django.utils.dateparse import parse_datetime
+
+# Default and maximum number of posts returned per feed page
+FEED_PAGE_SIZE = 20
+MAX_FEED_PAGE_SIZE = 50
+
+# How long a table row estimate is reused
+ESTIMATE_CACHE_TIMEOUT = 60 * 5
+
+
+def encode_cursor(created_at, pk):
+    """Encode a (created_at, id) position into an opaque cursor string"""
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if created_at is None:
+        raise ValueError('Invalid cursor')
+    return created_at, pk
+
+
+def get_page_size(request, default=FEED_PAGE_SIZE, maximum=MAX_FEED_PAGE_SIZE):
+    """Read ?limit= from the request, clamped to [1, maximum]"""
+    try:
+        limit = int(request.query_params.get('limit', default))
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, maximum))
+
+
+def apply_cursor(queryset, cursor=None, id_field='id'):
+    """Order a queryset newest first on (created_at, id_field) and skip past the cursor position"""
+    queryset = queryset.order_by('-created_at', f'-{id_field}')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, **{f'{id_field}__lt': pk})
+        )
+    return queryset
+
+
+def keyset_paginate(queryset, cursor=None, limit=FEED_PAGE_SIZE, id_field='id'):
+    """
+    Return (items, next_cursor) for a queryset walked newest first on (created_at, id).
+    Every page is a single range scan, no COUNT(*) and no OFFSET.
+    """
+    items = list(apply_cursor(queryset, cursor, id_field)[:limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, getattr(last, id_field))
+    return items, next_cursor
+
+
+def _table_statistics_count(table):
+    """Row count from the database's planner statistics, or None if there are none yet"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+                [table]
+            )
+        elif connection.vendor == 'sqlite':
+            # Filled by ANALYZE; the first number of each stat row is the table's row count
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    # Postgres reports -1 for tables that were never analyzed
+    return estimate if estimate >= 0 else None
+
+
+def estimate_count(model):
+    """
+    Approximate number of rows in a model's table without COUNT(*): planner statistics when
+    available, otherwise the highest primary key (one index lookup)
+    """
+    table = model._meta.db_table
+    cache_key = f'estimated_count_{table}'
+    estimate = cache.get(cache_key)
+    if estimate is None:
+        try:
+            estimate = _table_statistics_count(table)
+        except DatabaseError:
+            estimate = None
+        if estimate is None:
+            estimate = model.objects.aggregate(max_id=Max('pk'))['max_id'] or 0
+        cache.set(cache_key, estimate, ESTIMATE_CACHE_TIMEOUT)
+    return estimate
@@ -0,0 +1,177 @@
+import math
+from collections import Counter
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from chat.models import Conversation, Message
+from social.models import Follow
+from social.services import calculate_match_score
+from .models import AuthorAffinity, Post, PostLike, PostShare, TimelineEntry
+from .pagination import decode_cursor, encode_cursor, FEED_PAGE_SIZE
+from .timeline import get_high_follower_author_ids, has_materialized_timeline
+
+User = get_user_model()
+
+# Newest posts considered for one ranked feed
+RANKING_CANDIDATES = 300
+# A post's recency factor halves every RECENCY_HALF_LIFE_HOURS
+RECENCY_HALF_LIFE_HOURS = 12
+# How strongly engagement and affinity lift a post above pure recency
+ENGAGEMENT_WEIGHT = 0.3
+AFFINITY_WEIGHT = 0.5
+SHARE_WEIGHT = 2
+
+# How long the ranked order of a feed is kept for paging through it; older cursors expire.
+# With several server processes CACHES must point at a shared cache so any process can page on
+RANKED_FEED_CACHE_TIMEOUT = 60 * 30
+
+# Interactions older than this don't count towards affinity
+AFFINITY_WINDOW = timedelta(days=90)
+AFFINITY_WEIGHTS = {
+    'engagement': 1.0,
+    'messages': 0.8,
+    'match': 1.5,
+}
+
+
+def _user_affinities(viewer, author_ids, since):
+    """Affinity score per author for one viewer, from a fixed number of grouped queries"""
+    engagement = Counter()
+    for model, weight in ((PostLike, 1), (PostShare, SHARE_WEIGHT)):
+        rows = (
+            model.objects.filter(user=viewer, post__user_id__in=author_ids, created_at__gte=since)
+            .values_list('post__user_id')
+            .annotate(total=Count('id'))
+        )
+        for author_id, total in rows:
+            engagement[author_id] += total * weight
+
+    # Messages exchanged in conversations shared with each author
+    conversation_ids = list(Conversation.objects.filter(participants=viewer).values_list('id', flat=True))
+    partners = (
+        Conversation.participants.through.objects
+        .filter(conversation_id__in=conversation_ids, customuser_id__in=author_ids)
+        .values_list('conversation_id', 'customuser_id')
+    )
+    message_counts = dict(
+        Message.objects.filter(conversation_id__in=conversation_ids, created_at__gte=since)
+        .values_list('conversation_id')
+        .annotate(total=Count('id'))
+    )
+    messages = Counter()
+    for conversation_id, author_id in partners:
+        messages[author_id] += message_counts.get(conversation_id, 0)
+
+    # Match scores need both users' settings; pairs without them score 0
+    match = {}
+    if hasattr(viewer, 'settings'):
+        for author in User.objects.filter(id__in=author_ids).select_related('settings'):
+            if hasattr(author, 'settings'):
+                match[author.id] = calculate_match_score(viewer, author)['overall_score'] / 100
+
+    return {
+        author_id: (
+            AFFINITY_WEIGHTS['engagement'] * math.log1p(engagement[author_id])
+            + AFFINITY_WEIGHTS['messages'] * math.log1p(messages[author_id])
+            + AFFINITY_WEIGHTS['match'] * match.get(author_id, 0)
+        )
+        for author_id in author_ids
+    }
+
+
+def compute_affinities(viewer):
+    """Recompute and store the viewer's affinity to every author they follow"""
+    author_ids = list(Follow.objects.filter(follower=viewer).values_list('following_id', flat=True))
+    scores = _user_affinities(viewer, author_ids, timezone.now() - AFFINITY_WINDOW) if author_ids else {}
+    with transaction.atomic():
+        AuthorAffinity.objects.filter(viewer=viewer).delete()
+        AuthorAffinity.objects.bulk_create(
+            [AuthorAffinity(viewer=viewer, author_id=author_id, score=score) for author_id, score in scores.items() if score > 0]
+        )
+    return len(scores)
+
+
+def _candidates(user, as_of):
+    """(post_id, author_id, created_at, likes, shares) of the newest posts in the user's home feed"""
+    fields = ('id', 'user_id', 'created_at', 'likes_count', 'shares_count')
+    posts = Post.objects.filter(created_at__lte=as_of).order_by('-created_at', '-id')
+
+    if not has_materialized_timeline(user):
+        following_ids = list(Follow.objects.filter(follower=user).values_list('following_id', flat=True))
+        return list(posts.filter(user_id__in=following_ids + [user.id]).values_list(*fields)[:RANKING_CANDIDATES])
+
+    rows = list(
+        TimelineEntry.objects.filter(owner=user, created_at__lte=as_of)
+        .order_by('-created_at', '-post_id')
+        .values_list('post_id', 'post__user_id', 'created_at', 'post__likes_count', 'post__shares_count')[:RANKING_CANDIDATES]
+    )
+    high_follower_ids = get_high_follower_author_ids()
+    if high_follower_ids:
+        pulled_author_ids = list(
+            Follow.objects.filter(follower=user, following_id__in=high_follower_ids)
+            .values_list('following_id', flat=True)
+        )
+        if pulled_author_ids:
+            seen = {row[0] for row in rows}
+            rows += [
+                row for row in posts.filter(user_id__in=pulled_author_ids).values_list(*fields)[:RANKING_CANDIDATES]
+                if row[0] not in seen
+            ]
+            rows.sort(key=lambda row: (row[2], row[0]), reverse=True)
+    return rows[:RANKING_CANDIDATES]
+
+
+def rank_candidates(rows, affinities, now):
+    """Order candidate rows by recency x engagement x affinity; returns post ids, best first"""
+    decay = math.log(2) / (RECENCY_HALF_LIFE_HOURS * 3600)
+    now_ts = now.timestamp()
+    scored = [
+        (
+            math.exp(-decay * max(0.0, now_ts - created_at.timestamp()))
+            * (1 + ENGAGEMENT_WEIGHT * math.log1p(likes + SHARE_WEIGHT * shares))
+            * (1 + AFFINITY_WEIGHT * affinities.get(author_id, 0)),
+            post_id,
+        )
+        for post_id, author_id, created_at, likes, shares in rows
+    ]
+    scored.sort(reverse=True)
+    return [post_id for _, post_id in scored]
+
+
+def _ranked_feed_cache_key(user, as_of):
+    return f'ranked_feed_{user.id}_{as_of.isoformat()}'
+
+
+def get_ranked_page(user, queryset, cursor=None, limit=FEED_PAGE_SIZE):
+    """
+    Return (posts, next_cursor) for the ranked home feed. The first page ranks the newest
+    candidates in memory and caches the ranked post ids for RANKED_FEED_CACHE_TIMEOUT; the
+    cursor holds the ranking's snapshot time and an offset into that cached order, so later
+    pages neither repeat nor skip posts while live scores move. A cursor whose ranking is no
+    longer cached raises ValueError and the feed has to be reloaded from the first page.
+    """
+    if cursor:
+        # Ranked cursors reuse the (timestamp, integer) cursor format as (snapshot time, offset)
+        as_of, offset = decode_cursor(cursor)
+        ranked_ids = cache.get(_ranked_feed_cache_key(user, as_of))
+        if ranked_ids is None or offset < 0:
+            raise ValueError('Ranked feed cursor has expired, reload the feed')
+    else:
+        as_of, offset = timezone.now(), 0
+        rows = _candidates(user, as_of)
+        affinities = dict(
+            AuthorAffinity.objects.filter(viewer=user, author_id__in={row[1] for row in rows})
+            .values_list('author_id', 'score')
+        )
+        ranked_ids = rank_candidates(rows, affinities, as_of)
+        if len(ranked_ids) > limit:
+            cache.set(_ranked_feed_cache_key(user, as_of), ranked_ids, RANKED_FEED_CACHE_TIMEOUT)
+
+    page_ids = ranked_ids[offset:offset + limit]
+    next_cursor = encode_cursor(as_of, offset + limit) if offset + limit < len(ranked_ids) else None
+
+    posts_by_id = queryset.in_bulk(page_ids)
+    return [posts_by_id[post_id] for post_id in page_ids if post_id in posts_by_id], next_cursor
@@ -1,18 +1,84 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.db.models import Exists, OuterRef
 from .models import Post, PostLike, PostShare
+from .engagement_buffer import engagement_buffer, write_behind_enabled
+from .counters import pending_deltas
+from utils.images import variant_urls
 
 User = get_user_model()
 
+def get_viewer_relations(user, posts):
+    """
+    Load which of the given posts the viewer liked/shared and which authors they follow,
+    in three queries for the whole page, plus the unfolded counter deltas of hot posts.
+    Pass the result into PostSerializer's context.
+    """
+    from social.models import Follow
+
+    if not user or not user.is_authenticated:
+        return {
+            'liked_post_ids': set(), 'shared_post_ids': set(), 'followed_user_ids': set(),
+            'counter_deltas': pending_deltas(posts),
+        }
+    post_ids = [post.id for post in posts]
+    author_ids = {post.user_id for post in posts}
+    
+    # Posts loaded through annotate_viewer_flags already carry the answers
+    if posts and all(hasattr(post, 'viewer_liked') for post in posts):
+        liked_post_ids = {post.id for post in posts if post.viewer_liked}
+        shared_post_ids = {post.id for post in posts if post.viewer_shared}
+        followed_user_ids = {post.user_id for post in posts if post.viewer_follows_author}
+    else:
+        liked_post_ids = set(
+            PostLike.objects.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True)
+        )
+        shared_post_ids = set(
+            PostShare.objects.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True)
+        )
+        followed_user_ids = set(
+            Follow.objects.filter(follower=user, following_id__in=author_ids).values_list('following_id', flat=True)
+        )
+    
+    # Toggles still sitting in the write-behind buffer win over the database
+    if write_behind_enabled():
+        for kind, post_id_set in (('like', liked_post_ids), ('share', shared_post_ids)):
+            for post_id, state in engagement_buffer.pending_states(kind, user.id, post_ids).items():
+                if state:
+                    post_id_set.add(post_id)
+                else:
+                    post_id_set.discard(post_id)
+    
+    return {
+        'liked_post_ids': liked_post_ids,
+        'shared_post_ids': shared_post_ids,
+        'followed_user_ids': followed_user_ids,
+        'counter_deltas': pending_deltas(posts),
+    }
+
+def annotate_viewer_flags(queryset, user):
+    """
+    Annotate each post with viewer_liked, viewer_shared and viewer_follows_author as
+    EXISTS subqueries, so the page query itself answers them
+    """
+    from social.models import Follow
+
+    return queryset.annotate(
+        viewer_liked=Exists(PostLike.objects.filter(user=user, post=OuterRef('pk'))),
+        viewer_shared=Exists(PostShare.objects.filter(user=user, post=OuterRef('pk'))),
+        viewer_follows_author=Exists(Follow.objects.filter(follower=user, following=OuterRef('user_id'))),
+    )
+
 class PostUserSerializer(serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
     profile_photo = serializers.SerializerMethodField()
+    profile_photo_variants = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
     
     class Meta:
         model = User
-        fields = ['id', 'username', 'full_name', 'profile_photo', 'is_following']
+        fields = ['id', 'username', 'full_name', 'profile_photo', 'profile_photo_variants', 'is_following']
 
     def get_full_name(self, obj):
         return obj.get_full_name()
@@ -25,7 +91,13 @@ class PostUserSerializer(serializers.ModelSerializer):
             return obj.profile_photo.url
         return None
     
+    def get_profile_photo_variants(self, obj):
+        return variant_urls(obj.profile_photo_variants, obj.profile_photo.storage, self.context.get('request'))
+    
     def get_is_following(self, obj):
+        # Use the page-level relation set when the view provided one
+        if 'followed_user_ids' in self.context:
+            return obj.id in self.context['followed_user_ids']
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             from social.models import Follow
@@ -37,27 +109,50 @@ class PostSerializer(serializers.ModelSerializer):
     is_liked = serializers.SerializerMethodField()
     is_shared = serializers.SerializerMethodField()
     timestamp = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+    likes_count = serializers.SerializerMethodField()
+    shares_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
         fields = [
-            'id', 'user', 'content', 'image', 'hashtags', 
+            'id', 'user', 'content', 'image', 'image_variants', 'hashtags', 
             'likes_count', 'shares_count', 'created_at', 'updated_at',
             'is_liked', 'is_shared', 'timestamp'
         ]
 
     def get_is_liked(self, obj):
+        if 'liked_post_ids' in self.context:
+            return obj.id in self.context['liked_post_ids']
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return PostLike.objects.filter(user=request.user, post=obj).exists()
         return False
 
     def get_is_shared(self, obj):
+        if 'shared_post_ids' in self.context:
+            return obj.id in self.context['shared_post_ids']
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return PostShare.objects.filter(user=request.user, post=obj).exists()
         return False
 
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image_variants, obj.image.storage, self.context.get('request'))
+
+    def _with_pending(self, obj, field):
+        # Hot posts keep recent likes/shares in counter shards until they are folded
+        deltas = self.context.get('counter_deltas')
+        if deltas is None:
+            deltas = pending_deltas([obj])
+        return max(0, getattr(obj, field) + deltas.get(obj.id, {}).get(field, 0))
+
+    def get_likes_count(self, obj):
+        return self._with_pending(obj, 'likes_count')
+
+    def get_shares_count(self, obj):
+        return self._with_pending(obj, 'shares_count')
+
     def get_timestamp(self, obj):
         now = timezone.now()
         diff = now - obj.created_at
@@ -0,0 +1,46 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.contrib.auth import get_user_model
+from utils.images import (
+    delete_variants, needs_processing, release_replaced_file, remember_replaced_file, schedule_image_processing,
+    strip_upload_metadata
+)
+from .models import Post
+from .timeline import mark_timeline_materialized
+
+User = get_user_model()
+
+@receiver(post_save, sender=User)
+def materialize_new_timeline(sender, instance, created, **kwargs):
+    """
+    A new user's timeline starts complete: follows and posts fill it from here on
+    """
+    if created:
+        mark_timeline_materialized(instance.id)
+
+@receiver(pre_save, sender=Post)
+def prepare_post_image_upload(sender, instance, update_fields=None, **kwargs):
+    """
+    Strip metadata from a new upload and note which stored post image it replaces, so that
+    reference is released after the save
+    """
+    strip_upload_metadata(instance, 'image')
+    remember_replaced_file(instance, 'image', update_fields)
+
+@receiver(post_save, sender=Post)
+def process_post_image(sender, instance, **kwargs):
+    """
+    Generate resized variants in the background whenever the post image changes
+    """
+    release_replaced_file(instance, 'image')
+    if needs_processing(instance, 'image', 'image_variants'):
+        schedule_image_processing(instance, 'image', 'image_variants')
+
+@receiver(post_delete, sender=Post)
+def release_post_image(sender, instance, **kwargs):
+    """
+    Release the image and its variants so unreferenced blobs can be collected
+    """
+    if instance.image:
+        instance.image.storage.delete(instance.image.name)
+    delete_variants(instance.image.storage, instance.image_variants)
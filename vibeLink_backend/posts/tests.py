@@ -0,0 +1,64 @@
+import atexit
+import fcntl
+import glob
+import json
+import os
+import shutil
+import tempfile
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from .engagement_buffer import EngagementBuffer
+from .models import Post, PostLike
+from .trending import trending_buffer
+
+User = get_user_model()
+
+# Not a running process in the tests below; what matters is that nobody holds its lock
+DEAD_PID = 4194303
+
+
+class EngagementJournalAdoptionTests(TestCase):
+    def setUp(self):
+        self.journal_dir = tempfile.mkdtemp()
+        self.journal_base = os.path.join(self.journal_dir, 'engagement-journal')
+        self.user = User.objects.create_user(email='liker@example.com', username='liker', password='x')
+        self.post = Post.objects.create(user=self.user, content='hello')
+        self.buffer = EngagementBuffer(f'{self.journal_base}.log', interval_ms=60 * 60 * 1000)
+
+    def tearDown(self):
+        self.buffer._stop.set()
+        atexit.unregister(self.buffer.shutdown)
+        if self.buffer._owner_lock:
+            self.buffer._owner_lock.close()
+        shutil.rmtree(self.journal_dir, ignore_errors=True)
+
+    def write_journal(self, pid, user_id, post_id):
+        with open(f'{self.journal_base}.{pid}.log', 'w') as journal:
+            journal.write(json.dumps({'kind': 'like', 'user': user_id, 'post': post_id, 'state': True}) + '\n')
+
+    def test_journal_of_a_dead_process_is_adopted(self):
+        self.write_journal(DEAD_PID, self.user.id, self.post.id)
+        self.buffer._ensure_started()
+
+        self.assertEqual(self.buffer._states, {('like', self.user.id, self.post.id): True})
+        self.assertEqual(glob.glob(f'{self.journal_base}.{DEAD_PID}.*'), [])
+        self.buffer.flush()
+        trending_buffer.flush()
+        self.assertTrue(PostLike.objects.filter(user=self.user, post=self.post).exists())
+
+    def test_journal_of_a_running_process_is_left_alone(self):
+        self.write_journal(DEAD_PID, self.user.id, self.post.id)
+        # The lock conflicts with the buffer's own open of the lock file, as another process's would
+        with open(f'{self.journal_base}.{DEAD_PID}.lock', 'a') as owner_lock:
+            fcntl.flock(owner_lock, fcntl.LOCK_EX)
+            self.buffer._ensure_started()
+
+        self.assertEqual(self.buffer._states, {})
+        self.assertTrue(os.path.exists(f'{self.journal_base}.{DEAD_PID}.log'))
+
+    def test_journal_claimed_by_another_adopter_is_skipped(self):
+        self.write_journal(DEAD_PID, self.user.id, self.post.id)
+        # Another process renamed the file away between the listing and the claim
+        self.assertEqual(self.buffer._claim([f'{self.journal_base}.{DEAD_PID}.missing.log']), [])
+        self.buffer._ensure_started()
+        self.assertEqual(len(self.buffer._states), 1)
@@ -0,0 +1,165 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count
+from social.models import Follow
+from .models import MaterializedTimeline, Post, TimelineEntry
+from .pagination import apply_cursor, encode_cursor, keyset_paginate, FEED_PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Authors with at least this many followers are not fanned out; followers pull their posts at read time
+FANOUT_FOLLOWER_LIMIT = 5000
+# How many of an author's latest posts are copied into a timeline on follow
+BACKFILL_POST_LIMIT = 200
+# Rows written per bulk_create during fan-out
+FANOUT_BATCH_SIZE = 1000
+
+HIGH_FOLLOWER_CACHE_KEY = 'timeline_high_follower_author_ids'
+HIGH_FOLLOWER_CACHE_TIMEOUT = 60 * 10
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='timeline-fanout')
+
+
+def _run_after_commit(func, *args):
+    """
+    Run func once the current transaction commits, on the fan-out worker pool
+    (or inline when TIMELINE_FANOUT_ASYNC is False, e.g. for tests and scripts)
+    """
+    def job():
+        try:
+            func(*args)
+        except Exception:
+            logger.exception('Timeline job %s failed', func.__name__)
+        finally:
+            # Worker threads hold their own DB connection; don't leak it between jobs
+            connection.close()
+
+    if getattr(settings, 'TIMELINE_FANOUT_ASYNC', True):
+        transaction.on_commit(lambda: _executor.submit(job))
+    else:
+        transaction.on_commit(lambda: func(*args))
+
+
+def get_high_follower_author_ids():
+    """Ids of authors whose posts are merged at read time instead of fanned out"""
+    author_ids = cache.get(HIGH_FOLLOWER_CACHE_KEY)
+    if author_ids is None:
+        author_ids = set(
+            Follow.objects.values('following_id')
+            .annotate(followers=Count('id'))
+            .filter(followers__gte=FANOUT_FOLLOWER_LIMIT)
+            .values_list('following_id', flat=True)
+        )
+        cache.set(HIGH_FOLLOWER_CACHE_KEY, author_ids, HIGH_FOLLOWER_CACHE_TIMEOUT)
+    return author_ids
+
+
+def fan_out_post(post_id):
+    """Write a timeline entry for the author and, for normal authors, every follower"""
+    post = Post.objects.filter(id=post_id).values('id', 'user_id', 'created_at').first()
+    if not post:
+        return
+
+    def entry(owner_id):
+        return TimelineEntry(owner_id=owner_id, post_id=post['id'], created_at=post['created_at'])
+
+    TimelineEntry.objects.bulk_create([entry(post['user_id'])], ignore_conflicts=True)
+    if post['user_id'] in get_high_follower_author_ids():
+        return
+
+    follower_ids = (
+        Follow.objects.filter(following_id=post['user_id'])
+        .values_list('follower_id', flat=True)
+        .iterator(chunk_size=FANOUT_BATCH_SIZE)
+    )
+    batch = []
+    for follower_id in follower_ids:
+        batch.append(entry(follower_id))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def backfill_timeline(owner_id, author_ids):
+    """Copy the latest posts of the given (normally fanned-out) authors into a timeline"""
+    high_follower_ids = get_high_follower_author_ids()
+    for author_id in set(author_ids) - high_follower_ids:
+        posts = (
+            Post.objects.filter(user_id=author_id)
+            .order_by('-created_at', '-id')
+            .values_list('id', 'created_at')[:BACKFILL_POST_LIMIT]
+        )
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(owner_id=owner_id, post_id=post_id, created_at=created_at) for post_id, created_at in posts],
+            ignore_conflicts=True
+        )
+
+
+def mark_timeline_materialized(owner_id):
+    """Record that a user's timeline rows are complete, so their feed reads them"""
+    MaterializedTimeline.objects.update_or_create(owner_id=owner_id)
+
+
+def has_materialized_timeline(user):
+    return MaterializedTimeline.objects.filter(owner=user).exists()
+
+
+def remove_from_timeline(owner_id, author_ids):
+    """Drop the posts of the given authors from a timeline"""
+    TimelineEntry.objects.filter(owner_id=owner_id, post__user_id__in=list(author_ids)).delete()
+
+
+def schedule_fan_out(post):
+    _run_after_commit(fan_out_post, post.id)
+
+
+def schedule_backfill(owner_id, author_ids):
+    author_ids = list(author_ids)
+    if author_ids:
+        _run_after_commit(backfill_timeline, owner_id, author_ids)
+
+
+def get_timeline_page(user, queryset, cursor=None, limit=FEED_PAGE_SIZE):
+    """
+    Return (posts, next_cursor) for a user's home feed.
+    Reads the materialized timeline and merges in posts from followed high-follower authors;
+    users whose timeline is not materialized yet (see MaterializedTimeline) fall back to the
+    pull query over followed authors.
+    """
+    if not has_materialized_timeline(user):
+        following_ids = list(Follow.objects.filter(follower=user).values_list('following_id', flat=True))
+        return keyset_paginate(queryset.filter(user_id__in=following_ids + [user.id]), cursor, limit)
+
+    keys = {
+        post_id: created_at
+        for post_id, created_at in apply_cursor(TimelineEntry.objects.filter(owner=user), cursor, 'post_id')
+        .values_list('post_id', 'created_at')[:limit + 1]
+    }
+
+    high_follower_ids = get_high_follower_author_ids()
+    if high_follower_ids:
+        pulled_author_ids = list(
+            Follow.objects.filter(follower=user, following_id__in=high_follower_ids)
+            .values_list('following_id', flat=True)
+        )
+        if pulled_author_ids:
+            keys.update(
+                apply_cursor(Post.objects.filter(user_id__in=pulled_author_ids), cursor)
+                .values_list('id', 'created_at')[:limit + 1]
+            )
+
+    ordered = sorted(keys.items(), key=lambda item: (item[1], item[0]), reverse=True)
+    next_cursor = None
+    if len(ordered) > limit:
+        ordered = ordered[:limit]
+        last_id, last_created_at = ordered[-1]
+        next_cursor = encode_cursor(last_created_at, last_id)
+
+    posts_by_id = queryset.in_bulk([post_id for post_id, _ in ordered])
+    posts = [posts_by_id[post_id] for post_id, _ in ordered if post_id in posts_by_id]
+    return posts, next_cursor
@@ -0,0 +1,254 @@
+import atexit
+import json
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from .models import TrendingScore
+
+logger = logging.getLogger(__name__)
+
+# Engagement loses half its weight every TRENDING_HALF_LIFE_HOURS
+HALF_LIFE_SECONDS = getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 6) * 3600
+DECAY_RATE = math.log(2) / HALF_LIFE_SECONDS
+# Scores are stored relative to the start of a day-long epoch and rescaled when the epoch changes
+EPOCH_SECONDS = 60 * 60 * 24
+# Rows whose decayed score falls below this are dropped when rescaled
+PRUNE_BELOW = 0.01
+
+# How many posts and hashtags are materialized, and how often
+TOP_K = getattr(settings, 'TRENDING_TOP_K', 50)
+TRENDING_CACHE_KEY = 'trending_top'
+TRENDING_CACHE_TIMEOUT = 60
+# Engagement is summed in memory and written this often, one UPDATE per touched post or
+# hashtag instead of one per like; a crash loses at most one interval of (approximate) weight
+FLUSH_INTERVAL_MS = getattr(settings, 'TRENDING_FLUSH_INTERVAL_MS', 2000)
+
+EVENT_WEIGHTS = {
+    'like': 1.0,
+    'share': 3.0,
+    # A new post only counts towards its hashtags
+    'post': 1.0,
+}
+
+
+def current_epoch(now=None):
+    return int((now or time.time()) // EPOCH_SECONDS)
+
+
+def _growth(now, epoch):
+    """exp(rate * t) relative to the start of epoch: what one unit of weight is worth at time now"""
+    return math.exp(DECAY_RATE * (now - epoch * EPOCH_SECONDS))
+
+
+def normalize_hashtags(hashtags):
+    if isinstance(hashtags, str):
+        try:
+            hashtags = json.loads(hashtags)
+        except ValueError:
+            hashtags = hashtags.split(',')
+    if not isinstance(hashtags, list):
+        return []
+    tags = {str(tag).strip().lstrip('#').lower() for tag in hashtags}
+    return sorted(tag[:100] for tag in tags if tag)
+
+
+def _add(kind, amounts, epoch):
+    """Add {key: amount} (expressed in epoch) to the scores, rescaling and creating rows as needed"""
+    rows = TrendingScore.objects.filter(kind=kind, key__in=list(amounts))
+    epochs = dict(rows.values_list('key', 'epoch'))
+
+    def increment(queryset, amount):
+        if amount >= 0:
+            return queryset.update(score=F('score') + amount)
+        return queryset.update(score=Greatest(F('score') + amount, 0))
+
+    missing = []
+    for key, amount in amounts.items():
+        row = rows.filter(key=key)
+        if key not in epochs:
+            if amount > 0:
+                missing.append(TrendingScore(kind=kind, key=key, score=amount, epoch=epoch))
+        elif epochs[key] == epoch:
+            increment(row.filter(epoch=epoch), amount)
+        else:
+            factor = _growth(epochs[key] * EPOCH_SECONDS, epoch)
+            rescaled = row.filter(epoch=epochs[key]).update(score=Greatest(F('score') * factor + amount, 0), epoch=epoch)
+            if not rescaled:
+                # The row was rescaled concurrently by refresh_trending; it is current now
+                increment(row.filter(epoch=epoch), amount)
+
+    if missing:
+        # A concurrent insert of the same key wins and this amount is dropped; trending is approximate
+        TrendingScore.objects.bulk_create(missing, ignore_conflicts=True)
+
+
+def apply_increments(pending, now=None):
+    """Write {(kind, key, epoch): amount} increments to the scores in one transaction"""
+    epoch = current_epoch(now)
+    amounts = defaultdict(lambda: defaultdict(float))
+    for (kind, key, amount_epoch), amount in pending.items():
+        # Amounts buffered in an earlier epoch are converted to the current one
+        amounts[kind][key] += amount * _growth(amount_epoch * EPOCH_SECONDS, epoch)
+    with transaction.atomic():
+        for kind, by_key in amounts.items():
+            _add(kind, {key: amount for key, amount in by_key.items() if amount}, epoch)
+
+
+class TrendingBuffer:
+    """
+    Per-process sums of score increments, written by a background thread every
+    TRENDING_FLUSH_INTERVAL_MS so likes on a hot post don't all update the same row
+    """
+
+    def __init__(self, interval_ms):
+        self.interval = interval_ms / 1000
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = defaultdict(float)
+        self._thread = None
+        self._stop = threading.Event()
+
+    def add(self, kind, keys, weight, now):
+        """Buffer weight (decayed from now) for each key"""
+        if not keys:
+            return
+        epoch = current_epoch(now)
+        amount = weight * _growth(now, epoch)
+        self._ensure_started()
+        with self._lock:
+            for key in keys:
+                self._pending[(kind, key, epoch)] += amount
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='trending-flush', daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Trending buffer flush failed')
+            finally:
+                connection.close()
+
+    def flush(self):
+        """Write everything buffered so far to the database; returns the number of increments"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, defaultdict(float)
+            if not pending:
+                return 0
+            try:
+                apply_increments(pending)
+            except Exception:
+                # Keep the batch for the next flush
+                with self._lock:
+                    for key, amount in pending.items():
+                        self._pending[key] += amount
+                raise
+            return len(pending)
+
+    def shutdown(self):
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Trending buffer flush on shutdown failed')
+
+
+trending_buffer = TrendingBuffer(FLUSH_INTERVAL_MS)
+
+
+def record_engagement(post, event, delta=1):
+    """
+    Count a like/share (delta=1) or its removal (delta=-1) towards the post and its hashtags.
+    Removals subtract the weight an event made now would add, so like/unlike spam nets out.
+    """
+    now = time.time()
+    weight = EVENT_WEIGHTS[event] * delta
+    trending_buffer.add('post', [str(post.id)], weight, now)
+    trending_buffer.add('hashtag', normalize_hashtags(post.hashtags), weight, now)
+
+
+def record_post(post):
+    """Count a new post towards its hashtags"""
+    trending_buffer.add('hashtag', normalize_hashtags(post.hashtags), EVENT_WEIGHTS['post'], time.time())
+
+
+def renormalize(now=None):
+    """
+    Rescale rows from earlier epochs into the current one and drop the ones that have
+    decayed away. Cheap when nothing is stale; runs at most once per epoch in practice.
+    """
+    epoch = current_epoch(now)
+    stale_epochs = list(
+        TrendingScore.objects.filter(epoch__lt=epoch).values_list('epoch', flat=True).distinct()
+    )
+    rescaled = 0
+    for old_epoch in stale_epochs:
+        factor = _growth(old_epoch * EPOCH_SECONDS, epoch)
+        rows = TrendingScore.objects.filter(epoch=old_epoch)
+        rows.filter(score__lt=PRUNE_BELOW / factor).delete()
+        rescaled += rows.update(score=F('score') * factor, epoch=epoch)
+    return rescaled
+
+
+def _top(kind, now):
+    """
+    Top-K keys of a kind by their score at now. Rows still in earlier epochs are converted
+    while reading, so this never writes.
+    """
+    epochs = TrendingScore.objects.filter(kind=kind).order_by().values_list('epoch', flat=True).distinct()
+    candidates = []
+    for epoch in epochs:
+        scale = 1 / _growth(now, epoch)
+        candidates.extend(
+            (key, round(score * scale, 3))
+            for key, score in TrendingScore.objects.filter(kind=kind, epoch=epoch, score__gt=0)
+            .order_by('-score')
+            .values_list('key', 'score')[:TOP_K]
+        )
+    return sorted(candidates, key=lambda item: item[1], reverse=True)[:TOP_K]
+
+
+def _materialize(now):
+    trending = {
+        'posts': [(int(key), score) for key, score in _top('post', now)],
+        'hashtags': _top('hashtag', now),
+        'generated_at': now,
+    }
+    cache.set(TRENDING_CACHE_KEY, trending, TRENDING_CACHE_TIMEOUT)
+    return trending
+
+
+def refresh_trending(now=None):
+    """
+    Write this process's buffered engagement, rescale old rows into the current epoch and
+    store the recomputed top posts and hashtags in the cache
+    """
+    now = now or time.time()
+    trending_buffer.flush()
+    renormalize(now)
+    return _materialize(now)
+
+
+def get_trending():
+    """Materialized top-K, recomputed (read-only) at most once a minute"""
+    trending = cache.get(TRENDING_CACHE_KEY)
+    if trending is None:
+        trending = _materialize(time.time())
+    return trending
@@ -5,7 +5,8 @@ from .views import (
     toggle_like,
     toggle_share,
     user_posts,
-    follower_posts
+    follower_posts,
+    trending
 )
 
 urlpatterns = [
@@ -15,4 +16,5 @@ urlpatterns = [
     path('<int:post_id>/share/', toggle_share, name='post-share'),
     path('user/<int:user_id>/', user_posts, name='user-posts'),
     path('followers/', follower_posts, name='follower-posts'),
+    path('trending/', trending, name='post-trending'),
 ]
@@ -5,27 +5,83 @@ from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from django.db.models import Q
 from .models import Post, PostLike, PostShare
-from .serializers import PostSerializer, CreatePostSerializer
+from .serializers import PostSerializer, CreatePostSerializer, annotate_viewer_flags, get_viewer_relations
+from .pagination import estimate_count, get_page_size, keyset_paginate
+from .counters import adjust_counter, get_counter
+from .engagement_buffer import engagement_buffer, write_behind_enabled
+from .timeline import get_timeline_page, schedule_fan_out
+from .ranking import get_ranked_page
+from .trending import get_trending, record_engagement, record_post, TOP_K
 from social.models import Follow
+from notifications.digest import record_events
 
 User = get_user_model()
 
+# Columns PostSerializer renders for a post card
+LEAN_POST_FIELDS = (
+    'id', 'content', 'image', 'image_variants', 'hashtags', 'likes_count', 'shares_count',
+    'created_at', 'updated_at', 'user__id', 'user__username', 'user__first_name',
+    'user__last_name', 'user__profile_photo', 'user__profile_photo_variants',
+)
+
 class PostListCreateView(generics.ListCreateAPIView):
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Post.objects.select_related('user').prefetch_related('likes', 'shares').all()
+        return Post.objects.select_related('user').all()
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return CreatePostSerializer
         return PostSerializer
 
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('lean') in ('1', 'true'):
+            return self.lean_list(request)
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        posts = page if page is not None else list(queryset)
+        
+        context = self.get_serializer_context()
+        context.update(get_viewer_relations(request.user, posts))
+        serializer = PostSerializer(posts, many=True, context=context)
+        
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def lean_list(self, request):
+        """
+        ?lean=1: newest first with ?cursor=/?limit= keyset pages and no COUNT(*), loading only the
+        columns a post card renders with the viewer's like/share/follow flags annotated.
+        ?count=1 adds an estimated_count taken from table statistics.
+        """
+        queryset = annotate_viewer_flags(
+            Post.objects.select_related('user').only(*LEAN_POST_FIELDS), request.user
+        )
+        try:
+            posts, next_cursor = keyset_paginate(queryset, request.query_params.get('cursor'), get_page_size(request))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        context = self.get_serializer_context()
+        context.update(get_viewer_relations(request.user, posts))
+        data = {
+            'results': PostSerializer(posts, many=True, context=context).data,
+            'next_cursor': next_cursor,
+        }
+        if request.query_params.get('count') in ('1', 'true'):
+            data['estimated_count'] = estimate_count(Post)
+        return Response(data)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         post = serializer.save(user=request.user)
+        schedule_fan_out(post)
+        record_post(post)
         
         # Return the full post data with user information
         full_serializer = PostSerializer(post, context={'request': request})
@@ -36,7 +92,7 @@ class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Post.objects.select_related('user').prefetch_related('likes', 'shares').all()
+        return Post.objects.select_related('user').all()
 
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
@@ -46,53 +102,70 @@ class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def toggle_like(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.only('id', 'user_id', 'likes_count', 'hashtags'), id=post_id)
+    
+    if write_behind_enabled():
+        is_liked, likes_count = engagement_buffer.toggle('like', request.user.id, post)
+        return Response({'is_liked': is_liked, 'likes_count': likes_count})
+    
     like, created = PostLike.objects.get_or_create(user=request.user, post=post)
     
     if not created:
-        like.delete()
-        post.likes_count = max(0, post.likes_count - 1)
+        # Only the request that actually removed the row decrements the counter
+        deleted, _ = PostLike.objects.filter(id=like.id).delete()
+        if deleted:
+            adjust_counter(post, 'likes_count', -1)
+            record_engagement(post, 'like', -1)
         is_liked = False
     else:
-        post.likes_count += 1
+        adjust_counter(post, 'likes_count', 1)
+        record_engagement(post, 'like')
+        record_events([post.user_id], 'like', request.user.id, 'post', post.id)
         is_liked = True
     
-    post.save()
-    
     return Response({
         'is_liked': is_liked,
-        'likes_count': post.likes_count
+        'likes_count': get_counter(post, 'likes_count')
     })
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def toggle_share(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.only('id', 'user_id', 'likes_count', 'shares_count', 'hashtags'), id=post_id)
+    
+    if write_behind_enabled():
+        is_shared, shares_count = engagement_buffer.toggle('share', request.user.id, post)
+        return Response({'is_shared': is_shared, 'shares_count': shares_count})
+    
     share, created = PostShare.objects.get_or_create(user=request.user, post=post)
     
     if not created:
-        share.delete()
-        post.shares_count = max(0, post.shares_count - 1)
+        deleted, _ = PostShare.objects.filter(id=share.id).delete()
+        if deleted:
+            adjust_counter(post, 'shares_count', -1)
+            record_engagement(post, 'share', -1)
         is_shared = False
     else:
-        post.shares_count += 1
+        adjust_counter(post, 'shares_count', 1)
+        record_engagement(post, 'share')
+        record_events([post.user_id], 'share', request.user.id, 'post', post.id)
         is_shared = True
     
-    post.save()
-    
     return Response({
         'is_shared': is_shared,
-        'shares_count': post.shares_count
+        'shares_count': get_counter(post, 'shares_count')
     })
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_posts(request, user_id):
     user = get_object_or_404(User, id=user_id)
-    posts = Post.objects.filter(user=user).select_related('user').prefetch_related('likes', 'shares').order_by('-created_at')
-    serializer = PostSerializer(posts, many=True, context={'request': request})
+    posts = list(Post.objects.filter(user=user).select_related('user').order_by('-created_at'))
+    serializer = PostSerializer(
+        posts, many=True, context={'request': request, **get_viewer_relations(request.user, posts)}
+    )
     return Response({
-        'count': posts.count(),
+        'count': len(posts),
         'next': None,
         'previous': None,
         'results': serializer.data
@@ -101,17 +174,48 @@ def user_posts(request, user_id):
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def follower_posts(request):
-    """Get posts from users that the current user follows, including the current user's own posts"""
-    # Get the IDs of users that the current user follows
-    following_ids = Follow.objects.filter(follower=request.user).values_list('following_id', flat=True)
+    """
+    Get posts from users that the current user follows, including the current user's own posts.
+    Paginated newest first with ?cursor= (the previous response's next_cursor) and ?limit=;
+    ?mode=ranked orders recent posts by engagement and affinity to their author instead
+    """
+    posts = Post.objects.select_related('user')
+    mode = request.query_params.get('mode', 'latest')
+    if mode not in ('latest', 'ranked'):
+        return Response({'error': "mode must be 'latest' or 'ranked'"}, status=status.HTTP_400_BAD_REQUEST)
+    get_page = get_ranked_page if mode == 'ranked' else get_timeline_page
     
-    # Include the current user's own posts as well
-    all_user_ids = list(following_ids) + [request.user.id]
+    try:
+        page, next_cursor = get_page(request.user, posts, request.query_params.get('cursor'), get_page_size(request))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Get posts from followed users and current user, ordered by creation date (most recent first)
-    posts = Post.objects.filter(
-        user_id__in=all_user_ids
-    ).select_related('user').prefetch_related('likes', 'shares').order_by('-created_at')
+    serializer = PostSerializer(
+        page, many=True, context={'request': request, **get_viewer_relations(request.user, page)}
+    )
+    return Response({
+        'results': serializer.data,
+        'next_cursor': next_cursor
+    })
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def trending(request):
+    """
+    Trending posts and hashtags by time-decayed engagement, refreshed every minute.
+    ?limit= caps both lists (default and max: TRENDING_TOP_K)
+    """
+    limit = get_page_size(request, default=TOP_K, maximum=TOP_K)
+    top = get_trending()
+    top_posts = top['posts'][:limit]
+    posts_by_id = Post.objects.select_related('user').in_bulk([post_id for post_id, _ in top_posts])
+    posts = [posts_by_id[post_id] for post_id, _ in top_posts if post_id in posts_by_id]
+    scores = dict(top_posts)
     
-    serializer = PostSerializer(posts, many=True, context={'request': request})
-    return Response(serializer.data)
+    serializer = PostSerializer(
+        posts, many=True, context={'request': request, **get_viewer_relations(request.user, posts)}
+    )
+    return Response({
+        'posts': [{**data, 'trending_score': scores[data['id']]} for data in serializer.data],
+        'hashtags': [{'hashtag': tag, 'score': score} for tag, score in top['hashtags'][:limit]],
+    })
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Follow, Notification, AIRecommendationCache
+from .models import Follow, Notification, NotificationCounter, AIRecommendationCache
 
 @admin.register(Follow)
 class FollowAdmin(admin.ModelAdmin):
@@ -9,7 +9,7 @@ class FollowAdmin(admin.ModelAdmin):
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ['id', 'user', 'from_user', 'notification_type', 'content_preview', 'is_read', 'created_at']
+    list_display = ['id', 'user', 'from_user', 'notification_type', 'content_preview', 'actor_count', 'is_read', 'created_at']
     list_filter = ['notification_type', 'is_read', 'created_at']
     search_fields = ['user__username', 'from_user__username', 'content']
     
@@ -17,6 +17,12 @@ class NotificationAdmin(admin.ModelAdmin):
         return obj.content[:50] + "..." if len(obj.content) > 50 else obj.content
     content_preview.short_description = "Content Preview"
 
+@admin.register(NotificationCounter)
+class NotificationCounterAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'unread_count', 'updated_at']
+    search_fields = ['user__username']
+    readonly_fields = ['updated_at']
+
 @admin.register(AIRecommendationCache)
 class AIRecommendationCacheAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'cache_key', 'created_at', 'expires_at', 'is_valid']
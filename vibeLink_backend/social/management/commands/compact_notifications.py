@@ -0,0 +1,104 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from social.models import Notification, NotificationCounter
+
+
+class Command(BaseCommand):
+    help = 'Delete old read notifications and collapse old unread ones into one row per user and type'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Only touch notifications older than this many days (default: 30)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Chunk size used when reading and writing notifications (default: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be compacted without changing anything',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        # Read notifications past the retention window are simply dropped
+        old_read = Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(f'DRY RUN: Would delete {old_read.count()} old read notifications')
+            )
+        else:
+            deleted = old_read.delete()[0]
+            self.stdout.write(
+                self.style.SUCCESS(f'Successfully deleted {deleted} old read notifications')
+            )
+
+        # Old unread notifications are folded into the newest row per (user, type)
+        groups = {}
+        old_unread = (
+            Notification.objects.filter(is_read=False, created_at__lt=cutoff)
+            .order_by('user_id', 'notification_type', '-created_at', '-id')
+            .only('id', 'user_id', 'notification_type', 'content', 'verb', 'actor_count', 'recent_actors')
+        )
+        for notification in old_unread.iterator(chunk_size=options['batch_size']):
+            groups.setdefault((notification.user_id, notification.notification_type), []).append(notification)
+
+        collapsible = {key: rows for key, rows in groups.items() if len(rows) > 1}
+        removed_count = sum(len(rows) - 1 for rows in collapsible.values())
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'DRY RUN: Would collapse {removed_count} old unread notifications '
+                    f'into {len(collapsible)} aggregated notifications'
+                )
+            )
+            return
+
+        affected_users = set()
+        with transaction.atomic():
+            survivors = []
+            removed_ids = []
+            for (user_id, _), rows in collapsible.items():
+                survivor, rest = rows[0], rows[1:]
+                actors = list(survivor.recent_actors)
+                seen = {actor.get('id') for actor in actors}
+                for row in rest:
+                    survivor.actor_count += row.actor_count
+                    for actor in row.recent_actors:
+                        if actor.get('id') not in seen:
+                            seen.add(actor.get('id'))
+                            actors.append(actor)
+                    removed_ids.append(row.id)
+                survivor.recent_actors = actors[:Notification.MAX_RECENT_ACTORS]
+                if survivor.verb:
+                    survivor.content = Notification.build_content(survivor.recent_actors, survivor.actor_count, survivor.verb)
+                survivors.append(survivor)
+                affected_users.add(user_id)
+
+            if survivors:
+                Notification.objects.bulk_update(survivors, ['content', 'actor_count', 'recent_actors'], batch_size=options['batch_size'])
+            for start in range(0, len(removed_ids), options['batch_size']):
+                Notification.objects.filter(id__in=removed_ids[start:start + options['batch_size']]).delete()
+
+        # Collapsed rows each counted as unread, so rebuild the affected counters
+        for user_id in affected_users:
+            NotificationCounter.recalculate(user_id)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully collapsed {removed_count} old unread notifications '
+                f'into {len(survivors)} aggregated notifications'
+            )
+        )
@@ -1,8 +1,11 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 import hashlib
 import json
+from notifications.digest import record_events
 
 User = get_user_model()
 
@@ -26,18 +29,169 @@ class Notification(models.Model):
         ('match', 'Match'),
     ]
     
+    # New events of the same type inside this window collapse into one unread row
+    AGGREGATION_WINDOW = timezone.timedelta(hours=6)
+    # How many of the latest actors are kept on an aggregated row
+    MAX_RECENT_ACTORS = 3
+    
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     from_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='social_notifications_sent', null=True, blank=True)
     notification_type = models.CharField(max_length=10, choices=NOTIFICATION_TYPES)
     content = models.TextField()
+    verb = models.CharField(max_length=100, blank=True, help_text='Action text used to re-render aggregated content')
+    actor_count = models.PositiveIntegerField(default=1, help_text='Number of events collapsed into this notification')
+    recent_actors = models.JSONField(default=list, blank=True, help_text='Latest actors as {id, username}, newest first')
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['user', 'is_read', '-created_at']),
+            models.Index(fields=['user', '-created_at', '-id']),
+            models.Index(fields=['user', 'notification_type', 'is_read', '-created_at']),
+        ]
 
     def __str__(self):
         return f"{self.user.username}: {self.content[:50]}..."
+    
+    @staticmethod
+    def build_content(recent_actors, actor_count, verb):
+        """Render e.g. "alice started following you" or "alice and 12 others started following you" """
+        if not recent_actors:
+            return f"Someone {verb}"
+        first = recent_actors[0]['username']
+        others = actor_count - 1
+        if others <= 0:
+            return f"{first} {verb}"
+        if others == 1 and len(recent_actors) > 1:
+            return f"{first} and {recent_actors[1]['username']} {verb}"
+        # Rows grouped before recent_actors existed know only one actor, so others can be 1 here
+        return f"{first} and {others} other{'s' if others > 1 else ''} {verb}"
+    
+    def add_actor(self, from_user, verb):
+        """Fold another actor into this aggregated notification (in memory)"""
+        actor = {'id': from_user.id, 'username': from_user.username}
+        others = [a for a in self.recent_actors if a.get('id') != from_user.id]
+        if len(others) == len(self.recent_actors):
+            self.actor_count += 1
+        self.recent_actors = ([actor] + others)[:self.MAX_RECENT_ACTORS]
+        self.from_user = from_user
+        self.verb = verb
+        self.content = self.build_content(self.recent_actors, self.actor_count, verb)
+        self.created_at = timezone.now()
+    
+    @classmethod
+    def _open_aggregates(cls, user_ids, notification_type):
+        """
+        Latest unread notification per user still inside the aggregation window, locked until
+        the caller's transaction ends so concurrent events for the same user don't overwrite
+        each other's actors. Rows without a verb can't be re-rendered and are never reused.
+        """
+        candidates = cls.objects.select_for_update().filter(
+            user_id__in=user_ids,
+            notification_type=notification_type,
+            is_read=False,
+            created_at__gte=timezone.now() - cls.AGGREGATION_WINDOW
+        ).exclude(verb='').order_by('user_id', '-created_at', '-id')
+        aggregates = {}
+        for notification in candidates:
+            aggregates.setdefault(notification.user_id, notification)
+        return aggregates
+    
+    @classmethod
+    def notify(cls, user, from_user, notification_type, verb):
+        """Create a notification, or collapse it into a recent unread one of the same type"""
+        return cls.notify_many([user.id], from_user, notification_type, verb)
+    
+    @classmethod
+    def notify_many(cls, user_ids, from_user, notification_type, verb):
+        """
+        Notify several users of the same event with one bulk update for the
+        users that already have an open aggregate and one bulk insert for the rest
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        
+        with transaction.atomic():
+            aggregates = cls._open_aggregates(user_ids, notification_type)
+            for notification in aggregates.values():
+                notification.add_actor(from_user, verb)
+            if aggregates:
+                cls.objects.bulk_update(
+                    aggregates.values(),
+                    ['from_user', 'content', 'verb', 'actor_count', 'recent_actors', 'created_at']
+                )
+            
+            actor = {'id': from_user.id, 'username': from_user.username}
+            new_ids = user_ids - set(aggregates)
+            cls.objects.bulk_create([
+                cls(
+                    user_id=user_id,
+                    from_user=from_user,
+                    notification_type=notification_type,
+                    content=cls.build_content([actor], 1, verb),
+                    verb=verb,
+                    recent_actors=[actor]
+                )
+                for user_id in new_ids
+            ])
+            # bulk_create skips post_save, so bump the unread counters directly
+            if new_ids:
+                NotificationCounter.increment(new_ids)
+            # The same event waits for the users' next digest email
+            record_events(user_ids, notification_type, from_user.id, 'user', from_user.id)
+
+class NotificationCounter(models.Model):
+    """
+    Per-user unread notification counter so polling clients read one small row
+    instead of counting the notification table
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='notification_counter')
+    unread_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username}: {self.unread_count} unread"
+
+    @classmethod
+    def get_unread_count(cls, user):
+        """Return the cached unread count, rebuilding the counter row if it is missing"""
+        counter = cls.objects.filter(user=user).values_list('unread_count', flat=True).first()
+        if counter is None:
+            counter = cls.recalculate(user.id)
+        return counter
+
+    @classmethod
+    def recalculate(cls, user_id):
+        """Recount unread notifications for a user and store the result"""
+        unread_count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cls.objects.update_or_create(user_id=user_id, defaults={'unread_count': unread_count})
+        return unread_count
+
+    @classmethod
+    def increment(cls, user_ids, amount=1):
+        """Add to the unread count of one or more users"""
+        if not isinstance(user_ids, (list, tuple, set)):
+            user_ids = [user_ids]
+        user_ids = set(user_ids)
+        existing = set(cls.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+        if existing:
+            cls.objects.filter(user_id__in=existing).update(unread_count=F('unread_count') + amount)
+        # Users without a counter row yet are rebuilt from the table (which already holds the new rows)
+        for user_id in user_ids - existing:
+            cls.recalculate(user_id)
+
+    @classmethod
+    def decrement(cls, user, amount=1):
+        """Subtract from the unread count of a user, never going below zero"""
+        cls.objects.filter(user=user).update(unread_count=Greatest(F('unread_count') - amount, 0))
+
+    @classmethod
+    def reset(cls, user):
+        """Set the unread count of a user to zero"""
+        cls.objects.update_or_create(user=user, defaults={'unread_count': 0})
 
 class AIRecommendationCache(models.Model):
     """
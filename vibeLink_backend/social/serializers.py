@@ -3,12 +3,14 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from .models import Follow, Notification
 import math
+from utils.images import variant_urls
 
 User = get_user_model()
 
 class UserDiscoverySerializer(serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
     profile_photo = serializers.SerializerMethodField()
+    profile_photo_variants = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
     follows_you = serializers.SerializerMethodField()
     is_mutual_follow = serializers.SerializerMethodField()
@@ -21,7 +23,7 @@ class UserDiscoverySerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
-            'id', 'username', 'full_name', 'profile_photo', 'bio', 'age',
+            'id', 'username', 'full_name', 'profile_photo', 'profile_photo_variants', 'bio', 'age',
             'city', 'state', 'latitude', 'longitude', 'hashtags',
             'is_following', 'follows_you', 'is_mutual_follow', 'match_percentage', 'distance',
             'followers_count', 'following_count', 'posts_count',
@@ -39,6 +41,9 @@ class UserDiscoverySerializer(serializers.ModelSerializer):
             return obj.profile_photo.url
         return None
 
+    def get_profile_photo_variants(self, obj):
+        return variant_urls(obj.profile_photo_variants, obj.profile_photo.storage, self.context.get('request'))
+
     def get_is_following(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
@@ -114,7 +119,10 @@ class NotificationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Notification
-        fields = ['id', 'from_user', 'notification_type', 'content', 'is_read', 'created_at', 'timestamp']
+        fields = [
+            'id', 'from_user', 'notification_type', 'content', 'actor_count', 'recent_actors',
+            'is_read', 'created_at', 'timestamp'
+        ]
 
     def get_timestamp(self, obj):
         now = timezone.now()
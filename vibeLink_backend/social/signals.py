@@ -1,7 +1,7 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import AIRecommendationCache
+from .models import AIRecommendationCache, Notification, NotificationCounter
 
 User = get_user_model()
 
@@ -36,6 +36,14 @@ def invalidate_ai_cache_on_settings_update(sender, instance, **kwargs):
     except:
         pass
 
+@receiver(post_save, sender=Notification)
+def increment_unread_count_on_notification_create(sender, instance, created, **kwargs):
+    """
+    Keep the per-user unread counter in sync when a notification is created
+    """
+    if created and not instance.is_read:
+        NotificationCounter.increment(instance.user_id)
+
 def invalidate_cache_for_user(user):
     """
     Utility function to manually invalidate cache for a user
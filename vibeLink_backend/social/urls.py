@@ -3,9 +3,11 @@ from .views import (
     UserDiscoveryView,
     FollowView,
     toggle_follow,
+    bulk_follow,
     get_followers,
     get_following,
     NotificationListView,
+    unread_notifications_count,
     mark_notification_read,
     mark_all_notifications_read,
     delete_notification,
@@ -21,9 +23,11 @@ urlpatterns = [
     path('discover/', UserDiscoveryView.as_view(), name='user-discovery'),
     path('follows/', FollowView.as_view(), name='follow-list'),
     path('follow/<int:user_id>/', toggle_follow, name='toggle-follow'),
+    path('follow/bulk/', bulk_follow, name='bulk-follow'),
     path('followers/<int:user_id>/', get_followers, name='get-followers'),
     path('following/<int:user_id>/', get_following, name='get-following'),
     path('notifications/', NotificationListView.as_view(), name='notification-list'),
+    path('notifications/unread-count/', unread_notifications_count, name='unread-notifications-count'),
     path('notifications/<int:notification_id>/read/', mark_notification_read, name='mark-notification-read'),
     path('notifications/read-all/', mark_all_notifications_read, name='mark-all-notifications-read'),
     path('notifications/<int:notification_id>/delete/', delete_notification, name='delete-notification'),
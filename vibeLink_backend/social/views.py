@@ -3,15 +3,23 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import Q, Count
-from .models import Follow, Notification, AIRecommendationCache
+from rest_framework.pagination import CursorPagination
+from .models import Follow, Notification, NotificationCounter, AIRecommendationCache
 from .serializers import UserDiscoverySerializer, FollowSerializer, NotificationSerializer
 from .services import get_user_matches, calculate_match_score
+from posts.timeline import schedule_backfill, remove_from_timeline
 # from .ai_matchmaking import ai_matchmaking_service, AIRecommendationsResponse
 from rest_framework.views import APIView
 
 User = get_user_model()
 
+# Upper bound on users accepted by a single bulk follow request
+BULK_FOLLOW_LIMIT = 100
+
+FOLLOW_NOTIFICATION_VERB = 'started following you'
+
 class UserDiscoveryView(generics.ListAPIView):
     serializer_class = UserDiscoverySerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -94,24 +102,13 @@ def toggle_follow(request, user_id):
     if not created:
         follow.delete()
         is_following = False
-        
-        # Create unfollow notification
-        Notification.objects.create(
-            user=user_to_follow,
-            from_user=request.user,
-            notification_type='follow',
-            content=f"{request.user.username} unfollowed you"
-        )
+        remove_from_timeline(request.user.id, [user_to_follow.id])
     else:
         is_following = True
+        schedule_backfill(request.user.id, [user_to_follow.id])
         
-        # Create follow notification
-        Notification.objects.create(
-            user=user_to_follow,
-            from_user=request.user,
-            notification_type='follow',
-            content=f"{request.user.username} started following you"
-        )
+        # Create (or collapse into a recent) follow notification
+        Notification.notify(user_to_follow, request.user, 'follow', FOLLOW_NOTIFICATION_VERB)
     
     # Invalidate AI recommendation cache for current user so Discover refreshes
     try:
@@ -124,6 +121,79 @@ def toggle_follow(request, user_id):
         'followers_count': user_to_follow.followers.count()
     })
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_follow(request):
+    """Follow or unfollow a list of users in a single transaction"""
+    user_ids = request.data.get('user_ids')
+    action = request.data.get('action', 'follow')
+    
+    if not isinstance(user_ids, list) or not user_ids:
+        return Response({'error': 'user_ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if action not in ('follow', 'unfollow'):
+        return Response({'error': "action must be 'follow' or 'unfollow'"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(user_ids) > BULK_FOLLOW_LIMIT:
+        return Response({'error': f'Cannot process more than {BULK_FOLLOW_LIMIT} users at once'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Only real integers or digit strings: int() would quietly turn 1.5 or True into an id
+    if not all(
+        (isinstance(user_id, int) and not isinstance(user_id, bool))
+        or (isinstance(user_id, str) and user_id.isascii() and user_id.isdigit())
+        for user_id in user_ids
+    ):
+        return Response({'error': 'user_ids must contain integers'}, status=status.HTTP_400_BAD_REQUEST)
+    requested_ids = {int(user_id) for user_id in user_ids}
+    
+    # Unknown ids and the current user are silently skipped
+    requested_ids.discard(request.user.id)
+    target_ids = set(User.objects.filter(id__in=requested_ids).values_list('id', flat=True))
+    
+    with transaction.atomic():
+        existing_ids = set(
+            Follow.objects.filter(follower=request.user, following_id__in=target_ids)
+            .values_list('following_id', flat=True)
+        )
+        
+        if action == 'follow':
+            changed_ids = target_ids - existing_ids
+            Follow.objects.bulk_create(
+                [Follow(follower=request.user, following_id=user_id) for user_id in changed_ids],
+                ignore_conflicts=True
+            )
+            Notification.notify_many(changed_ids, request.user, 'follow', FOLLOW_NOTIFICATION_VERB)
+            schedule_backfill(request.user.id, changed_ids)
+        else:
+            changed_ids = existing_ids
+            Follow.objects.filter(follower=request.user, following_id__in=changed_ids).delete()
+            remove_from_timeline(request.user.id, changed_ids)
+    
+    # Invalidate AI recommendation cache once for the whole batch
+    if changed_ids:
+        try:
+            AIRecommendationCache.invalidate_user_cache(request.user)
+        except Exception:
+            pass
+    
+    followers_counts = dict(
+        Follow.objects.filter(following_id__in=target_ids)
+        .values_list('following_id')
+        .annotate(count=Count('id'))
+    )
+    is_following = action == 'follow'
+    
+    return Response({
+        'results': [
+            {
+                'user_id': user_id,
+                'is_following': is_following,
+                'followers_count': followers_counts.get(user_id, 0)
+            }
+            for user_id in sorted(target_ids)
+        ],
+        'changed_count': len(changed_ids),
+        'following_count': request.user.following.count()
+    })
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def get_followers(request, user_id):
@@ -143,35 +213,63 @@ def get_following(request, user_id):
 class NotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    
+    class InboxPagination(CursorPagination):
+        # Keyset pagination on the (user, -created_at, -id) index, no COUNT(*) per page
+        page_size = 20
+        ordering = ('-created_at', '-id')
+
+        def get_paginated_response(self, data):
+            return Response({
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'unread_count': NotificationCounter.get_unread_count(self.request.user),
+                'results': data,
+            })
+
+    pagination_class = InboxPagination
 
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user)
+        return Notification.objects.filter(user=self.request.user).select_related('from_user')
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def unread_notifications_count(request):
+    """Get the unread notification count for the current user"""
+    return Response({'unread_count': NotificationCounter.get_unread_count(request.user)})
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def mark_notification_read(request, notification_id):
     notification = get_object_or_404(Notification, id=notification_id, user=request.user)
-    notification.is_read = True
-    notification.save()
+    if not notification.is_read:
+        notification.is_read = True
+        notification.save(update_fields=['is_read'])
+        NotificationCounter.decrement(request.user)
     return Response({'status': 'notification marked as read'})
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def mark_all_notifications_read(request):
     Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    NotificationCounter.reset(request.user)
     return Response({'status': 'all notifications marked as read'})
 
 @api_view(['DELETE'])
 @permission_classes([permissions.IsAuthenticated])
 def delete_notification(request, notification_id):
     notification = get_object_or_404(Notification, id=notification_id, user=request.user)
+    was_unread = not notification.is_read
     notification.delete()
+    if was_unread:
+        NotificationCounter.decrement(request.user)
     return Response({'status': 'notification deleted'})
 
 @api_view(['DELETE'])
 @permission_classes([permissions.IsAuthenticated])
 def delete_all_notifications(request):
     Notification.objects.filter(user=request.user).delete()
+    NotificationCounter.reset(request.user)
     return Response({'status': 'all notifications deleted'})
 
 @api_view(['GET'])
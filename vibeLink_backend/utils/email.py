@@ -1,9 +1,210 @@
+import logging
 import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import OutgoingEmail
 
-class EmailThread(threading.Thread):
-    def __init__(self, email):
-        self.email = email
-        threading.Thread.__init__(self)
+logger = logging.getLogger(__name__)
 
-    def run(self):
-        self.email.send(fail_silently=True)
\ No newline at end of file
+# Rows claimed per batch; one SMTP connection sends a whole batch
+EMAIL_BATCH_SIZE = 50
+# A failed send is retried after RETRY_BASE_SECONDS * 2**attempts, at most MAX_RETRY_DELAY apart
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 60
+MAX_RETRY_DELAY = 60 * 60
+# How long a claimed batch may take before another worker may take it over
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+PRIORITY_ACCOUNT = 10
+PRIORITY_NOTIFICATION = 0
+
+# Drains the outbox after each commit in this process; with a dedicated run_email_worker set
+# EMAIL_OUTBOX_DRAIN_IN_PROCESS = False so web processes only insert rows
+_drainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='email-outbox')
+# When the earliest in-process retry drain is due (time.monotonic()), or None
+_retry_drain_at = None
+_retry_lock = threading.Lock()
+
+
+def queue_email(subject, body, recipient_list, content_subtype='plain', priority=PRIORITY_NOTIFICATION, notification=None):
+    """Add an email to the outbox; it is sent after the current transaction commits"""
+    email = OutgoingEmail.objects.create(
+        recipients=list(recipient_list),
+        subject=subject,
+        body=body,
+        content_subtype=content_subtype if content_subtype in ('html', 'plain') else 'plain',
+        priority=priority,
+        notification=notification,
+    )
+    if getattr(settings, 'EMAIL_OUTBOX_DRAIN_IN_PROCESS', True):
+        transaction.on_commit(lambda: _drainer.submit(_drain_in_background))
+    return email
+
+
+def queue_emails(emails, priority=PRIORITY_NOTIFICATION):
+    """
+    Add many emails to the outbox with one insert. Each item is a dict with subject, body,
+    recipients and optionally content_subtype and notification.
+    """
+    rows = OutgoingEmail.objects.bulk_create([
+        OutgoingEmail(
+            recipients=list(email['recipients']),
+            subject=email['subject'],
+            body=email['body'],
+            content_subtype=email.get('content_subtype', 'plain'),
+            priority=priority,
+            notification=email.get('notification'),
+        )
+        for email in emails
+    ], batch_size=500)
+    if rows and getattr(settings, 'EMAIL_OUTBOX_DRAIN_IN_PROCESS', True):
+        transaction.on_commit(lambda: _drainer.submit(_drain_in_background))
+    return rows
+
+
+def claim_batch(limit=EMAIL_BATCH_SIZE):
+    """
+    Atomically take up to limit due emails (pending, or claimed by a worker that timed out).
+    Safe to call from several threads and processes: each row is claimed by one caller.
+    """
+    now = timezone.now()
+    due = Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', claimed_until__lt=now)
+    ids = list(OutgoingEmail.objects.filter(due).order_by('-priority', 'id').values_list('id', flat=True)[:limit])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    OutgoingEmail.objects.filter(due, id__in=ids).update(
+        status='sending', claim_token=token, claimed_until=now + CLAIM_TIMEOUT
+    )
+    return list(OutgoingEmail.objects.filter(claim_token=token, status='sending').order_by('-priority', 'id'))
+
+
+def _to_message(email):
+    message = EmailMessage(email.subject, email.body, settings.DEFAULT_FROM_EMAIL, email.recipients)
+    message.content_subtype = email.content_subtype
+    return message
+
+
+def _record_success(email, now):
+    OutgoingEmail.objects.filter(id=email.id, claim_token=email.claim_token).update(
+        status='sent', sent_at=now, attempts=email.attempts + 1, claimed_until=None, last_error=''
+    )
+    if email.notification_id:
+        from notifications.models import EmailNotification
+        EmailNotification.objects.filter(id=email.notification_id).update(status='sent', sent_at=now, updated_at=now)
+
+
+def _record_failure(email, error, now):
+    attempts = email.attempts + 1
+    if attempts >= MAX_ATTEMPTS:
+        OutgoingEmail.objects.filter(id=email.id, claim_token=email.claim_token).update(
+            status='failed', attempts=attempts, claimed_until=None, last_error=error
+        )
+        if email.notification_id:
+            from notifications.models import EmailNotification
+            EmailNotification.objects.filter(id=email.notification_id).update(
+                status='failed', error_message=error, updated_at=now
+            )
+        return
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+    OutgoingEmail.objects.filter(id=email.id, claim_token=email.claim_token).update(
+        status='pending', attempts=attempts, next_attempt_at=now + timedelta(seconds=delay),
+        claimed_until=None, last_error=error
+    )
+
+
+def schedule_retry_drain(delay):
+    """
+    Drain the outbox again after delay seconds unless a drain is already due sooner. Each
+    in-process drain schedules the next one for the earliest pending retry, so retries don't
+    wait for the next queued email. Timers die with the process; the rows stay pending for the
+    next drain or run_email_worker.
+    """
+    global _retry_drain_at
+    due_at = time.monotonic() + delay
+    with _retry_lock:
+        if _retry_drain_at is not None and _retry_drain_at <= due_at:
+            return
+        _retry_drain_at = due_at
+    timer = threading.Timer(delay, _retry_drain)
+    timer.daemon = True
+    timer.start()
+
+
+def _retry_drain():
+    global _retry_drain_at
+    with _retry_lock:
+        # Timers replaced by an earlier one still fire; clearing only what is due keeps that harmless
+        if _retry_drain_at is not None and _retry_drain_at <= time.monotonic():
+            _retry_drain_at = None
+    _drainer.submit(_drain_in_background)
+
+
+def send_batch(emails):
+    """Send claimed emails over one SMTP connection; returns (sent, failed)"""
+    sent = failed = 0
+    try:
+        smtp = get_connection()
+        smtp.open()
+    except Exception as error:
+        now = timezone.now()
+        for email in emails:
+            _record_failure(email, f'Could not connect: {error}', now)
+        return 0, len(emails)
+
+    try:
+        for email in emails:
+            try:
+                # One message per call so a rejected recipient only fails its own email
+                smtp.send_messages([_to_message(email)])
+            except Exception as error:
+                logger.warning('Sending email %s failed: %s', email.id, error)
+                _record_failure(email, str(error), timezone.now())
+                failed += 1
+            else:
+                _record_success(email, timezone.now())
+                sent += 1
+    finally:
+        try:
+            smtp.close()
+        except Exception:
+            pass
+    return sent, failed
+
+
+def drain_outbox(limit=EMAIL_BATCH_SIZE):
+    """Send due emails batch by batch until none are left; returns (sent, failed)"""
+    sent = failed = 0
+    while True:
+        batch = claim_batch(limit)
+        if not batch:
+            return sent, failed
+        batch_sent, batch_failed = send_batch(batch)
+        sent += batch_sent
+        failed += batch_failed
+
+
+def _schedule_next_retry():
+    next_attempt_at = (
+        OutgoingEmail.objects.filter(status='pending').order_by('next_attempt_at')
+        .values_list('next_attempt_at', flat=True).first()
+    )
+    if next_attempt_at is not None:
+        schedule_retry_drain(max((next_attempt_at - timezone.now()).total_seconds(), 0))
+
+
+def _drain_in_background():
+    try:
+        drain_outbox()
+        _schedule_next_retry()
+    except Exception:
+        logger.exception('Draining the email outbox failed')
+    finally:
+        connection.close()
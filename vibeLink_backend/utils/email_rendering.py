@@ -0,0 +1,86 @@
+import re
+from functools import lru_cache
+from django.conf import settings
+from django.dispatch import receiver
+from django.template.loader import get_template
+from django.utils.autoreload import file_changed
+from django.utils.html import conditional_escape
+
+# name: (template, fields that differ per recipient). Recipient fields may only be printed
+# as {{ field }}; they are filled in after the rest of the template has been rendered.
+EMAIL_TEMPLATES = {
+    'otp': ('emails/accounts/otp.txt', ('full_name', 'otp')),
+    'reset_password': ('emails/accounts/reset_password.txt', ('full_name', 'reset_password_url')),
+    'digest': ('emails/notifications/digest.txt', ('full_name', 'summary')),
+}
+
+# Stands in for a recipient field while the shared parts of a template are rendered
+PLACEHOLDER = '\x00{}\x00'
+PLACEHOLDER_RE = re.compile('\x00(\\w+)\x00')
+# Prepared templates kept per (name, shared context)
+MAX_PREPARED = 64
+
+
+def shared_context():
+    """Context that is the same for every email"""
+    return {'site_name': settings.SITE_NAME}
+
+
+@lru_cache(maxsize=MAX_PREPARED)
+def _prepare(name, shared_items):
+    """
+    Render everything of a template that does not depend on the recipient, once. Returns the
+    result split around the recipient fields: [text, field, text, field, ..., text].
+    """
+    template_name, fields = EMAIL_TEMPLATES[name]
+    context = dict(shared_items)
+    context.update({field: PLACEHOLDER.format(field) for field in fields})
+    rendered = get_template(template_name).render(context).strip() + '\n'
+    return tuple(PLACEHOLDER_RE.split(rendered))
+
+
+def _prepared(name, shared=None):
+    context = shared_context()
+    if shared:
+        context.update(shared)
+    return _prepare(name, tuple(sorted(context.items())))
+
+
+def _fill(parts, values, escape):
+    out = list(parts)
+    for index in range(1, len(out), 2):
+        value = values.get(out[index], '')
+        out[index] = conditional_escape(value) if escape else str(value)
+    return ''.join(out)
+
+
+def render_email(name, context, shared=None):
+    """Render one email of a registered template; context holds the recipient fields"""
+    return render_batch(name, [context], shared)[0]
+
+
+def render_batch(name, contexts, shared=None):
+    """
+    Render a template for many recipients. The shared parts are rendered once (and cached
+    across calls), so each recipient only costs filling in their own fields.
+    """
+    parts = _prepared(name, shared)
+    escape = EMAIL_TEMPLATES[name][0].endswith('.html')
+    return [_fill(parts, context, escape) for context in contexts]
+
+
+def compile_email_templates():
+    """Load and prepare every registered template with the default shared context"""
+    for name in EMAIL_TEMPLATES:
+        _prepared(name)
+
+
+def clear_email_template_cache():
+    _prepare.cache_clear()
+
+
+@receiver(file_changed)
+def clear_cache_on_template_change(sender, file_path, **kwargs):
+    # runserver reloads edited templates without restarting, so drop the prepared copies too
+    if file_path.suffix in ('.txt', '.html'):
+        clear_email_template_cache()
@@ -0,0 +1,220 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels for each generated size (images are never upscaled)
+VARIANT_SIZES = {
+    'thumbnail': 150,
+    'card': 600,
+    'full': 1600,
+}
+
+# Output formats: (Pillow format, file extension, save options)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-pipeline')
+
+
+def _open_normalized(field_file):
+    """Open an uploaded image, apply its EXIF orientation and drop alpha/metadata"""
+    field_file.open('rb')
+    try:
+        image = Image.open(field_file)
+        image.load()
+    finally:
+        field_file.close()
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    # Re-created pixel data carries no EXIF (GPS, device, ...) into the variants
+    return image
+
+
+# Save options when an upload is re-encoded without its metadata, per Pillow format
+CLEAN_SAVE_OPTIONS = {
+    'JPEG': {'quality': 95},
+    'WEBP': {'quality': 95},
+    'PNG': {'optimize': True},
+}
+
+
+def strip_upload_metadata(instance, field_name):
+    """
+    pre_save: replace a pending image upload with a copy that has its EXIF orientation applied
+    and all other metadata (GPS position, device, timestamps) removed, so the stored original
+    is as safe to publish as the variants. The ICC profile is kept so colours don't shift.
+    """
+    field_file = getattr(instance, field_name)
+    if not field_file or field_file._committed:
+        return
+    try:
+        field_file.seek(0)
+        image = Image.open(field_file)
+        image.load()
+    except Exception:
+        # Not an image Pillow can read; the field's own validation deals with it
+        return
+    if getattr(image, 'n_frames', 1) > 1:
+        # Re-encoding would keep only the first frame, so animations are stored as uploaded
+        return
+    name = os.path.basename(field_file.name)
+    pil_format = image.format
+    if pil_format not in CLEAN_SAVE_OPTIONS:
+        # Other formats (TIFF, BMP, ...) are stored as PNG
+        pil_format = 'PNG'
+        name = f'{os.path.splitext(name)[0]}.png'
+    icc_profile = image.info.get('icc_profile')
+    image = ImageOps.exif_transpose(image)
+    options = dict(CLEAN_SAVE_OPTIONS[pil_format])
+    if pil_format == 'JPEG' and image.mode not in ('RGB', 'L', 'CMYK'):
+        image = image.convert('RGB')
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    buffer = io.BytesIO()
+    # No exif= argument: the new file carries no EXIF block at all
+    image.save(buffer, pil_format, **options)
+    setattr(instance, field_name, ContentFile(buffer.getvalue(), name=name))
+
+
+def generate_variants(field_file):
+    """
+    Write resized WebP and JPEG copies of an image next to it under variants/.
+    Returns {'source': <original name>, <size>: {<format>: <storage path>}}.
+    """
+    storage = field_file.storage
+    image = _open_normalized(field_file)
+    base = os.path.join('variants', os.path.splitext(field_file.name)[0])
+
+    variants = {'source': field_file.name}
+    for size_name, max_edge in VARIANT_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        variants[size_name] = {}
+        for format_name, (pil_format, extension, options) in VARIANT_FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **options)
+            path = f'{base}/{size_name}.{extension}'
+            if storage.exists(path):
+                storage.delete(path)
+            variants[size_name][format_name] = storage.save(path, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def variant_paths(variants):
+    """All storage paths listed in a variants dict"""
+    return [path for size_name in VARIANT_SIZES for path in (variants or {}).get(size_name, {}).values()]
+
+
+def delete_variants(storage, variants):
+    """Remove the files of a previously generated variants dict"""
+    for path in variant_paths(variants):
+        try:
+            storage.delete(path)
+        except Exception:
+            logger.warning('Could not delete image variant %s', path)
+
+
+def process_image(model, pk, field_name, variants_field):
+    """Generate variants for model.<field_name> and store them in model.<variants_field>"""
+    instance = model.objects.filter(pk=pk).only('pk', field_name, variants_field).first()
+    if instance is None:
+        return
+    field_file = getattr(instance, field_name)
+    old_variants = getattr(instance, variants_field) or {}
+
+    if field_file:
+        variants = generate_variants(field_file)
+        unchanged = Q(**{field_name: field_file.name})
+    else:
+        variants = {}
+        unchanged = Q(**{f'{field_name}__isnull': True}) | Q(**{field_name: ''})
+    # Only store the result if the image wasn't replaced while we were working
+    updated = model.objects.filter(unchanged, pk=pk).update(**{variants_field: variants})
+    if updated and old_variants.get('source') != variants.get('source'):
+        delete_variants(field_file.storage, old_variants)
+        # A cleared image releases its upload here; replaced uploads are released when the row is saved
+        if not field_file and old_variants.get('source'):
+            field_file.storage.delete(old_variants['source'])
+
+
+def remember_replaced_file(instance, field_name, update_fields=None):
+    """
+    pre_save: note the stored file that a pending upload is about to replace, so
+    release_replaced_file can drop its reference once the row is saved
+    """
+    attribute = f'_replaced_{field_name}'
+    instance.__dict__.pop(attribute, None)
+    field_file = getattr(instance, field_name)
+    if instance.pk is None or not field_file or field_file._committed:
+        return
+    if update_fields is not None and field_name not in update_fields:
+        return
+    old_name = type(instance)._base_manager.filter(pk=instance.pk).values_list(field_name, flat=True).first()
+    if old_name:
+        setattr(instance, attribute, old_name)
+
+
+def release_replaced_file(instance, field_name):
+    """
+    post_save: release the file an upload replaced. Every upload takes a reference, so this
+    also applies when the new upload has the same content (and therefore the same name).
+    """
+    old_name = instance.__dict__.pop(f'_replaced_{field_name}', None)
+    if old_name:
+        getattr(instance, field_name).storage.delete(old_name)
+
+
+def needs_processing(instance, field_name, variants_field):
+    field_file = getattr(instance, field_name)
+    variants = getattr(instance, variants_field) or {}
+    return (field_file.name or None) != variants.get('source')
+
+
+def schedule_image_processing(instance, field_name, variants_field):
+    """
+    Generate variants after the current transaction commits, on the image worker pool
+    (or inline when IMAGE_PROCESSING_ASYNC is False)
+    """
+    model, pk = type(instance), instance.pk
+
+    def job():
+        try:
+            process_image(model, pk, field_name, variants_field)
+        except Exception:
+            logger.exception('Image processing failed for %s %s', model.__name__, pk)
+        finally:
+            connection.close()
+
+    if getattr(settings, 'IMAGE_PROCESSING_ASYNC', True):
+        transaction.on_commit(lambda: _executor.submit(job))
+    else:
+        transaction.on_commit(lambda: process_image(model, pk, field_name, variants_field))
+
+
+def variant_urls(variants, storage, request=None):
+    """Map a variants dict to URLs: {<size>: {<format>: url}}, or None while not processed"""
+    if not variants or not variants.get('source'):
+        return None
+    urls = {}
+    for size_name in VARIANT_SIZES:
+        urls[size_name] = {}
+        for format_name, path in variants.get(size_name, {}).items():
+            url = storage.url(path)
+            urls[size_name][format_name] = request.build_absolute_uri(url) if request else url
+    return urls
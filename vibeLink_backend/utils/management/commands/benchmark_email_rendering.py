@@ -0,0 +1,47 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import get_template
+from utils.email_rendering import EMAIL_TEMPLATES, render_batch, render_email, shared_context
+
+
+class Command(BaseCommand):
+    help = 'Measure email renders per second: full template renders against prepared batch rendering'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--template',
+            default='digest',
+            help=f'Registered email template to render (one of: {", ".join(EMAIL_TEMPLATES)}; default: digest)',
+        )
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=10000,
+            help='Emails rendered per run (default: 10000)',
+        )
+
+    def _timed(self, label, count, render):
+        start = time.perf_counter()
+        render()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'{label:<28}{count / elapsed:>12,.0f} renders/sec')
+        return elapsed
+
+    def handle(self, *args, **options):
+        name, count = options['template'], options['count']
+        if name not in EMAIL_TEMPLATES:
+            raise CommandError(f'Unknown email template "{name}"')
+        template_name, fields = EMAIL_TEMPLATES[name]
+        contexts = [{field: f'{field} {index}' for field in fields} for index in range(count)]
+
+        template = get_template(template_name)
+        full = self._timed(
+            'Full render per email', count,
+            lambda: [template.render({**shared_context(), **context}) for context in contexts]
+        )
+        single = self._timed('render_email', count, lambda: [render_email(name, context) for context in contexts])
+        batch = self._timed('render_batch', count, lambda: render_batch(name, contexts))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'render_email is {full / single:.1f}x and render_batch {full / batch:.1f}x faster than full renders'
+        ))
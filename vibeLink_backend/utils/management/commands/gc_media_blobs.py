@@ -0,0 +1,142 @@
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from posts.models import Post
+from utils.images import variant_paths
+from utils.models import MediaBlob
+from utils.storage import BLOB_PREFIX, media_storage
+
+User = get_user_model()
+
+# (model, file field, variants field) pairs whose values point at blobs
+BLOB_REFERENCES = [
+    (Post, 'image', 'image_variants'),
+    (User, 'profile_photo', 'profile_photo_variants'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Delete content-addressed media blobs that are no longer referenced'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            default=24,
+            help='Keep unreferenced blobs touched within this many hours (default: 24)',
+        )
+        parser.add_argument(
+            '--reconcile',
+            action='store_true',
+            help='Recount references from the database and adopt blob files without a row first',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Chunk size used when reading and writing rows (default: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be deleted without changing anything',
+        )
+
+    def count_references(self, batch_size):
+        references = Counter()
+        for model, file_field, variants_field in BLOB_REFERENCES:
+            rows = model.objects.values_list(file_field, variants_field).iterator(chunk_size=batch_size)
+            for name, variants in rows:
+                if name:
+                    references[name] += 1
+                for path in variant_paths(variants):
+                    references[path] += 1
+        return references
+
+    def blob_files(self):
+        root = media_storage.path(BLOB_PREFIX)
+        for directory, _, files in os.walk(root):
+            for file_name in files:
+                full_path = os.path.join(directory, file_name)
+                yield os.path.relpath(full_path, media_storage.location).replace(os.sep, '/'), full_path
+
+    def reconcile(self, batch_size, dry_run):
+        references = self.count_references(batch_size)
+        now = timezone.now()
+
+        changed = []
+        known = set()
+        for blob in MediaBlob.objects.only('id', 'name', 'ref_count').iterator(chunk_size=batch_size):
+            known.add(blob.name)
+            if blob.ref_count != references.get(blob.name, 0):
+                blob.ref_count = references.get(blob.name, 0)
+                blob.updated_at = now
+                changed.append(blob)
+
+        # Files left behind by an interrupted save have no row yet
+        orphans = [
+            MediaBlob(name=name, size=os.path.getsize(full_path), ref_count=references.get(name, 0))
+            for name, full_path in self.blob_files() if name not in known
+        ]
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'DRY RUN: Would fix {len(changed)} reference counts and adopt {len(orphans)} untracked blobs'
+                )
+            )
+            return
+
+        MediaBlob.objects.bulk_update(changed, ['ref_count', 'updated_at'], batch_size=batch_size)
+        MediaBlob.objects.bulk_create(orphans, batch_size=batch_size, ignore_conflicts=True)
+        self.stdout.write(
+            self.style.SUCCESS(f'Fixed {len(changed)} reference counts and adopted {len(orphans)} untracked blobs')
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+        grace = timedelta(hours=options['grace_hours'])
+        cutoff = timezone.now() - grace
+
+        if options['reconcile']:
+            self.reconcile(batch_size, dry_run)
+
+        candidates = MediaBlob.objects.filter(ref_count__lte=0, updated_at__lt=cutoff)
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(f'DRY RUN: Would delete {candidates.count()} unreferenced blobs')
+            )
+            return
+
+        deleted = 0
+        freed = 0
+        for blob in candidates.only('id', 'name', 'size').iterator(chunk_size=batch_size):
+            # A file written again since the cutoff (a new upload of the same content) keeps its row
+            try:
+                modified = datetime.fromtimestamp(
+                    os.path.getmtime(media_storage.path(blob.name)), tz=timezone.get_current_timezone()
+                )
+            except FileNotFoundError:
+                modified = None
+            if modified is not None and modified >= cutoff:
+                continue
+            with transaction.atomic():
+                # Re-check inside the delete so a blob re-acquired since the query is kept; a
+                # concurrent upload waits on the deleted row and writes the file again afterwards
+                if not MediaBlob.objects.filter(id=blob.id, ref_count__lte=0, updated_at__lt=cutoff).delete()[0]:
+                    continue
+                # The row and the file go together: if the purge fails the delete is rolled back
+                if modified is not None:
+                    media_storage.purge(blob.name)
+                    freed += blob.size
+            deleted += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully deleted {deleted} unreferenced blobs ({freed} bytes)')
+        )
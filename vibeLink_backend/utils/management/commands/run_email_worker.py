@@ -0,0 +1,71 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connection
+from utils.email import EMAIL_BATCH_SIZE, claim_batch, send_batch
+from utils.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox with a bounded pool of SMTP workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Concurrent SMTP connections (default: 4)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=EMAIL_BATCH_SIZE,
+            help=f'Emails sent per SMTP connection (default: {EMAIL_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait when the outbox is empty (default: 2)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the outbox has no due emails instead of waiting for more',
+        )
+
+    def worker(self, batch_size):
+        """Claim and send batches until none are due; runs on a pool thread"""
+        sent = failed = 0
+        try:
+            while True:
+                batch = claim_batch(batch_size)
+                if not batch:
+                    return sent, failed
+                batch_sent, batch_failed = send_batch(batch)
+                sent += batch_sent
+                failed += batch_failed
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        threads = max(1, options['threads'])
+        pending = OutgoingEmail.objects.filter(status='pending').count()
+        self.stdout.write(f'Email worker started with {threads} threads ({pending} emails pending)')
+
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='email-worker') as pool:
+            while True:
+                results = [
+                    future.result()
+                    for future in [pool.submit(self.worker, options['batch_size']) for _ in range(threads)]
+                ]
+                sent = sum(result[0] for result in results)
+                failed = sum(result[1] for result in results)
+                if sent or failed:
+                    self.stdout.write(self.style.SUCCESS(f'Sent {sent} emails, {failed} failed'))
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS('Outbox drained'))
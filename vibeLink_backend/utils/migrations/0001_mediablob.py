@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Storage path of the blob (derived from its SHA-256)', max_length=255, unique=True)),
+                ('size', models.BigIntegerField(default=0, help_text='Size in bytes')),
+                ('ref_count', models.IntegerField(default=0, help_text='Number of saves not yet released')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ref_count', 'updated_at'], name='utils_media_ref_cou_f7d242_idx')],
+            },
+        ),
+    ]
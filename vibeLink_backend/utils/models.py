@@ -1 +1,84 @@
-from django.db import models
\ No newline at end of file
+from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+
+class MediaBlob(models.Model):
+    """A content-addressed media file and how many references point at it"""
+    name = models.CharField(max_length=255, unique=True, help_text='Storage path of the blob (derived from its SHA-256)')
+    size = models.BigIntegerField(default=0, help_text='Size in bytes')
+    ref_count = models.IntegerField(default=0, help_text='Number of saves not yet released')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+    @classmethod
+    def acquire(cls, name, size):
+        """Add a reference to a blob, creating its row on first use"""
+        now = timezone.now()
+        if cls.objects.filter(name=name).update(ref_count=F('ref_count') + 1, updated_at=now):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(name=name, size=size, ref_count=1)
+        except IntegrityError:
+            # Another upload of the same content created the row first
+            cls.objects.filter(name=name).update(ref_count=F('ref_count') + 1, updated_at=now)
+
+    @classmethod
+    def release(cls, name):
+        """Drop a reference; files are only removed later by gc_media_blobs"""
+        cls.objects.filter(name=name).update(
+            ref_count=Greatest(F('ref_count') - 1, 0), updated_at=timezone.now()
+        )
+
+
+class OutgoingEmail(models.Model):
+    """
+    An email waiting in the outbox. Requests only insert rows; run_email_worker (or the
+    in-process drainer, see utils.email) claims and sends them in batches over one SMTP
+    connection, retrying failures with backoff.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    recipients = models.JSONField(default=list)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    content_subtype = models.CharField(max_length=10, default='plain')
+    # Higher goes first: account emails (OTP, password reset) jump ahead of notifications
+    priority = models.SmallIntegerField(default=0)
+    notification = models.ForeignKey(
+        'notifications.EmailNotification', on_delete=models.SET_NULL, null=True, blank=True, related_name='outgoing_emails'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # A claimed row whose worker died is picked up again after this
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    claim_token = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['status', 'claimed_until']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
@@ -0,0 +1,78 @@
+import hashlib
+import os
+import tempfile
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = 'blobs'
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names every file after the SHA-256 of its content.
+    Identical uploads share one blob on disk; MediaBlob keeps a reference count
+    per blob and the gc_media_blobs command removes the unreferenced ones.
+    """
+
+    def blob_name(self, digest, name):
+        extension = os.path.splitext(name)[1].lower()
+        return f'{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content hash in _save, so there is nothing to de-duplicate here
+        return name
+
+    def _save(self, name, content):
+        from .models import MediaBlob
+
+        tmp_dir = os.path.join(self.location, '.tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        # Hash while streaming into a temp file on the same file system so the final move is atomic
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks(HASH_CHUNK_SIZE):
+                    hasher.update(chunk)
+                    tmp_file.write(chunk)
+                    size += len(chunk)
+
+            blob_name = self.blob_name(hasher.hexdigest(), name)
+            # Take the reference before placing the file so a concurrent GC can't remove it under us
+            MediaBlob.acquire(blob_name, size)
+
+            full_path = self.path(blob_name)
+            if os.path.exists(full_path):
+                os.remove(tmp_path)
+                # Freshen the mtime so gc_media_blobs treats the blob as recently used
+                os.utime(full_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp_path, self.file_permissions_mode)
+                os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return blob_name
+
+    def delete(self, name):
+        """Release one reference; the file stays until gc_media_blobs finds it unreferenced"""
+        from .models import MediaBlob
+
+        if name:
+            MediaBlob.release(name)
+
+    def purge(self, name):
+        """Remove the blob file itself (used by gc_media_blobs)"""
+        super().delete(name)
+
+
+media_storage = ContentAddressedStorage()
@@ -0,0 +1,116 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from .models import MediaBlob
+from .storage import media_storage
+
+User = get_user_model()
+
+
+def make_image(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 40), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def make_photo_with_exif():
+    """A 60x40 JPEG tagged as rotated 90 degrees, with a GPS position and camera model"""
+    exif = Image.Exif()
+    exif[0x0110] = 'Test Camera'
+    exif[0x0112] = 6
+    exif.get_ifd(0x8825)[2] = (52.0, 22.0, 0.0)
+    buffer = io.BytesIO()
+    Image.new('RGB', (60, 40), 'green').save(buffer, 'JPEG', exif=exif, icc_profile=b'test-profile')
+    return buffer.getvalue()
+
+
+class MediaBlobReferenceTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, IMAGE_PROCESSING_ASYNC=False)
+        self.settings_override.enable()
+        self.user = User.objects.create_user(email='photo@example.com', username='photo', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def upload(self, content, filename='photo.png', content_type='image/png'):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                '/api/auth/user/update/',
+                {'profile_photo': SimpleUploadedFile(filename, content, content_type=content_type)},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        return self.user.profile_photo.name
+
+    def test_reuploading_the_same_photo_keeps_one_reference(self):
+        content = make_image('red')
+        name = self.upload(content)
+        for _ in range(2):
+            self.assertEqual(self.upload(content), name)
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 1)
+
+    def test_replacing_the_photo_releases_the_old_blob(self):
+        first = self.upload(make_image('red'))
+        self.upload(make_image('red'))
+        second = self.upload(make_image('blue'))
+        self.assertNotEqual(first, second)
+        self.assertEqual(MediaBlob.objects.get(name=first).ref_count, 0)
+        self.assertEqual(MediaBlob.objects.get(name=second).ref_count, 1)
+
+    def test_original_upload_is_stored_without_exif(self):
+        self.upload(make_photo_with_exif(), 'photo.jpg', 'image/jpeg')
+        with self.user.profile_photo.open('rb') as stored:
+            image = Image.open(stored)
+            image.load()
+        self.assertEqual(len(image.getexif()), 0)
+        self.assertNotIn('exif', image.info)
+        # Orientation is applied to the pixels and the colour profile survives
+        self.assertEqual(image.size, (40, 60))
+        self.assertEqual(image.info.get('icc_profile'), b'test-profile')
+
+
+class GarbageCollectionTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def unreferenced_blob(self, content, file_age):
+        name = media_storage.save('photo.png', io.BytesIO(content))
+        media_storage.delete(name)
+        MediaBlob.objects.filter(name=name).update(updated_at=timezone.now() - timedelta(days=2))
+        modified = time.time() - file_age.total_seconds()
+        os.utime(media_storage.path(name), (modified, modified))
+        return name
+
+    def test_unreferenced_blob_is_removed_with_its_file(self):
+        name = self.unreferenced_blob(make_image('red'), timedelta(days=2))
+        call_command('gc_media_blobs', stdout=io.StringIO())
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+        self.assertFalse(media_storage.exists(name))
+
+    def test_recently_written_file_keeps_its_row(self):
+        name = self.unreferenced_blob(make_image('blue'), timedelta(minutes=5))
+        call_command('gc_media_blobs', stdout=io.StringIO())
+        self.assertTrue(MediaBlob.objects.filter(name=name).exists())
+        self.assertTrue(media_storage.exists(name))
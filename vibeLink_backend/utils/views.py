@@ -8,8 +8,12 @@ import os
 from django.conf import settings
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from django.http import HttpResponseNotModified
+from django.views.static import serve
+from .storage import BLOB_PREFIX
 
 CACHE_TIMEOUT = 60 * 60 * 24
+BLOB_CACHE_CONTROL = 'public, max-age=31536000, immutable'
 
 class StateCityView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -56,4 +60,17 @@ class StateCityView(APIView):
     
 class SiteStatusView(APIView):
     def get(self, request):
-        return Response({'status': 'ok'}, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response({'status': 'ok'}, status=status.HTTP_200_OK)
+
+
+def serve_blob(request, path):
+    """Serve a content-addressed media blob; its name changes with its content, so it can be cached forever"""
+    # The file name is the SHA-256 of the content, which makes it a strong validator
+    etag = '"{}"'.format(os.path.splitext(os.path.basename(path))[0])
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = serve(request, f'{BLOB_PREFIX}/{path}', document_root=settings.MEDIA_ROOT)
+    response['Cache-Control'] = BLOB_CACHE_CONTROL
+    response['ETag'] = etag
+    return response